@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end benchmark of EmailProcessor.process using replay fixtures.
+
+Record fixtures first (live run):
+    PYTHONPATH=src python3 -m email_processor joe@multifi.ai --record fixtures/joe
+
+Then benchmark with no network:
+    python3 scripts/bench_replay.py joe@multifi.ai fixtures/joe --latency gmail=120,llm=2500,trello=300
+"""
+
+import sys
+import asyncio
+import contextlib
+import io
+import tempfile
+import time
+from pathlib import Path
+
+SKILL_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SKILL_ROOT / "src"))
+
+from email_processor.cli.process import EmailProcessor
+from email_processor.core.replay import FixtureStore, parse_latency_spec
+
+
+def run_once(email: str, fixture_dir: Path, latency: dict, error_rate: float,
+             seed: int, verbose: bool) -> dict:
+    """Run one replayed session into a throwaway data directory."""
+    fixtures = FixtureStore(fixture_dir, "replay", latency_ms=latency,
+                            error_rate=error_rate, seed=seed)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        processor = EmailProcessor(email, skill_root=SKILL_ROOT, fixtures=fixtures,
+                                   storage_base=Path(data_dir))
+
+        output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        started = time.perf_counter()
+        with output:
+            try:
+                asyncio.run(processor.process())
+            finally:
+                processor.close()
+        elapsed = time.perf_counter() - started
+
+    return {"seconds": elapsed, "calls": dict(fixtures.counts)}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark the processing pipeline against recorded fixtures"
+    )
+    parser.add_argument("email", help="Account email (must exist in config.json)")
+    parser.add_argument("fixtures", type=Path, help="Fixture directory from --record")
+    parser.add_argument("--latency", default="0",
+                        help="Injected latency in ms, e.g. 50 or gmail=120,llm=2500,trello=300")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Injected fault probability per call (0.0-1.0)")
+    parser.add_argument("--runs", type=int, default=3, help="Number of timed runs")
+    parser.add_argument("--seed", type=int, default=0, help="Fault injection seed")
+    parser.add_argument("--verbose", action="store_true", help="Show pipeline output")
+
+    args = parser.parse_args()
+    latency = parse_latency_spec(args.latency)
+
+    manifest = args.fixtures / "manifest.json"
+    emails = None
+    if manifest.exists():
+        import json
+        emails = json.loads(manifest.read_text())["counts"].get("gmail_message")
+
+    print(f"📼 Fixtures: {args.fixtures} ({emails or '?'} emails)")
+    print(f"⏱️  Latency: {latency or 'none'} · error rate: {args.error_rate:.0%}")
+
+    timings = []
+    for run in range(1, args.runs + 1):
+        result = run_once(args.email, args.fixtures, latency, args.error_rate,
+                          args.seed, args.verbose)
+        timings.append(result["seconds"])
+        rate = f" · {emails / result['seconds']:.1f} emails/s" if emails else ""
+        print(f"   Run {run}: {result['seconds']:.2f}s{rate} · calls {result['calls']}")
+
+    best = min(timings)
+    print(f"\n📊 Best {best:.2f}s · median {sorted(timings)[len(timings) // 2]:.2f}s")
+    if emails:
+        print(f"   Throughput: {emails / best:.1f} emails/s")
+
+
+if __name__ == "__main__":
+    main()
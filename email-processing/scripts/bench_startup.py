@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+CLI startup benchmark: time to first output line for interactive subcommands.
+
+`search` and `review` run against a temporary skill root populated with
+synthetic stored emails and a review queue, so the timing covers the index
+scan and the queue load, not just an empty data dir. Their first line is
+printed only once that work is done.
+
+Fails (exit 1) if a command exceeds its budget, or if it imports a heavy
+module it has no use for (e.g. `search` loading googleapiclient or LangChain).
+
+    python3 scripts/bench_startup.py
+    python3 scripts/bench_startup.py --runs 20 --budget-ms 150 --emails 5000 --imports
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+SKILL_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SKILL_ROOT / "src"))
+
+# Modules that only the process command needs
+PROCESS_ONLY = ["pydantic", "langchain_google_genai", "google.genai"]
+# ...and those review needs (it shares EmailProcessor), but search must not load
+REVIEW_ONLY = ["asyncio", "yaml", "googleapiclient",
+               "email_processor.cli.process", "email_processor.core.gmail"]
+
+
+def commands(account: str) -> list:
+    """(label, argv after `-m email_processor`, modules it must not import)."""
+    return [
+        ("usage", [], PROCESS_ONLY + REVIEW_ONLY),
+        ("search", ["search", "invoice"], PROCESS_ONLY + REVIEW_ONLY),
+        ("review", ["review", account], PROCESS_ONLY),
+    ]
+
+
+def build_skill_root(emails: int, queued: int) -> Path:
+    """Copy the package and config into a temp dir and fill its data dir."""
+    from email_processor.models.email import Email, TriageDecision
+    from email_processor.storage import ReviewQueue, create_storage
+
+    root = Path(tempfile.mkdtemp(prefix="bench_startup_"))
+    shutil.copytree(SKILL_ROOT / "src", root / "src")
+    shutil.copy(SKILL_ROOT / "SKILL.md", root / "SKILL.md")
+    shutil.copytree(SKILL_ROOT / "config", root / "config")
+
+    config = json.loads((root / "config" / "config.json").read_text())
+    config["storage"]["base_path"] = "data"
+    (root / "config" / "config.json").write_text(json.dumps(config, indent=2))
+    account = next(iter(config["accounts"]))
+
+    storage = create_storage(config["storage"], str(root / "data"), account,
+                             config.get("timezone", "America/Los_Angeles"))
+    queue = ReviewQueue(storage.base / "review" / "queue.jsonl")
+    now = datetime.now().astimezone()
+    subjects = ["Invoice #{}", "Weekly digest {}", "Re: contract draft {}", "Build {} failed"]
+    review = []
+    for i in range(emails):
+        email = Email(
+            message_id=f"m{i:06d}", thread_id=f"t{i:06d}", account=account,
+            from_addr=f"sender{i % 97}@example{i % 13}.com", to_addr=account, cc_addr=None,
+            subject=subjects[i % len(subjects)].format(i), date=now - timedelta(hours=i),
+            snippet=f"Synthetic message {i}", body=f"Synthetic body {i}\n" * 20,
+        )
+        queue_it = i < queued
+        decision = TriageDecision(
+            email_index=i, message_id=email.message_id,
+            action="review" if queue_it else "archive",
+            category="customer" if queue_it else "newsletter", priority=i % 4,
+            reason="benchmark", processor="rules",
+        )
+        storage.save_email(email)
+        storage.save_decision(decision, email)
+        storage.update_index(email, decision)
+        if queue_it:
+            review.append((email, decision))
+    storage.close()
+    queue.add(review, storage.session_id)
+    return root, account
+
+
+def _env(root: Path) -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(root / "src"), env.get("PYTHONPATH")]))
+    return env
+
+
+def time_to_first_line(root: Path, argv: list) -> float:
+    """Seconds from spawn until the command writes its first non-blank line of output."""
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "email_processor", *argv],
+        cwd=root, env=_env(root), stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+    )
+    while not proc.stdout.readline().strip() and proc.poll() is None:
+        pass
+    elapsed = time.perf_counter() - started
+    proc.kill()
+    proc.communicate()
+    return elapsed
+
+
+def imported_modules(root: Path, argv: list) -> dict:
+    """Module → cumulative import time (µs) via -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "email_processor", *argv],
+        cwd=root, env=_env(root), stdin=subprocess.DEVNULL, capture_output=True, text=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        modules[name] = int(cumulative)
+    return modules
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark CLI startup latency")
+    parser.add_argument("--runs", type=int, default=10, help="Timed runs per command")
+    parser.add_argument("--budget-ms", type=float, default=150.0,
+                        help="Max median time to first output line")
+    parser.add_argument("--emails", type=int, default=2000, help="Stored emails to search")
+    parser.add_argument("--queued", type=int, default=200, help="Emails in the review queue")
+    parser.add_argument("--imports", action="store_true", help="Show the slowest imports")
+    args = parser.parse_args()
+
+    root, account = build_skill_root(args.emails, min(args.queued, args.emails))
+    print(f"📦 {args.emails} stored emails, {min(args.queued, args.emails)} queued for review")
+    try:
+        failed = run(root, account, args)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    sys.exit(1 if failed else 0)
+
+
+def run(root: Path, account: str, args) -> bool:
+    """Time every command; True if any missed its budget or imported a forbidden module."""
+    failed = False
+    for label, argv, forbidden in commands(account):
+        timings = sorted(time_to_first_line(root, argv) for _ in range(args.runs))
+        median_ms = timings[len(timings) // 2] * 1000
+        ok = median_ms <= args.budget_ms
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} {label:<8} median {median_ms:6.1f}ms · "
+              f"best {timings[0] * 1000:6.1f}ms (budget {args.budget_ms:.0f}ms)")
+
+        modules = imported_modules(root, argv)
+        heavy = [m for m in forbidden if m in modules]
+        if heavy:
+            failed = True
+            print(f"   ❌ imports heavy modules: {', '.join(heavy)}")
+
+        if args.imports:
+            for name, us in sorted(modules.items(), key=lambda kv: -kv[1])[:8]:
+                print(f"      {us / 1000:7.1f}ms  {name}")
+    return failed
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,13 @@
-"""Main CLI entry point."""
+"""Main CLI entry point.
+
+Subcommands import their own dependencies: `search` touches only local files
+and must not pay for asyncio, googleapiclient, LangChain or pydantic.
+"""
 
 import sys
-import asyncio
 import json
 from pathlib import Path
 
-from .cli.process import EmailProcessor
-from .cli.search import search
-
 
 def _find_skill_root() -> Path:
     """Find the skill root by locating SKILL.md."""
@@ -19,11 +19,112 @@ def _find_skill_root() -> Path:
     raise FileNotFoundError("Could not find SKILL.md in any parent directory")
 
 
+def _validate_account(skill_root: Path, email: str):
+    """Exit with the list of configured accounts if `email` is not one of them."""
+    with open(skill_root / "config" / "config.json") as f:
+        config = json.load(f)
+
+    if email not in config['accounts']:
+        print(f"❌ Email not found in configuration: {email}")
+        print()
+        print("Available emails:")
+        for account_email in config['accounts'].keys():
+            print(f"  - {account_email}")
+        sys.exit(1)
+
+
+def _parse_process_args(args: list[str]) -> dict:
+    """Parse `<email> [limit] [options]` for the process command."""
+    opts = {
+        "email": None,
+        "limit": None,
+        "record": None,
+        "replay": None,
+        "latency": None,
+        "error_rate": 0.0,
+        "review": True,
+        "resume": None,
+        "profile": False,
+        "cprofile": False,
+        "window": None,
+        "force": False,
+    }
+    positional = []
+
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "--record" and i + 1 < len(args):
+            opts["record"] = Path(args[i + 1])
+            i += 2
+        elif arg == "--replay" and i + 1 < len(args):
+            opts["replay"] = Path(args[i + 1])
+            i += 2
+        elif arg == "--latency" and i + 1 < len(args):
+            opts["latency"] = args[i + 1]
+            i += 2
+        elif arg == "--error-rate" and i + 1 < len(args):
+            opts["error_rate"] = float(args[i + 1])
+            i += 2
+        elif arg == "--resume" and i + 1 < len(args):
+            opts["resume"] = args[i + 1]
+            i += 2
+        elif arg == "--window" and i + 1 < len(args):
+            opts["window"] = int(args[i + 1])
+            i += 2
+        elif arg == "--force":
+            opts["force"] = True
+            i += 1
+        elif arg == "--profile":
+            opts["profile"] = True
+            i += 1
+        elif arg == "--cprofile":
+            opts["cprofile"] = True
+            i += 1
+        elif arg in ("--no-review", "--non-interactive"):
+            opts["review"] = False
+            i += 1
+        elif not arg.startswith("--"):
+            positional.append(arg)
+            i += 1
+        else:
+            print(f"Unknown option: {arg}")
+            sys.exit(1)
+
+    if not positional:
+        print("Usage: python -m email_processor <email> [limit] [options]")
+        sys.exit(1)
+
+    opts["email"] = positional[0]
+    if len(positional) > 1:
+        opts["limit"] = int(positional[1])
+
+    if opts["record"] and opts["replay"]:
+        print("❌ --record and --replay are mutually exclusive")
+        sys.exit(1)
+
+    return opts
+
+
 def main():
     """Main entry point for email processing."""
     if len(sys.argv) < 2:
-        print("Usage: python -m email_processor <email> [limit]")
+        print("Usage: python -m email_processor <email> [limit] [options]")
         print("       python -m email_processor search <query> [options]")
+        print("       python -m email_processor review <email>")
+        print("       python -m email_processor migrate-storage <email> [--to sqlite|files]")
+        print()
+        print("  Options:")
+        print("    --record <dir>         Record Gmail/LLM/Trello responses to a fixture dir")
+        print("    --replay <dir>         Replay recorded responses (no network)")
+        print("    --latency <spec>       Replay latency in ms, e.g. 50 or gmail=120,llm=2500")
+        print("    --error-rate <p>       Replay fault injection probability (0.0-1.0)")
+        print("    --no-review            Queue emails needing review and exit (for cron)")
+        print("    --resume <session_id>  Continue an interrupted session from its checkpoint")
+        print("    --window <n>           Process n messages at a time (bounded memory)")
+        print("    --force                Re-triage messages left unchanged since a recent run")
+        print("    --profile              Per-stage timing into session.json + trace.json")
+        print("    --cprofile             --profile plus a cProfile dump (profile.pstats)")
         print()
         print("  Examples:")
         print("    python -m email_processor joe@multifi.ai")
@@ -32,29 +133,80 @@ def main():
 
     # Route to search subcommand
     if sys.argv[1] == "search":
+        from .cli.search import search
+
         skill_root = _find_skill_root()
         search(skill_root, sys.argv[2:])
         return
 
-    email = sys.argv[1]
-    limit = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    # Move the legacy emails/<date>/<id>/ tree into another storage format
+    if sys.argv[1] == "migrate-storage":
+        from .cli.migrate import migrate_storage
+
+        skill_root = _find_skill_root()
+        if len(sys.argv) > 2 and not sys.argv[2].startswith("--"):
+            _validate_account(skill_root, sys.argv[2])
+        migrate_storage(skill_root, sys.argv[2:])
+        return
+
+    # Review queued emails without triaging (no Gmail fetch)
+    if sys.argv[1] == "review":
+        if len(sys.argv) < 3:
+            print("Usage: python -m email_processor review <email>")
+            sys.exit(1)
+        from .cli.process import EmailProcessor
+
+        skill_root = _find_skill_root()
+        _validate_account(skill_root, sys.argv[2])
+        # No triage session: review actions are logged under review/
+        processor = EmailProcessor(sys.argv[2], skill_root=skill_root, session=False)
+        try:
+            processor.review()
+        finally:
+            processor.close()
+        return
+
+    import asyncio
+    from .cli.process import EmailProcessor
+    from .core.replay import FixtureStore, parse_latency_spec
+
+    opts = _parse_process_args(sys.argv[1:])
+    email = opts["email"]
 
-    # Validate email exists in config
     skill_root = _find_skill_root()
-    with open(skill_root / "config" / "config.json") as f:
-        config = json.load(f)
+    _validate_account(skill_root, email)
 
-    if email not in config['accounts']:
-        print(f"❌ Email not found in configuration: {email}")
-        print()
-        print("Available emails:")
-        for account_email in config['accounts'].keys():
-            print(f"  - {account_email}")
-        sys.exit(1)
+    fixtures = None
+    if opts["record"]:
+        fixtures = FixtureStore(opts["record"], "record")
+    elif opts["replay"]:
+        fixtures = FixtureStore(
+            opts["replay"], "replay",
+            latency_ms=parse_latency_spec(opts["latency"]) if opts["latency"] else None,
+            error_rate=opts["error_rate"],
+        )
 
     # Run processor with email as account key
-    processor = EmailProcessor(email, skill_root=skill_root)
-    asyncio.run(processor.process(limit=limit))
+    try:
+        processor = EmailProcessor(email, skill_root=skill_root, fixtures=fixtures,
+                                   resume_session=opts["resume"], window=opts["window"],
+                                   force=opts["force"],
+                                   profile=opts["profile"], cprofile=opts["cprofile"])
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    try:
+        asyncio.run(processor.process(limit=opts["limit"]))
+        # The session is already complete; reviewing is optional from here
+        if opts["review"] and sys.stdin.isatty():
+            processor.storage.record_reviewed(processor.review())
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Interrupted. Continue where this run stopped with:")
+        print(f"   python -m email_processor {email} --resume {processor.storage.session_id}")
+        sys.exit(130)
+    finally:
+        processor.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,23 @@
+"""Lazy package exports, so importing a package doesn't import all its modules."""
+
+from importlib import import_module
+from typing import Callable, Dict
+
+
+def lazy_exports(namespace: dict, exports: Dict[str, str]) -> Callable[[str], object]:
+    """
+    Module `__getattr__` (PEP 562) that imports `exports` (name → relative
+    module) on first access and caches them in the package namespace.
+
+        __getattr__ = lazy_exports(globals(), {'FileStorage': '.file_storage'})
+    """
+    package = namespace['__name__']
+
+    def __getattr__(name: str):
+        if name not in exports:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(import_module(exports[name], package), name)
+        namespace[name] = value
+        return value
+
+    return __getattr__
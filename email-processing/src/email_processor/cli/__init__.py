@@ -1,6 +1,15 @@
-"""CLI interface for email processing."""
+"""CLI interface for email processing.
 
-from .process import EmailProcessor
-from .review import ReviewInterface
+Exports are imported on first access so `search` starts without loading
+the processing stack.
+"""
 
-__all__ = ['EmailProcessor', 'ReviewInterface']
+from .._lazy import lazy_exports
+
+_EXPORTS = {
+    'EmailProcessor': '.process',
+    'ReviewInterface': '.review',
+}
+
+__all__ = list(_EXPORTS)
+__getattr__ = lazy_exports(globals(), _EXPORTS)
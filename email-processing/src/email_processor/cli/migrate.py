@@ -0,0 +1,85 @@
+"""Migrate stored emails from the legacy directory layout (`migrate-storage`)."""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+
+def migrate_storage(skill_root: Path, args: list[str]):
+    """Run the storage migration for one account."""
+    account = None
+    target = None
+    workers = min(32, (os.cpu_count() or 1) * 4)
+    batch_size = 5000
+
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "--to" and i + 1 < len(args):
+            target = args[i + 1]
+            i += 2
+        elif arg == "--workers" and i + 1 < len(args):
+            workers = int(args[i + 1])
+            i += 2
+        elif arg == "--batch-size" and i + 1 < len(args):
+            batch_size = int(args[i + 1])
+            i += 2
+        elif not arg.startswith("--") and account is None:
+            account = arg
+            i += 1
+        else:
+            print(f"Unknown option: {arg}")
+            sys.exit(1)
+
+    if not account:
+        print("Usage: python -m email_processor migrate-storage <email> [options]")
+        print()
+        print("Options:")
+        print("  --to <sqlite|files>   Target format (default: storage.backend)")
+        print("  --workers <n>         Reader threads (default: 4 per CPU, at most 32)")
+        print("  --batch-size <n>      Emails per transaction (default: 5000)")
+        sys.exit(1)
+
+    from ..storage.blob_store import BlobStore
+    from ..storage.migration import TARGETS, StorageMigration
+
+    with open(skill_root / "config" / "config.json") as f:
+        config = json.load(f)
+    storage_config = config["storage"]
+    target = target or storage_config.get("backend", "files")
+    if target not in TARGETS:
+        print(f"❌ Unknown target: {target} (expected one of {', '.join(TARGETS)})")
+        sys.exit(1)
+
+    base = skill_root / storage_config["base_path"] / account
+    if not (base / "emails").exists():
+        print(f"No stored emails for {account} ({base / 'emails'} does not exist)")
+        return
+
+    blobs = storage_config.get("blobs", {})
+    migration = StorageMigration(
+        base, target,
+        BlobStore(
+            base / "blobs",
+            compression=blobs.get("compression", "zstd"),
+            level=blobs.get("level", 3),
+            dictionary_samples=blobs.get("dictionary_samples", 500),
+            dictionary_kb=blobs.get("dictionary_kb", 112),
+        ),
+        workers=workers, batch_size=batch_size,
+    )
+
+    print(f"🚚 Migrating {base / 'emails'} → {target} ({workers} workers)")
+    try:
+        stats = migration.run()
+    except KeyboardInterrupt:
+        print("\n⚠️  Interrupted; run the same command again to continue after the last commit")
+        sys.exit(130)
+
+    print(f"✅ Migrated {stats['emails']:,} emails ({stats['decisions']:,} decisions) "
+          f"from {stats['partitions']} partitions in {stats['seconds']}s · {stats['emails_per_second']:,.0f} emails/s")
+    if stats["invalid"]:
+        print(f"   ⚠️  {stats['invalid']} invalid records skipped; see {migration.errors_file}")
+    if target == "sqlite" and storage_config.get("backend", "files") != "sqlite":
+        print('   💡 Set storage.backend to "sqlite" in config.json to use it')
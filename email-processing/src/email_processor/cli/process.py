@@ -3,14 +3,86 @@
 import asyncio
 import json
 import yaml
+from dataclasses import dataclass, field
 from pathlib import Path
 from collections import Counter
-
-from ..core import GmailClient, RulesEngine, GeminiTriage, TrelloClient
-from ..storage.file_storage import FileStorage
-from ..models.email import Email, TriageDecision, ReviewItem
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..core.gmail import GmailClient
+from ..core.rules_engine import RulesEngine
+from ..core.trello import TrelloClient
+from ..core.pipeline import Pipeline
+from ..core.profiler import StageProfiler
+from ..core.threads import group_by_thread
+from ..storage.backends import create_storage
+from ..storage.card_index import CardIndex
+from ..storage.checkpoint import SessionCheckpoint
+from ..storage.decision_index import DecisionIndex
+from ..storage.outbox import ActionOutbox
+from ..storage.retention import Retention
+from ..storage.review_queue import ReviewQueue
+from ..storage.serialization import (
+    decision_from_dict, decision_to_dict, email_from_dict, email_to_dict,
+)
+from ..models.email import EmailThread, TriageDecision, ReviewItem
 from .review import ReviewInterface
 
+if TYPE_CHECKING:
+    from ..core.llm_triage import GeminiTriage
+
+
+@dataclass
+class _RunState:
+    """
+    State shared by the pipeline stages during one run.
+
+    Only counters outlive a chunk: emails and decisions are dropped once
+    stored, so memory stays flat however large the inbox is.
+    """
+    outbox: Optional[ActionOutbox] = None
+    resumed: Dict[str, TriageDecision] = field(default_factory=dict)  # In-flight chunks only
+    emails: int = 0
+    threads: int = 0
+    next_index: int = 0
+    llm_buffer: List[Tuple[int, EmailThread]] = field(default_factory=list)
+    llm_emails: int = 0
+    archived: int = 0
+    archived_by_category: Counter = field(default_factory=Counter)
+    trello: int = 0
+    review: int = 0
+    skipped: int = 0
+    action_failures: int = 0
+
+
+def _message_windows(messages: List[dict], size: int) -> Iterator[List[dict]]:
+    """Split listed messages into windows of about `size`, never splitting a thread."""
+    by_thread: Dict[str, List[dict]] = {}
+    for msg in messages:
+        by_thread.setdefault(SessionCheckpoint.thread_key(msg), []).append(msg)
+
+    window: List[dict] = []
+    for thread_messages in by_thread.values():
+        if window and len(window) + len(thread_messages) > size:
+            yield window
+            window = []
+        window.extend(thread_messages)
+    if window:
+        yield window
+
+
+def _thread_windows(pairs: Iterable[Tuple[List[dict], TriageDecision]],
+                    size: int) -> Iterator[List[Tuple[List[dict], TriageDecision]]]:
+    """Group decided (messages, decision) pairs into windows of about `size` messages."""
+    window, messages = [], 0
+    for thread_messages, decision in pairs:
+        window.append((thread_messages, decision))
+        messages += len(thread_messages)
+        if messages >= size:
+            yield window
+            window, messages = [], 0
+    if window:
+        yield window
+
 
 class EmailProcessor:
     """Main triage orchestrator."""
@@ -25,8 +97,16 @@ class EmailProcessor:
             path = path.parent
         raise FileNotFoundError("Could not find SKILL.md in any parent directory")
 
-    def __init__(self, email: str, skill_root: Path = None):
+    def __init__(self, email: str, skill_root: Path = None, fixtures=None,
+                 storage_base: Optional[Path] = None, resume_session: Optional[str] = None,
+                 window: Optional[int] = None, force: bool = False,
+                 profile: bool = False, cprofile: bool = False, session: bool = True):
         self.email = email
+        self.fixtures = fixtures
+        self.window = window
+        self.force = force
+        self.profile = profile or cprofile
+        self.cprofile = cprofile
 
         # Resolve skill root
         if skill_root is None:
@@ -43,8 +123,14 @@ class EmailProcessor:
         # Store global config settings
         self.config = config
         self.timezone = config['timezone']
-        self.storage_base = skill_root / config['storage']['base_path']
+        self.storage_base = storage_base or skill_root / config['storage']['base_path']
         self.confidence_threshold = config['processing']['auto_trello_confidence_threshold']
+        self.reuse_decisions_days = config['processing'].get('reuse_decisions_days', 7)
+        # Read here rather than from the lazy Gemini client, so runs that never
+        # call the LLM don't load it (same defaults as GeminiTriage)
+        llm_config = config.get('llm', {})
+        self.llm_batch_size = llm_config.get('batch_size', 10)
+        self.llm_concurrency = max(1, llm_config.get('max_concurrency', 1))
 
         # Get account config using email as key
         self.account_config = config['accounts'][email]
@@ -52,125 +138,245 @@ class EmailProcessor:
         self.account_config['account_type'] = email
 
         # Initialize components
-        self.gmail = GmailClient(self.account_config)
-        self.rules = RulesEngine(rules_config, email)
-        self.llm = GeminiTriage(self.account_config, config.get('llm', {}))
-        self.trello = TrelloClient(
-            config.get('trello', {}),
-            default_board=self.account_config.get('default_trello_board', 'inbox')
-        )
-        self.storage = FileStorage(
+        self.storage = create_storage(
+            config['storage'],
             base_path=str(self.storage_base),
             account=email,
             timezone=self.timezone,
+            session_id=resume_session,
+            session=session,
+        )
+        self.checkpoint = SessionCheckpoint(self.storage.sessions_dir)
+        self.decisions = DecisionIndex(
+            self.storage.index_dir / "decisions.jsonl",
+            max_age_days=self.reuse_decisions_days,
+        )
+        self.gmail = GmailClient(self.account_config, fixtures=fixtures)
+        self.rules = RulesEngine(rules_config, email)
+        self._llm: Optional["GeminiTriage"] = None
+        self.review_queue = ReviewQueue(self.storage.base / "review" / "queue.jsonl")
+        trello_config = config.get('trello', {})
+        card_config = trello_config.get('card_index', {})
+        self.trello = TrelloClient(
+            trello_config,
+            default_board=self.account_config.get('default_trello_board', 'inbox'),
+            fixtures=fixtures,
+            cache_path=self.storage_base / "trello-cache.json",
+            card_index=CardIndex(
+                self.storage_base / "trello-cards.jsonl",
+                thread_days=card_config.get('thread_days', 30),
+                keep_days=card_config.get('keep_days', 365),
+            ),
         )
 
-    async def process(self, limit: int = None):
-        """Main triage workflow."""
-        print(f"✅ Processing account: {self.email}")
-        print(f"   Session: {self.storage.session_id}")
-
-        # Step 1: Fetch emails
-        print("\n🔍 Fetching emails from Gmail...")
-        emails = await self.gmail.fetch_inbox(max_results=limit)
-        print(f"✅ Found {len(emails)} emails in inbox")
-
-        if not emails:
-            print("✨ Inbox is empty! Nothing to process.")
-            return
+    @property
+    def llm(self) -> "GeminiTriage":
+        """Gemini client, created on first use (review-only runs never need it)."""
+        if self._llm is None:
+            # LangChain + pydantic load only when triage actually runs
+            from ..core.llm_triage import GeminiTriage
+            self._llm = GeminiTriage(
+                self.account_config, self.config.get('llm', {}),
+                session_dir=self.storage.sessions_dir,
+                fixtures=self.fixtures,
+            )
+        return self._llm
+
+    def _outbox_handlers(self) -> dict:
+        return {
+            "archive_threads": self._handle_archive_ops,
+            "trello_card": self._handle_trello_ops,
+        }
+
+    async def _handle_archive_ops(self, ops: List[dict]) -> list:
+        results = []
+        for op in ops:
+            failed = await self.gmail.archive_threads(op["payload"]["thread_ids"])
+            results.append(RuntimeError(f"{len(failed)} threads not archived") if failed else True)
+        return results
+
+    async def _handle_trello_ops(self, ops: List[dict]) -> list:
+        items = [
+            (email_from_dict(op["payload"]["email"]), decision_from_dict(op["payload"]["decision"]))
+            for op in ops
+        ]
+        results = await self.trello.create_cards(
+            [(email, decision.category, decision.priority, decision.trello_suggestion)
+             for email, decision in items],
+            self.email,
+        )
 
-        # Step 2: Apply rules
-        print("\n📊 Processing with rules engine...")
-        decisions = []
-        needs_llm = []
+        created = []
+        for (email, decision), card_info in zip(items, results):
+            if isinstance(card_info, Exception):
+                print(f"      ❌ Failed to create card: {card_info}")
+                continue
+            created.append((email, decision, card_info))
+
+        failed_threads = set()
+        if created:
+            failed_threads = set(await self.gmail.archive_threads(
+                [email.thread_id for email, _, _ in created]
+            ))
+
+        for email, decision, card_info in created:
+            # Save with Trello info
+            self.storage.save_email(email)
+            self.storage.save_decision(decision, email=email, trello_info=card_info, track=False)
+            self.storage.log_processed(
+                email.message_id, "trello", auto=True,
+                processor=decision.processor,
+                trello_card_id=card_info.get("id")
+            )
+        await asyncio.to_thread(self.storage.flush)
+
+        # The card is already recorded in CardIndex, so a retry only re-archives
+        return [
+            card_info if isinstance(card_info, Exception)
+            else RuntimeError(f"Thread {email.thread_id} not archived") if email.thread_id in failed_threads
+            else card_info
+            for (email, _), card_info in zip(items, results)
+        ]
+
+    async def _resume_outboxes(self):
+        """Finish side effects left pending by an interrupted earlier run."""
+        outboxes = ActionOutbox.find_incomplete(self.storage.base / "sessions")
+        for outbox in outboxes:
+            pending = len(outbox.pending())
+            print(f"   ♻️  Resuming {pending} pending actions from session {outbox.session_dir.name}")
+            result = await outbox.drain(self._outbox_handlers())
+            print(f"      ✅ {result['done']} done, {result['failed']} failed")
+
+    async def _rules_stage(self, run: "_RunState", threads: List[EmailThread], emit):
+        """Decide what the rules can; buffer the rest into LLM-sized batches."""
+        decided = []
+        for thread in threads:
+            email = thread.latest
+            idx = run.next_index
+            run.next_index += 1
+
+            # Decided before the run was interrupted: no rules, no LLM
+            resumed = run.resumed.pop(thread.thread_id, None)
+            if resumed:
+                resumed.email_index = idx
+                decided.append((thread, resumed))
+                continue
 
-        for idx, email in enumerate(emails):
             match = self.rules.evaluate(email)
-
             if match.action == "llm_triage":
-                needs_llm.append((idx, email))
-            else:
-                decision = TriageDecision(
-                    email_index=idx,
-                    message_id=email.message_id,
-                    action=match.action,
-                    category=match.category,
-                    priority=match.priority,
-                    reason=match.reason,
-                    processor="rules",
-                    rule_name=match.rule_name,
-                    confidence=match.confidence
-                )
-                decisions.append(decision)
-
-        # Step 3: LLM triage for unclear emails
-        if needs_llm:
-            print(f"\n🤖 LLM triaging {len(needs_llm)} unclear emails...")
-            llm_emails = [email for _, email in needs_llm]
-            llm_decisions = await self.llm.triage_batch(llm_emails)
+                run.llm_buffer.append((idx, thread))
+                if len(run.llm_buffer) >= self.llm_batch_size:
+                    await self._flush_llm_buffer(run, emit)
+                continue
+
+            decided.append((thread, TriageDecision(
+                email_index=idx,
+                message_id=email.message_id,
+                action=match.action,
+                category=match.category,
+                priority=match.priority,
+                reason=match.reason,
+                processor="rules",
+                rule_name=match.rule_name,
+                confidence=match.confidence
+            )))
+
+        if decided:
+            await emit(("decided", decided))
+
+    async def _flush_llm_buffer(self, run: "_RunState", emit):
+        if run.llm_buffer:
+            batch, run.llm_buffer = run.llm_buffer, []
+            await emit(("llm", batch))
+
+    async def _llm_stage(self, run: "_RunState", item: tuple, emit):
+        """Pass rule decisions through; triage LLM batches."""
+        kind, payload = item
+        if kind == "decided":
+            await emit(payload)
+            return
 
-            for (idx, email), llm_decision in zip(needs_llm, llm_decisions):
-                llm_decision.email_index = idx
-                llm_decision.message_id = email.message_id
-                decisions.append(llm_decision)
+        emails = [thread.latest for _, thread in payload]
+        run.llm_emails += len(emails)
+        llm_decisions = await self.llm.triage_batch(emails)
 
-        # Sort decisions by email index
-        decisions.sort(key=lambda d: d.email_index)
+        decided = []
+        for (idx, thread), llm_decision in zip(payload, llm_decisions):
+            llm_decision.email_index = idx
+            llm_decision.message_id = thread.latest.message_id
+            decided.append((thread, llm_decision))
+        await emit(decided)
 
-        # Step 4: Execute auto-actions
-        print("\n📦 Executing auto-actions...")
+    async def _actions_stage(self, run: "_RunState", pairs: list, emit):
+        """Archive / create cards for one chunk of decided threads via the outbox."""
+        self.checkpoint.record_decided(pairs)
 
+        ops = []
         to_archive = []
-        to_trello = []
+        auto_handled = []
         to_review = []
+        review_threads = []
+        new_thread_ids = []
+        for thread, decision in pairs:
+            email = thread.latest
+            # Actions of a resumed thread are already in the outbox
+            acted = thread.thread_id in self.checkpoint.acted
+            if not acted:
+                new_thread_ids.append(thread.thread_id)
 
-        for email, decision in zip(emails, decisions):
             if decision.action == "archive":
-                to_archive.append((email, decision))
+                run.archived += 1
+                run.archived_by_category[decision.category] += 1
+                auto_handled.append(email)
+                if not acted:
+                    to_archive.append(email)
             elif decision.action == "trello" and decision.confidence > self.confidence_threshold:
-                to_trello.append((email, decision))
+                run.trello += 1
+                auto_handled.append(email)
+                if acted:
+                    continue
+                ops.append(("trello_card", {
+                    "email": email_to_dict(email),
+                    "decision": decision_to_dict(decision),
+                }))
             else:
                 to_review.append((email, decision))
+                review_threads.append((thread, decision))
 
-        # Batch archive
         if to_archive:
-            print(f"   Archiving {len(to_archive)} emails...")
-            await self.gmail.archive_batch([e.message_id for e, _ in to_archive])
-            print(f"   ✅ Archived {len(to_archive)} emails")
-
-            archive_decisions = [d for _, d in to_archive]
-            categories = Counter(d.category for d in archive_decisions)
-            for cat, count in categories.most_common():
-                print(f"      ├─ {cat.title()}: {count}")
-
-        # Auto-create Trello cards for high-confidence items
-        if to_trello:
-            print(f"   Creating {len(to_trello)} Trello cards...")
-            for email, decision in to_trello:
-                try:
-                    card_info = await self.trello.create_card_from_email(
-                        email, self.email,
-                        decision.category, decision.priority,
-                        decision.trello_suggestion
-                    )
-                    await self.gmail.archive(email.message_id)
-
-                    # Save with Trello info
-                    self.storage.save_email(email)
-                    self.storage.save_decision(decision, email=email, trello_info=card_info)
-                    self.storage.log_processed(
-                        email.message_id, "trello", auto=True,
-                        processor=decision.processor,
-                        trello_card_id=card_info.get("id")
-                    )
-
-                except Exception as e:
-                    print(f"      ❌ Failed to create card: {e}")
-
-        # Step 5: Save all emails & decisions to file storage
-        print("\n💾 Saving to file storage...")
-        for email, decision in zip(emails, decisions):
-            self.storage.save_email(email)
+            ops.insert(0, ("archive_threads", {"thread_ids": [e.thread_id for e in to_archive]}))
+
+        # Record every side effect in the write-ahead outbox before executing it,
+        # so a crash mid-way is finished by the next run instead of lost
+        if ops:
+            op_ids = run.outbox.enqueue(ops)
+            self.checkpoint.record_acted(new_thread_ids)
+            result = await run.outbox.drain(self._outbox_handlers(), op_ids=op_ids)
+            run.action_failures += result["failed"]
+
+        # Threads handled automatically this time (e.g. a new message matched
+        # a rule) no longer need review; the rest wait in the review queue
+        self.review_queue.resolve(auto_handled, "auto")
+        self.review_queue.add(to_review, self.storage.session_id)
+        run.review += len(to_review)
+        # They stay in the inbox; remember them so unchanged ones are skipped next run
+        self.decisions.record(review_threads, self.storage.session_id)
+
+        await emit(pairs)
+
+    async def _storage_stage(self, pairs: list):
+        """Save one chunk of decisions, emails and index entries."""
+        stored = []
+        for thread, decision in pairs:
+            email = thread.latest
+            if thread.thread_id in self.checkpoint.stored:
+                # Saved before the run was interrupted; only count it
+                self.storage.track_decision(decision)
+                continue
+
+            # One decision per thread; every message is stored and indexed.
+            # Trello decisions are saved (with card info) by the outbox handler,
+            # possibly in an earlier run, so they are only counted here.
             if decision.action != "trello":
                 self.storage.save_decision(decision, email=email)
                 self.storage.log_processed(
@@ -178,59 +384,248 @@ class EmailProcessor:
                     auto=(decision.action == "archive"),
                     processor=decision.processor
                 )
-            self.storage.update_index(email, decision)
+            elif decision.confidence > self.confidence_threshold:
+                self.storage.track_decision(decision)
+            for member in thread.messages:
+                self.storage.save_email(member)
+                self.storage.update_index(member, decision)
+            stored.append(thread.thread_id)
+
+        self.storage.update_sender_index([m for thread, _ in pairs for m in thread.messages])
+        # Durable before the checkpoint says so (waits off the event loop)
+        await asyncio.to_thread(self.storage.flush)
+        self.checkpoint.record_stored(stored)
+
+    async def _skip_unchanged(self, messages: List[dict]) -> Tuple[List[dict], int]:
+        """
+        Drop threads whose every message was decided recently and still has
+        the same labels; returns the messages left and the threads skipped.
+        """
+        by_thread: Dict[str, List[dict]] = {}
+        for msg in messages:
+            by_thread.setdefault(SessionCheckpoint.thread_key(msg), []).append(msg)
+
+        # A thread with a new message is never a candidate
+        candidates = [
+            msg["id"]
+            for group in by_thread.values() if all(self.decisions.get(m["id"]) for m in group)
+            for msg in group
+        ]
+        if not candidates:
+            return messages, 0
+
+        labels = await self.gmail.get_labels(candidates)
+        skipped = {
+            key for key, group in by_thread.items()
+            if all(m["id"] in labels and self.decisions.unchanged(m["id"], labels[m["id"]]) for m in group)
+        }
+        kept = [m for m in messages if SessionCheckpoint.thread_key(m) not in skipped]
+        return kept, len(skipped)
+
+    async def _run_pipeline(self, run: "_RunState", profiler: StageProfiler,
+                            resumed: Iterable[Tuple[List[dict], TriageDecision]] = (),
+                            messages: Optional[List[dict]] = None):
+        """Run resumed threads, then the listed `messages`, through all stages."""
+        pipeline_config = self.config.get('processing', {}).get('pipeline', {})
+        chunk_size = pipeline_config.get('fetch_chunk_size', 100)
+
+        async def emit_threads(threads, emit):
+            run.emails += sum(thread.size for thread in threads)
+            run.threads += len(threads)
+            await emit(threads)
+
+        async def fetch(emit):
+            # The checkpoint keeps no emails: decided threads are re-fetched by ID
+            decided, resumed_messages = {}, []
+            for thread_messages, decision in resumed:
+                decided[SessionCheckpoint.thread_key(thread_messages[0])] = decision
+                resumed_messages.extend(thread_messages)
+            if resumed_messages:
+                async for chunk in self.gmail.iter_inbox(chunk_size=chunk_size, messages=resumed_messages):
+                    threads = [thread for thread in group_by_thread(chunk) if thread.thread_id in decided]
+                    for thread in threads:
+                        run.resumed[thread.thread_id] = decided[thread.thread_id]
+                    if threads:
+                        await emit_threads(threads, emit)
+
+            if not messages:
+                return
+            async for chunk in self.gmail.iter_inbox(chunk_size=chunk_size, messages=messages):
+                if chunk:
+                    await emit_threads(group_by_thread(chunk), emit)
+
+        pipeline = Pipeline(queue_size=pipeline_config.get('queue_size', 4), trace=profiler.trace)
+        pipeline.stage("rules", lambda threads, emit: self._rules_stage(run, threads, emit),
+                       flush=lambda emit: self._flush_llm_buffer(run, emit))
+        pipeline.stage("llm", lambda item, emit: self._llm_stage(run, item, emit),
+                       workers=self.llm_concurrency)
+        pipeline.stage("actions", lambda pairs, emit: self._actions_stage(run, pairs, emit),
+                       workers=pipeline_config.get('action_workers', 1))
+        pipeline.stage("storage", lambda pairs, emit: self._storage_stage(pairs),
+                       workers=pipeline_config.get('storage_workers', 1))
+
+        profiler.add_stages(await pipeline.run(fetch, source_name="fetch"))
+
+    def _cleanup(self):
+        """Prune sessions and emails past storage.auto_cleanup's retention window."""
+        cleanup = self.config['storage'].get('auto_cleanup', {})
+        if not cleanup.get('enabled'):
+            return
+        result = Retention(
+            self.storage,
+            keep_days=cleanup.get('keep_sessions_days', 365),
+            archive=cleanup.get('archive', False),
+        ).run()
+        if result and (result['sessions'] or result['emails']):
+            print(f"🧹 Pruned {result['sessions']} sessions and {result['emails']} emails "
+                  f"from before {result['cutoff']} ({result['blobs']} bodies)")
+            if result.get('archive'):
+                print(f"   📦 Archived to {result['archive']}")
+
+    def _profile_report(self, profiler: StageProfiler) -> dict:
+        """Finish profiling: API traffic per service, report, and trace/pstats files."""
+        profiler.add_io("gmail", **self.gmail.stats)
+        profiler.add_io("trello", **self.trello.traffic())
+        # Without LLM work the client was never created; don't build it for zeros
+        if self._llm is not None:
+            usage = self._llm.usage.summary()
+            profiler.add_io("llm", requests=usage["calls"], prompt_tokens=usage["prompt_tokens"],
+                            output_tokens=usage["output_tokens"])
+        else:
+            profiler.add_io("llm", requests=0, prompt_tokens=0, output_tokens=0)
 
-        # Update global indexes
-        self.storage.update_sender_index(emails)
-        print(f"✅ Saved {len(emails)} emails to {self.storage.base}")
+        report = profiler.stop()
+        StageProfiler.print_report(report)
+        for path in profiler.write_files(self.storage.sessions_dir):
+            print(f"   📄 {path}")
+        return report
 
-        # Step 6: Interactive review
-        if to_review:
-            print(f"\n👀 {len(to_review)} emails need your review")
+    async def process(self, limit: int = None):
+        """
+        Main triage workflow.
 
-            review_items = [
-                ReviewItem(idx + 1, email, decision)
-                for idx, (email, decision) in enumerate(to_review)
-            ]
+        Fetch → rules → LLM → actions → storage run as concurrent stages joined
+        by bounded queues: while the LLM triages one chunk of threads, the next
+        chunk is being fetched and the previous one archived and saved.
 
-            interface = ReviewInterface(
-                review_items, self.gmail, self.trello,
-                self.email, self.storage
-            )
-            interface.show_list()
-
-            while interface.items:
-                try:
-                    command = input("\n> ").strip()
-                    should_continue = interface.handle_command(command)
-                    if not should_continue:
-                        break
-                except (KeyboardInterrupt, EOFError):
-                    print("\n\n⚠️  Interrupted by user")
-                    break
-                except Exception as e:
-                    print(f"\n❌ Error: {e}")
+        Emails needing a human go to the persistent review queue; the session
+        completes without waiting for them (see `review`).
+        """
+        print(f"✅ Processing account: {self.email}")
+        print(f"   Session: {self.storage.session_id}")
+        if self.fixtures:
+            print(f"   Fixtures: {self.fixtures.mode} ({self.fixtures.path})")
+
+        if self.storage.is_complete:
+            print("✨ Session already completed. Nothing to resume.")
+            return
+
+        profiler = StageProfiler(cprofile=self.cprofile)
+
+        with profiler.step("resume"):
+            await self._resume_outboxes()
+
+        run = _RunState(outbox=ActionOutbox(self.storage.sessions_dir))
+        pipeline_config = self.config.get('processing', {}).get('pipeline', {})
+        window = self.window or pipeline_config.get('window_size') or 0
+
+        # Listed IDs are checkpointed, so a resumed run neither re-lists the
+        # inbox nor re-fetches threads that already have a decision
+        if self.checkpoint.listed is None:
+            with profiler.step("list"):
+                self.checkpoint.record_listed(await self.gmail.list_inbox(max_results=limit))
+        remaining = self.checkpoint.remaining()
+        if self.reuse_decisions_days and not self.force and len(self.decisions):
+            with profiler.step("reuse"):
+                remaining, run.skipped = await self._skip_unchanged(remaining)
+            if run.skipped:
+                print(f"   ♻️  Skipping {run.skipped} unchanged threads decided in the last "
+                      f"{self.reuse_decisions_days} days (--force to re-triage)")
+        if self.checkpoint.decided:
+            print(f"   ⏯️  Resuming: {len(self.checkpoint.decided)} threads already decided, "
+                  f"{len(remaining)} messages left to fetch")
+
+        print("\n🚀 Running pipeline: fetch → rules → LLM → actions → storage")
+        try:
+            if window:
+                # Each window is fetched only after the previous one is stored
+                number = 0
+                for pairs in _thread_windows(self.checkpoint.decided_threads(), window):
+                    number += 1
+                    print(f"\n🪟 Window {number}: {sum(len(m) for m, _ in pairs)} resumed messages")
+                    await self._run_pipeline(run, profiler, resumed=pairs)
+                for messages in _message_windows(remaining, window):
+                    number += 1
+                    print(f"\n🪟 Window {number}: {len(messages)} messages")
+                    await self._run_pipeline(run, profiler, messages=messages)
+            else:
+                await self._run_pipeline(run, profiler, resumed=self.checkpoint.decided_threads(),
+                                         messages=remaining)
+        finally:
+            if self._llm is not None:
+                self._llm.close()
+
+        if not run.emails:
+            print("✨ No new mail. Nothing to process." if run.skipped else "✨ Inbox is empty! Nothing to process.")
+            self._cleanup()
+            return
+
+        print(f"✅ Processed {run.emails} emails in {run.threads} threads")
+
+        if run.archived:
+            print(f"   📦 Archived {run.archived} threads")
+            for cat, count in run.archived_by_category.most_common():
+                print(f"      ├─ {cat.title()}: {count}")
+        if run.action_failures:
+            print(f"   ⚠️  {run.action_failures} actions failed; they will be retried on the next run")
+        print(f"✅ Saved {run.emails} emails to {self.storage.base}")
+
+        needs_llm = run.llm_emails
+        if run.review:
+            print(f"\n👀 {run.review} emails queued for review ({len(self.review_queue)} pending in total)")
+
+        profile = None
+        if self.profile:
+            profile = self._profile_report(profiler)
 
         # Step 7: Complete session
         self.storage.complete_session(
-            total_processed=len(emails),
-            auto_archived=len(to_archive),
-            auto_trello=len(to_trello),
-            reviewed=len(to_review),
+            total_processed=run.emails,
+            auto_archived=run.archived,
+            auto_trello=run.trello,
+            reviewed=0,
+            queued=run.review,
+            skipped=run.skipped,
+            llm_usage=self.llm.usage.summary() if needs_llm else None,
+            profile=profile,
         )
-        self.storage.update_stats(len(emails))
+        self._cleanup()
+        self.storage.update_stats(run.emails)
 
         # Final summary
         print("\n" + "=" * 80)
         print("🎉 TRIAGE SESSION COMPLETE")
         print("=" * 80)
         print(f"Session: {self.storage.session_id}")
-        print(f"Total processed: {len(emails)}")
-        print(f"  ✅ Auto-archived: {len(to_archive)}")
-        print(f"  📋 Trello cards created: {len(to_trello)}")
-        print(f"  👀 Reviewed: {len(to_review)}")
+        print(f"Total processed: {run.emails} emails in {run.threads} threads")
+        print(f"  ✅ Auto-archived: {run.archived}")
+        print(f"  📋 Trello cards created: {run.trello}")
+        print(f"  👀 Queued for review: {run.review}")
+        if run.skipped:
+            print(f"  ♻️  Unchanged, skipped: {run.skipped} threads")
         print(f"  📁 Saved to: {self.storage.sessions_dir}")
 
+        if needs_llm:
+            usage = self.llm.usage.summary()
+            print(f"\n🤖 LLM USAGE ({usage['model']})")
+            print(f"   ├─ Calls: {usage['calls']} ({usage['errors']} errors, {usage['retries']} retries)")
+            print(f"   ├─ Tokens: {usage['prompt_tokens']:,} in ({usage['cached_tokens']:,} cached) / "
+                  f"{usage['output_tokens']:,} out")
+            print(f"   ├─ Latency: {usage['latency_ms_avg']:.0f}ms avg, {usage['latency_ms_max']:.0f}ms max")
+            if usage['budget_skipped_batches']:
+                print(f"   ├─ Budget exceeded: {usage['budget_skipped_batches']} batches sent to review")
+            print(f"   └─ Cost: ${usage['cost_usd']:.4f}")
+
         # Check inbox status
         counts = await self.gmail.count_inbox()
         print("\n📊 EMAIL STATUS REPORT")
@@ -241,3 +636,55 @@ class EmailProcessor:
             print("\n🎉 INBOX ZERO ACHIEVED! 🎉")
         else:
             print(f"\n📮 {counts['inbox_total']} emails remaining in inbox")
+
+        if self.fixtures and self.fixtures.recording:
+            self.fixtures.write_manifest(self.email)
+            print(f"\n📼 Recorded fixtures to {self.fixtures.path}")
+
+    def review(self) -> int:
+        """
+        Work through the persistent review queue interactively.
+
+        Loads the queue from local storage only; Gmail and Trello are called
+        just for the actions taken. Returns the number of emails handled;
+        closing the clients is left to the caller (see `close`).
+        """
+        pending = self.review_queue.pending()
+        if not pending:
+            print("✨ Review queue is empty.")
+            return 0
+
+        print(f"\n👀 {len(pending)} emails need your review")
+        pending.sort(key=lambda pair: (pair[1].priority, pair[0].date.timestamp()))
+        review_items = [
+            ReviewItem(idx + 1, email, decision)
+            for idx, (email, decision) in enumerate(pending)
+        ]
+
+        interface = ReviewInterface(
+            review_items, self.gmail, self.trello,
+            self.email, self.storage, queue=self.review_queue,
+        )
+        interface.show_list()
+
+        while interface.items:
+            try:
+                command = input("\n> ").strip()
+                should_continue = interface.handle_command(command)
+                if not should_continue:
+                    break
+            except (KeyboardInterrupt, EOFError):
+                print("\n\n⚠️  Interrupted by user")
+                break
+            except Exception as e:
+                print(f"\n❌ Error: {e}")
+
+        return len(interface.original_items) - len(interface.items)
+
+    def close(self):
+        """Release the API clients and finish queued storage writes."""
+        try:
+            self.trello.close()
+            self.gmail.close()
+        finally:
+            self.storage.close()
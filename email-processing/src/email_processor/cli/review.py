@@ -5,19 +5,22 @@ from collections import defaultdict
 
 from ..models.email import ReviewItem
 from ..storage.file_storage import FileStorage
+from ..storage.review_queue import ReviewQueue
 
 
 class ReviewInterface:
     """Index-based review interface with one-step actions."""
 
     def __init__(self, items: List[ReviewItem], gmail_client, trello_client,
-                 account: str, storage: Optional[FileStorage] = None):
+                 account: str, storage: Optional[FileStorage] = None,
+                 queue: Optional[ReviewQueue] = None):
         self.original_items = items.copy()
         self.items = items
         self.gmail = gmail_client
         self.trello = trello_client
         self.account = account
         self.storage = storage
+        self.queue = queue
 
         # Group by priority
         self.urgent = [i for i in items if i.decision.priority == 0]
@@ -182,10 +185,14 @@ class ReviewInterface:
         items = [i for i in self.items if i.index in indices]
 
         print(f"\nArchiving {len(items)} emails...")
-        message_ids = [i.email.message_id for i in items]
+        thread_ids = [i.email.thread_id for i in items]
 
-        # Batch archive via Gmail API
-        await self.gmail.archive_batch(message_ids)
+        # Archive whole threads via Gmail API; failed threads stay queued
+        failed = set(await self.gmail.archive_threads(thread_ids))
+        for item in items:
+            if item.email.thread_id in failed:
+                print(f"❌ [{item.index}] Failed to archive; it stays in the review queue")
+        items = [item for item in items if item.email.thread_id not in failed]
 
         print(f"✅ Archived {len(items)} emails")
 
@@ -197,10 +204,7 @@ class ReviewInterface:
                     category=item.decision.category
                 )
 
-        # Remove from review list
-        for item in items:
-            if item in self.items:
-                self.items.remove(item)
+        self._resolve(items, "archive")
 
         # Check for learning
         self._check_learning(items, "archive")
@@ -211,38 +215,45 @@ class ReviewInterface:
 
         print(f"\nCreating Trello cards for {len(items)} emails...")
 
-        for item in items:
-            try:
-                card_info = await self.trello.create_card_from_email(
-                    item.email,
-                    self.account,
-                    item.decision.category,
-                    item.decision.priority,
-                    item.decision.trello_suggestion
-                )
-                print(f"✅ [{item.index}] \"{item.decision.trello_suggestion.get('title', item.email.subject)[:50]}\"")
-
-                # Archive email after creating card
-                await self.gmail.archive(item.email.message_id)
+        results = await self.trello.create_cards(
+            [(item.email, item.decision.category, item.decision.priority,
+              item.decision.trello_suggestion) for item in items],
+            self.account,
+        )
+
+        created = []
+        for item, card_info in zip(items, results):
+            if isinstance(card_info, Exception):
+                print(f"❌ [{item.index}] Failed: {card_info}")
+                continue
+            suggestion = item.decision.trello_suggestion or {}
+            print(f"✅ [{item.index}] \"{suggestion.get('title', item.email.subject)[:50]}\"")
+            created.append((item, card_info))
+
+        # Archive threads after creating cards; failed threads stay queued
+        # (retrying reuses the card via the card index)
+        if created:
+            failed = set(await self.gmail.archive_threads(
+                [item.email.thread_id for item, _ in created]))
+            for item, _ in created:
+                if item.email.thread_id in failed:
+                    print(f"❌ [{item.index}] Card created but archiving failed; it stays in the review queue")
+            created = [(item, card_info) for item, card_info in created
+                       if item.email.thread_id not in failed]
 
-                # Log action
-                if self.storage:
-                    board = item.decision.trello_suggestion.get('board', 'inbox') if item.decision.trello_suggestion else 'inbox'
-                    self.storage.log_action(
-                        item.email.message_id, "trello",
-                        board=board,
-                        trello_card_id=card_info.get("id") if card_info else None
-                    )
-
-            except Exception as e:
-                print(f"❌ [{item.index}] Failed: {e}")
+        # Log actions
+        if self.storage:
+            for item, card_info in created:
+                board = item.decision.trello_suggestion.get('board', 'inbox') if item.decision.trello_suggestion else 'inbox'
+                self.storage.log_action(
+                    item.email.message_id, "trello",
+                    board=board,
+                    trello_card_id=card_info.get("id") if card_info else None
+                )
 
-        # Remove from review list
-        for item in items:
-            if item in self.items:
-                self.items.remove(item)
+        self._resolve([item for item, _ in created], "trello")
 
-        print(f"\n✅ Created {len(items)} Trello cards and archived emails")
+        print(f"\n✅ Created {len(created)} Trello cards and archived emails")
 
     async def _create_trello_card(self, item: ReviewItem):
         """Create Trello card for single email."""
@@ -256,8 +267,10 @@ class ReviewInterface:
             )
             print(f"✅ Created Trello card: {card_info['url']}")
 
-            # Archive email
-            await self.gmail.archive(item.email.message_id)
+            # Archive thread (retrying reuses the card via the card index)
+            if not await self.gmail.archive_thread(item.email.thread_id):
+                print("❌ Failed to archive; the email stays in the review queue")
+                return
             print("✅ Archived email")
 
             # Log action
@@ -269,9 +282,7 @@ class ReviewInterface:
                     trello_card_id=card_info.get("id")
                 )
 
-            # Remove from review list
-            if item in self.items:
-                self.items.remove(item)
+            self._resolve([item], "trello")
 
         except Exception as e:
             print(f"❌ Failed to create Trello card: {e}")
@@ -279,7 +290,9 @@ class ReviewInterface:
     async def _archive_email(self, item: ReviewItem):
         """Archive single email."""
         try:
-            await self.gmail.archive(item.email.message_id)
+            if not await self.gmail.archive_thread(item.email.thread_id):
+                print("❌ Failed to archive; the email stays in the review queue")
+                return
             print("✅ Archived email")
 
             if self.storage:
@@ -288,11 +301,18 @@ class ReviewInterface:
                     category=item.decision.category
                 )
 
-            if item in self.items:
-                self.items.remove(item)
+            self._resolve([item], "archive")
         except Exception as e:
             print(f"❌ Failed to archive: {e}")
 
+    def _resolve(self, items: List[ReviewItem], action: str):
+        """Remove handled items from the review list and the persistent queue."""
+        for item in items:
+            if item in self.items:
+                self.items.remove(item)
+        if self.queue is not None:
+            self.queue.resolve([item.email for item in items], action)
+
     def _show_full_email(self, item: ReviewItem):
         """Show full email body."""
         print("\n" + "━" * 80)
@@ -355,4 +375,4 @@ class ReviewInterface:
         print(f"Remaining: {remaining} emails")
 
         if remaining > 0:
-            print(f"\n💡 Run the command again to process remaining {remaining} emails")
+            print(f"\n💡 They stay queued; run `review` again to process the remaining {remaining} emails")
@@ -7,8 +7,24 @@ from pathlib import Path
 from typing import Optional
 
 
+def _decision_from_index(entry: dict) -> dict:
+    return {
+        "action": entry.get("last_action"),
+        "category": entry.get("last_category"),
+        "reason": entry.get("last_reason"),
+        "session_id": entry.get("last_session"),
+    }
+
+
 def _load_emails(data_dir: Path, account: Optional[str] = None) -> list[dict]:
-    """Load all emails with their latest decisions."""
+    """
+    Load all emails with their latest decisions.
+
+    Where the latest-state index exists, its entries (sender, subject, date,
+    excerpt, decision) are the candidates and email.json is read only for
+    --full-text (see `_load_record`); older trees without one are scanned
+    directory by directory.
+    """
     results = []
 
     # Determine which account dirs to scan
@@ -21,6 +37,33 @@ def _load_emails(data_dir: Path, account: Optional[str] = None) -> list[dict]:
         account_dirs = [d for d in data_dir.iterdir() if d.is_dir()]
 
     for acct_dir in account_dirs:
+        seen = set()
+        db_path = acct_dir / "storage.db"
+        if db_path.exists():
+            # storage.backend = "sqlite"
+            from ..storage.sqlite_storage import iter_emails
+            for email in iter_emails(db_path):
+                email["_account"] = acct_dir.name
+                seen.add(email["message_id"])
+                results.append(email)
+
+        if (acct_dir / "index" / "all-emails.idx").exists():
+            from ..storage.email_index import iter_current
+            for entry in iter_current(acct_dir / "index"):
+                if entry["message_id"] in seen:
+                    continue
+                results.append({
+                    "message_id": entry["message_id"],
+                    "from": entry.get("from"),
+                    "subject": entry.get("subject"),
+                    "date": entry.get("date"),
+                    "excerpt": entry.get("excerpt"),
+                    "_decision": _decision_from_index(entry),
+                    "_account": acct_dir.name,
+                    "_path": acct_dir / entry["path"] / "email.json",
+                })
+            continue
+
         emails_dir = acct_dir / "emails"
         if not emails_dir.exists():
             continue
@@ -29,7 +72,7 @@ def _load_emails(data_dir: Path, account: Optional[str] = None) -> list[dict]:
             if not date_dir.is_dir():
                 continue
             for msg_dir in date_dir.iterdir():
-                if not msg_dir.is_dir():
+                if not msg_dir.is_dir() or msg_dir.name in seen:
                     continue
 
                 email_file = msg_dir / "email.json"
@@ -55,6 +98,35 @@ def _load_emails(data_dir: Path, account: Optional[str] = None) -> list[dict]:
     return results
 
 
+def _load_record(email: dict):
+    """Fill in the rest of an index-only candidate from its email.json."""
+    path = email.pop("_path", None)
+    if path is None:
+        return
+    try:
+        with open(path) as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return  # Pruned or being rewritten meanwhile; the index fields still match
+    email.update({key: value for key, value in record.items() if key not in email or not email[key]})
+
+
+def _load_body(email: dict, data_dir: Path, stores: dict):
+    """Fill in a body kept in the account's blob store (only text queries need it)."""
+    _load_record(email)
+    ref = email.get("body_blob")
+    if not ref or email.get("body"):
+        return
+    account = email["_account"]
+    if account not in stores:
+        from ..storage.blob_store import BlobStore
+        stores[account] = BlobStore(data_dir / account / "blobs")
+    try:
+        email["body"] = stores[account].get(ref)
+    except FileNotFoundError:
+        pass
+
+
 def _matches(email: dict, query: str) -> list[str]:
     """Check if email matches query. Returns list of matched field names."""
     q = query.lower()
@@ -65,6 +137,7 @@ def _matches(email: dict, query: str) -> list[str]:
         "to": email.get("to", ""),
         "subject": email.get("subject", ""),
         "snippet": email.get("snippet", ""),
+        "excerpt": email.get("excerpt", ""),
         "body": email.get("body", ""),
     }
 
@@ -114,6 +187,7 @@ def search(skill_root: Path, args: list[str]):
     date_to = None
     category = None
     action = None
+    full_text = False
 
     i = 0
     while i < len(args):
@@ -139,6 +213,9 @@ def search(skill_root: Path, args: list[str]):
         elif arg == "--action" and i + 1 < len(args):
             action = args[i + 1]
             i += 2
+        elif arg == "--full-text":
+            full_text = True
+            i += 1
         elif not arg.startswith("--"):
             query = arg
             i += 1
@@ -155,6 +232,7 @@ def search(skill_root: Path, args: list[str]):
         print("  --to <YYYY-MM-DD>     End date")
         print("  --category <cat>      Filter by category (auto_archive, urgent, etc.)")
         print("  --action <act>        Filter by action (archive, review, trello)")
+        print("  --full-text           Also search recipients, snippets and bodies (reads every stored email)")
         sys.exit(1)
 
     # Load config to get storage path
@@ -162,10 +240,14 @@ def search(skill_root: Path, args: list[str]):
         config = json.load(f)
 
     data_dir = skill_root / config["storage"]["base_path"]
+    if not data_dir.exists():
+        print(f"No processed emails yet ({data_dir} does not exist)")
+        return
     emails = _load_emails(data_dir, account)
 
     # Apply filters
     results = []
+    blob_stores = {}
     for email in emails:
         # Date filter
         email_date = email.get("date", "")
@@ -188,9 +270,13 @@ def search(skill_root: Path, args: list[str]):
             if not decision or decision.get("action", "").lower() != action.lower():
                 continue
 
-        # Query match
+        # Query match: on the indexed fields (with the excerpt), then with
+        # --full-text on the stored email and body
         if query:
             matched_fields = _matches(email, query)
+            if not matched_fields and full_text:
+                _load_body(email, data_dir, blob_stores)
+                matched_fields = _matches(email, query)
             if not matched_fields:
                 continue
         else:
@@ -228,9 +314,9 @@ def search(skill_root: Path, args: list[str]):
             print(f"  (matched: {', '.join(matched_fields)})", end="")
         print()
 
-        # Show snippet preview if query matched in snippet
-        if "snippet" in matched_fields:
-            snippet = email.get("snippet", "")
+        # Show a text preview if the query matched in it
+        if "snippet" in matched_fields or "excerpt" in matched_fields:
+            snippet = email.get("snippet") if "snippet" in matched_fields else email.get("excerpt")
             if snippet:
                 print(f"    \"{_truncate(snippet, 80)}\"")
 
@@ -1,9 +1,18 @@
-"""Core email processing modules."""
+"""Core email processing modules.
 
-from .gmail import GmailClient
-from .rules_engine import RulesEngine
-from .llm_triage import GeminiTriage
-from .trello import TrelloClient
-from .secrets import resolve_secret
+Exports are imported on first access, so importing one light module (e.g.
+core.text_normalizer) does not pull in googleapiclient, LangChain or pydantic.
+"""
 
-__all__ = ['GmailClient', 'RulesEngine', 'GeminiTriage', 'TrelloClient', 'resolve_secret']
+from .._lazy import lazy_exports
+
+_EXPORTS = {
+    'GmailClient': '.gmail',
+    'RulesEngine': '.rules_engine',
+    'GeminiTriage': '.llm_triage',
+    'TrelloClient': '.trello',
+    'resolve_secret': '.secrets',
+}
+
+__all__ = list(_EXPORTS)
+__getattr__ = lazy_exports(globals(), _EXPORTS)
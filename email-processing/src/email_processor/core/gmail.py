@@ -4,9 +4,11 @@ import sys
 import base64
 import subprocess
 import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 from email.utils import parsedate_to_datetime
 
 # Add google-services skill to path
@@ -17,26 +19,40 @@ try:
     from googleapiclient.discovery import build
     from googleapiclient.errors import HttpError
 except ImportError:
-    print("⚠️  Warning: google-services skill not found. Gmail features will not work.")
     get_credentials = None
     build = None
     HttpError = Exception
 
 from ..models.email import Email
+from .replay import ReplayError
+
+# Replayed calls fail with ReplayError (e.g. a missing fixture) instead of HttpError
+API_ERRORS = (HttpError, ReplayError)
 
 
 class GmailClient:
     """Gmail API client with batch operations."""
 
-    def __init__(self, account_config: dict):
+    def __init__(self, account_config: dict, fixtures=None):
         self.account_config = account_config
         self.email = account_config['email']
         self.gmail_refresh_token = account_config['gmail_refresh_token']
+        self.fixtures = fixtures
         self.service = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # HTTP round trips (a batch counts once) and message sizes fetched
+        self.stats = {"requests": 0, "bytes_received": 0}
 
     def _init_service(self):
         """Initialize Gmail service (lazy)."""
-        if self.service is None:
+        if self.service is None and self.fixtures and self.fixtures.replaying:
+            self.service = self.fixtures.wrap_gmail_service()
+        elif self.service is None:
+            if build is None:
+                raise RuntimeError(
+                    "google-services skill not found (oauth_helper / googleapiclient); "
+                    "Gmail features will not work."
+                )
             value = self.gmail_refresh_token
             if value.startswith("gsm:"):
                 # Pass secret name to oauth_helper (it fetches from GSM internally)
@@ -45,164 +61,272 @@ class GmailClient:
                 # Raw refresh token — use oauth_helper with the token value directly
                 credentials = get_credentials(refresh_token_secret=value)
             self.service = build("gmail", "v1", credentials=credentials)
+            if self.fixtures:
+                self.service = self.fixtures.wrap_gmail_service(self.service)
+
+    async def _run(self, fn, *args):
+        """
+        Run a blocking Gmail call off the event loop.
+
+        googleapiclient objects are not thread-safe, so every call goes through
+        one dedicated worker thread; the event loop stays free for other stages.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gmail")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _execute(self, request):
+        """Execute an API request or HTTP batch, counting it for profiling."""
+        self.stats["requests"] += 1
+        return request.execute()
+
+    def close(self):
+        """Shut down the Gmail worker thread."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
 
     async def fetch_inbox(self, max_results: Optional[int] = None) -> List[Email]:
         """Fetch all inbox emails."""
         self._init_service()
 
         try:
-            # Fetch message IDs
-            all_messages = []
-            page_token = None
+            all_messages = await self._run(self._list_inbox_ids, max_results)
+            if not all_messages:
+                return []
+            return await self._run(self._fetch_messages, all_messages)
+
+        except API_ERRORS as e:
+            print(f"\n❌ Gmail API error: {e}")
+            return []
 
-            print("   Fetching message IDs...")
+    async def list_inbox(self, max_results: Optional[int] = None) -> List[dict]:
+        """List inbox message IDs as [{"id", "threadId"}] without fetching messages."""
+        self._init_service()
 
-            while True:
-                params = {
-                    "userId": "me",
-                    "maxResults": 500,
-                    "q": "in:inbox OR is:unread"
-                }
-                if page_token:
-                    params["pageToken"] = page_token
+        try:
+            return await self._run(self._list_inbox_ids, max_results)
+        except API_ERRORS as e:
+            print(f"\n❌ Gmail API error: {e}")
+            return []
 
-                results = self.service.users().messages().list(**params).execute()
-                messages = results.get("messages", [])
-                all_messages.extend(messages)
+    async def iter_inbox(self, max_results: Optional[int] = None, chunk_size: int = 100,
+                         messages: Optional[List[dict]] = None) -> AsyncIterator[List[Email]]:
+        """
+        Fetch inbox emails in chunks of about `chunk_size` messages.
 
-                print(f"   Retrieved {len(all_messages)} message IDs...", end="\r")
+        Every message of a thread lands in the same chunk, so each chunk can be
+        grouped and triaged on its own while the next one is being fetched.
+        Pass `messages` (from list_inbox) to skip listing.
+        """
+        self._init_service()
 
-                page_token = results.get("nextPageToken")
-                if not page_token:
-                    break
+        all_messages = messages if messages is not None else await self.list_inbox(max_results)
 
-                if max_results and len(all_messages) >= max_results:
-                    all_messages = all_messages[:max_results]
-                    break
+        by_thread: Dict[str, List[dict]] = {}
+        for msg in all_messages:
+            by_thread.setdefault(msg.get("threadId") or msg["id"], []).append(msg)
 
-            print(f"\n   ✅ Found {len(all_messages)} total messages")
+        chunk: List[dict] = []
+        for thread_messages in by_thread.values():
+            if chunk and len(chunk) + len(thread_messages) > chunk_size:
+                yield await self._fetch_chunk(chunk)
+                chunk = []
+            chunk.extend(thread_messages)
+        if chunk:
+            yield await self._fetch_chunk(chunk)
 
-            if not all_messages:
-                return []
+    async def get_labels(self, message_ids: List[str]) -> Dict[str, List[str]]:
+        """
+        Current labels per message (format=minimal: no headers or body).
 
-            # Fetch details in batches with retry + exponential backoff
-            import time
-            print(f"   Fetching email details (batch)...")
-            emails = []
-            results_map = {}
-
-            batch_size = 50
-            max_retries = 4
-            pending_msgs = list(all_messages)
-            total = len(pending_msgs)
-            batch_num = 0
-
-            while pending_msgs:
-                batch_num += 1
-                chunk = pending_msgs[:batch_size]
-                pending_msgs = pending_msgs[batch_size:]
-
-                failed_ids = []
-
-                def make_callback(msg_id, failed_list):
-                    def callback(_request_id, response, exception):
-                        if exception:
-                            failed_list.append(msg_id)
-                        else:
-                            results_map[msg_id] = response
-                    return callback
-
-                batch = self.service.new_batch_http_request()
-                for msg in chunk:
-                    batch.add(
-                        self.service.users().messages().get(
-                            userId="me",
-                            id=msg["id"],
-                            format="full"
-                        ),
-                        callback=make_callback(msg["id"], failed_ids)
-                    )
-                batch.execute()
-
-                succeeded = len(chunk) - len(failed_ids)
-                fetched_so_far = len(results_map)
-                print(f"   ✅ Batch {batch_num}: {succeeded}/{len(chunk)} ok ({fetched_so_far}/{total} total)")
-
-                # Retry failed IDs with exponential backoff
-                if failed_ids:
-                    retry_ids = failed_ids
-                    for attempt in range(1, max_retries + 1):
-                        delay = 2 ** attempt  # 2, 4, 8, 16 seconds
-                        print(f"   🔄 Retry {attempt}/{max_retries}: {len(retry_ids)} emails (waiting {delay}s)...")
-                        time.sleep(delay)
-
-                        still_failed = []
-                        retry_batch = self.service.new_batch_http_request()
-                        for msg_id in retry_ids:
-                            retry_batch.add(
-                                self.service.users().messages().get(
-                                    userId="me",
-                                    id=msg_id,
-                                    format="full"
-                                ),
-                                callback=make_callback(msg_id, still_failed)
-                            )
-                        retry_batch.execute()
-
-                        recovered = len(retry_ids) - len(still_failed)
-                        if recovered:
-                            print(f"      ✅ Recovered {recovered} emails")
-                        retry_ids = still_failed
-                        if not retry_ids:
-                            break
-
-                    if retry_ids:
-                        print(f"   ⚠️  {len(retry_ids)} emails failed after {max_retries} retries")
-
-                # Delay between batches to avoid hitting rate limits
-                if pending_msgs:
-                    time.sleep(1)
-
-            # Build Email objects in original order
-            for msg in all_messages:
-                message = results_map.get(msg["id"])
-                if not message:
-                    continue
-
-                headers = {h["name"]: h["value"] for h in message["payload"]["headers"]}
-
-                date_str = headers.get("Date", "")
-                try:
-                    date = parsedate_to_datetime(date_str)
-                except:
-                    date = datetime.now()
-
-                payload = message.get("payload", {})
-                body = self._extract_body(payload)
-                attachments = self._extract_attachments(payload)
-
-                email = Email(
-                    message_id=msg["id"],
-                    thread_id=message.get("threadId"),
-                    account=self.account_config.get('account_type', 'unknown'),
-                    from_addr=headers.get("From", ""),
-                    to_addr=headers.get("To", ""),
-                    cc_addr=headers.get("Cc"),
-                    subject=headers.get("Subject", "No Subject"),
-                    date=date,
-                    snippet=message.get("snippet", ""),
-                    body=body,
-                    labels=message.get("labelIds", []),
-                    attachments=attachments,
+        Messages that could not be fetched are left out.
+        """
+        self._init_service()
+
+        try:
+            return await self._run(self._fetch_labels, message_ids)
+        except API_ERRORS as e:
+            print(f"\n❌ Gmail API error: {e}")
+            return {}
+
+    def _fetch_labels(self, message_ids: List[str], batch_size: int = 100) -> Dict[str, List[str]]:
+        """Fetch label IDs in batches. Blocking."""
+        labels = {}
+
+        def callback(_request_id, response, exception):
+            if not exception:
+                labels[response["id"]] = response.get("labelIds", [])
+
+        for i in range(0, len(message_ids), batch_size):
+            batch = self.service.new_batch_http_request()
+            for msg_id in message_ids[i:i + batch_size]:
+                batch.add(
+                    self.service.users().messages().get(userId="me", id=msg_id, format="minimal"),
+                    callback=callback,
                 )
-                emails.append(email)
+            self._execute(batch)
 
-            return emails
+        return labels
 
-        except HttpError as e:
+    async def _fetch_chunk(self, messages: List[dict]) -> List[Email]:
+        try:
+            return await self._run(self._fetch_messages, messages)
+        except API_ERRORS as e:
             print(f"\n❌ Gmail API error: {e}")
             return []
 
+    def _list_inbox_ids(self, max_results: Optional[int] = None) -> List[dict]:
+        """List inbox message IDs (with thread IDs). Blocking."""
+        all_messages = []
+        page_token = None
+
+        print("   Fetching message IDs...")
+
+        while True:
+            params = {
+                "userId": "me",
+                "maxResults": 500,
+                "q": "in:inbox OR is:unread"
+            }
+            if page_token:
+                params["pageToken"] = page_token
+
+            results = self._execute(self.service.users().messages().list(**params))
+            messages = results.get("messages", [])
+            all_messages.extend(messages)
+
+            print(f"   Retrieved {len(all_messages)} message IDs...", end="\r")
+
+            page_token = results.get("nextPageToken")
+            if not page_token:
+                break
+
+            if max_results and len(all_messages) >= max_results:
+                all_messages = all_messages[:max_results]
+                break
+
+        print(f"\n   ✅ Found {len(all_messages)} total messages")
+        return all_messages
+
+    def _fetch_messages(self, all_messages: List[dict]) -> List[Email]:
+        """Fetch full messages in batches with retry + exponential backoff. Blocking."""
+        print(f"   Fetching email details (batch)...")
+        emails = []
+        results_map = {}
+
+        batch_size = 50
+        max_retries = 4
+        pending_msgs = list(all_messages)
+        total = len(pending_msgs)
+        batch_num = 0
+
+        while pending_msgs:
+            batch_num += 1
+            chunk = pending_msgs[:batch_size]
+            pending_msgs = pending_msgs[batch_size:]
+
+            failed_ids = []
+
+            def make_callback(msg_id, failed_list):
+                def callback(_request_id, response, exception):
+                    if exception:
+                        failed_list.append(msg_id)
+                    else:
+                        # Parse right away so raw API responses are not held
+                        results_map[msg_id] = self._build_email(msg_id, response)
+                        self.stats["bytes_received"] += response.get("sizeEstimate", 0)
+                return callback
+
+            batch = self.service.new_batch_http_request()
+            for msg in chunk:
+                batch.add(
+                    self.service.users().messages().get(
+                        userId="me",
+                        id=msg["id"],
+                        format="full"
+                    ),
+                    callback=make_callback(msg["id"], failed_ids)
+                )
+            self._execute(batch)
+
+            succeeded = len(chunk) - len(failed_ids)
+            fetched_so_far = len(results_map)
+            print(f"   ✅ Batch {batch_num}: {succeeded}/{len(chunk)} ok ({fetched_so_far}/{total} total)")
+
+            # Retry failed IDs with exponential backoff
+            if failed_ids:
+                retry_ids = failed_ids
+                for attempt in range(1, max_retries + 1):
+                    delay = 2 ** attempt  # 2, 4, 8, 16 seconds
+                    print(f"   🔄 Retry {attempt}/{max_retries}: {len(retry_ids)} emails (waiting {delay}s)...")
+                    time.sleep(delay)
+
+                    still_failed = []
+                    retry_batch = self.service.new_batch_http_request()
+                    for msg_id in retry_ids:
+                        retry_batch.add(
+                            self.service.users().messages().get(
+                                userId="me",
+                                id=msg_id,
+                                format="full"
+                            ),
+                            callback=make_callback(msg_id, still_failed)
+                        )
+                    self._execute(retry_batch)
+
+                    recovered = len(retry_ids) - len(still_failed)
+                    if recovered:
+                        print(f"      ✅ Recovered {recovered} emails")
+                    retry_ids = still_failed
+                    if not retry_ids:
+                        break
+
+                if retry_ids:
+                    print(f"   ⚠️  {len(retry_ids)} emails failed after {max_retries} retries")
+
+            # Delay between batches to avoid hitting rate limits
+            if pending_msgs:
+                time.sleep(1)
+
+        # Original (listing) order
+        for msg in all_messages:
+            email = results_map.get(msg["id"])
+            if email:
+                emails.append(email)
+
+        return emails
+
+    def _build_email(self, msg_id: str, message: dict) -> Email:
+        """Build an Email from a full-format API message."""
+        headers = {h["name"]: h["value"] for h in message["payload"]["headers"]}
+
+        date_str = headers.get("Date", "")
+        try:
+            date = parsedate_to_datetime(date_str)
+        except:
+            date = datetime.now()
+
+        payload = message.get("payload", {})
+        body = self._extract_body(payload)
+        attachments = self._extract_attachments(payload)
+
+        return Email(
+            message_id=msg_id,
+            thread_id=message.get("threadId"),
+            account=self.account_config.get('account_type', 'unknown'),
+            from_addr=headers.get("From", ""),
+            to_addr=headers.get("To", ""),
+            cc_addr=headers.get("Cc"),
+            subject=headers.get("Subject", "No Subject"),
+            date=date,
+            snippet=message.get("snippet", ""),
+            body=body,
+            labels=message.get("labelIds", []),
+            attachments=attachments,
+            rfc822_id=headers.get("Message-ID") or headers.get("Message-Id"),
+        )
+
     @staticmethod
     def _extract_body(payload: dict) -> Optional[str]:
         """Extract plain text body from a full message payload (recursive)."""
@@ -267,10 +391,10 @@ class GmailClient:
                     "removeLabelIds": ["INBOX", "UNREAD"]
                 }
 
-                self.service.users().messages().batchModify(
+                await self._run(self._execute, self.service.users().messages().batchModify(
                     userId="me",
                     body=body
-                ).execute()
+                ))
 
                 archived += len(chunk)
                 print(f"   ✅ Archived batch {i//batch_size + 1} ({len(chunk)} emails) - Total: {archived}/{total}")
@@ -278,32 +402,101 @@ class GmailClient:
                 # Brief delay to be nice to API
                 await asyncio.sleep(0.5)
 
-            except HttpError as e:
+            except API_ERRORS as e:
                 print(f"   ❌ Failed to archive batch: {e}")
 
     async def archive(self, message_id: str):
         """Archive a single email."""
         await self.archive_batch([message_id])
 
+    async def modify_threads(self, thread_ids: List[str], remove_labels: List[str],
+                             add_labels: Optional[List[str]] = None,
+                             batch_size: int = 50) -> List[str]:
+        """
+        Change labels on whole threads: one threads.modify per thread, sent in HTTP batches.
+
+        Returns the thread IDs that could not be modified.
+        """
+        self._init_service()
+
+        if not thread_ids:
+            return []
+
+        body = {"removeLabelIds": remove_labels}
+        if add_labels:
+            body["addLabelIds"] = add_labels
+
+        total = len(thread_ids)
+        modified = 0
+        all_failed = []
+
+        for i in range(0, total, batch_size):
+            chunk = thread_ids[i:i + batch_size]
+            failed_ids = []
+
+            def make_callback(thread_id):
+                def callback(_request_id, _response, exception):
+                    if exception:
+                        failed_ids.append(thread_id)
+                return callback
+
+            batch = self.service.new_batch_http_request()
+            for thread_id in chunk:
+                batch.add(
+                    self.service.users().threads().modify(
+                        userId="me",
+                        id=thread_id,
+                        body=body
+                    ),
+                    callback=make_callback(thread_id)
+                )
+
+            try:
+                await self._run(self._execute, batch)
+            except API_ERRORS as e:
+                print(f"   ❌ Failed to modify thread batch: {e}")
+                all_failed.extend(chunk)
+                continue
+
+            modified += len(chunk) - len(failed_ids)
+            all_failed.extend(failed_ids)
+            print(f"   ✅ Updated thread batch {i//batch_size + 1} ({len(chunk) - len(failed_ids)} threads) - Total: {modified}/{total}")
+            if failed_ids:
+                print(f"   ⚠️  {len(failed_ids)} threads failed")
+
+            # Brief delay between batches to be nice to API
+            if i + batch_size < total:
+                await asyncio.sleep(0.5)
+
+        return all_failed
+
+    async def archive_threads(self, thread_ids: List[str]) -> List[str]:
+        """Archive whole threads. Returns the thread IDs that failed."""
+        return await self.modify_threads(thread_ids, remove_labels=["INBOX", "UNREAD"])
+
+    async def archive_thread(self, thread_id: str) -> bool:
+        """Archive every message in a thread. Returns True on success."""
+        return not await self.archive_threads([thread_id])
+
     async def count_inbox(self) -> dict:
         """Count emails: Inbox (Total) and Global Unread."""
         self._init_service()
 
         try:
             # 1. Total emails in Inbox (ignoring unread status)
-            inbox_results = self.service.users().messages().list(
+            inbox_results = await self._run(self._execute, self.service.users().messages().list(
                 userId="me",
                 q="in:inbox",
                 maxResults=1
-            ).execute()
+            ))
             inbox_total = inbox_results.get("resultSizeEstimate", 0)
 
             # 2. Global Unread (anywhere in the mailbox)
-            unread_results = self.service.users().messages().list(
+            unread_results = await self._run(self._execute, self.service.users().messages().list(
                 userId="me",
                 q="is:unread",
                 maxResults=1
-            ).execute()
+            ))
             global_unread = unread_results.get("resultSizeEstimate", 0)
 
             return {
@@ -311,7 +504,7 @@ class GmailClient:
                 "global_unread": global_unread
             }
 
-        except HttpError as e:
+        except API_ERRORS as e:
             print(f"❌ Error counting emails: {e}")
             return {"inbox_total": 0, "global_unread": 0}
 
@@ -0,0 +1,165 @@
+"""Small keep-alive HTTPS connection pool (stdlib only) for JSON REST APIs."""
+
+import http.client
+import json
+import queue
+import select
+import threading
+import time
+from typing import Optional, Tuple
+from urllib.parse import urlencode
+
+
+class HTTPError(Exception):
+    """Non-retryable (or retries exhausted) HTTP error response."""
+
+    def __init__(self, status: int, reason: str, body: str = ""):
+        super().__init__(f"HTTP {status} {reason}: {body[:200]}")
+        self.status = status
+        self.reason = reason
+        self.body = body
+
+
+# Errors that mean a pooled keep-alive connection went stale or the network blipped
+_CONNECTION_ERRORS = (http.client.HTTPException, OSError)
+
+# Safe to send twice: retried even if the first attempt may have reached the server
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class HTTPConnectionPool:
+    """
+    Thread-safe pool of persistent HTTPS connections to one host.
+
+    Connections are reused across requests (one TLS handshake per connection,
+    not per call). 429 responses, and failures before the request was fully
+    sent, are retried for every method; 5xx responses and failures while
+    waiting for the response only for idempotent ones (a POST may already have
+    taken effect). Retries back off, honoring Retry-After; other 4xx
+    responses raise HTTPError immediately.
+
+    A server closing an idle keep-alive connection usually shows up only as
+    RemoteDisconnected after the request was written, which a POST cannot
+    retry. So connections idle longer than `idle_timeout`, or whose socket
+    has become readable (the server's FIN), are discarded instead of reused.
+    """
+
+    def __init__(self, host: str, maxsize: int = 4, timeout: float = 15.0,
+                 max_retries: int = 3, backoff_seconds: float = 1.0,
+                 idle_timeout: float = 4.0):
+        self.host = host
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.idle_timeout = idle_timeout
+
+        # (connection, monotonic time it was last used)
+        self._idle: "queue.LifoQueue[Tuple[http.client.HTTPSConnection, float]]" = queue.LifoQueue(maxsize)
+
+        # Traffic counters (every attempt counts), read by the profiler
+        self.stats = {"requests": 0, "bytes_sent": 0, "bytes_received": 0}
+        self._stats_lock = threading.Lock()
+
+    def _get_conn(self) -> http.client.HTTPSConnection:
+        while True:
+            try:
+                conn, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return http.client.HTTPSConnection(self.host, timeout=self.timeout)
+            if time.monotonic() - last_used < self.idle_timeout and not _is_dropped(conn):
+                return conn
+            conn.close()
+
+    def _put_conn(self, conn: http.client.HTTPSConnection):
+        try:
+            self._idle.put_nowait((conn, time.monotonic()))
+        except queue.Full:
+            conn.close()
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return min(self.backoff_seconds * (2 ** attempt), 30.0)
+
+    def request(self, method: str, path: str, query: Optional[dict] = None,
+                form: Optional[dict] = None):
+        """Send a request and return the decoded JSON body."""
+        url = path
+        if query:
+            url += "?" + urlencode(query)
+
+        headers = {"Accept": "application/json", "Connection": "keep-alive"}
+        body = None
+        if form is not None:
+            body = urlencode(form)
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            conn = self._get_conn()
+            reused = conn.sock is not None
+            sent = False
+            try:
+                if not reused:
+                    conn.connect()
+                # A request that failed while sending was never complete, so
+                # the server cannot have acted on it
+                conn.request(method, url, body=body, headers=headers)
+                sent = True
+                response = conn.getresponse()
+                data = response.read()
+            except _CONNECTION_ERRORS:
+                conn.close()
+                if attempt >= self.max_retries or (sent and not idempotent):
+                    raise
+                # Nothing reached the server over a reused connection: retry at once
+                if not (reused and not sent):
+                    time.sleep(self._retry_delay(attempt))
+                attempt += 1
+                continue
+
+            with self._stats_lock:
+                self.stats["requests"] += 1
+                self.stats["bytes_sent"] += len(body or "")
+                self.stats["bytes_received"] += len(data)
+
+            if response.will_close:
+                conn.close()
+            else:
+                self._put_conn(conn)
+
+            status = response.status
+            if status == 429 or (status >= 500 and idempotent):
+                if attempt >= self.max_retries:
+                    raise HTTPError(status, response.reason, data.decode(errors="replace"))
+                time.sleep(self._retry_delay(attempt, response.getheader("Retry-After")))
+                attempt += 1
+                continue
+
+            if status >= 400:
+                raise HTTPError(status, response.reason, data.decode(errors="replace"))
+
+            return json.loads(data) if data else None
+
+    def close(self):
+        """Close all idle connections."""
+        while True:
+            try:
+                self._idle.get_nowait()[0].close()
+            except queue.Empty:
+                break
+
+
+def _is_dropped(conn: http.client.HTTPConnection) -> bool:
+    """True if an idle connection's socket is readable: the server closed it (or sent junk)."""
+    if conn.sock is None:
+        return True
+    try:
+        readable, _, _ = select.select([conn.sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
@@ -0,0 +1,193 @@
+"""Per-call LLM telemetry and per-run token/cost budget."""
+
+import json
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# Rough prompt size estimate for budget reservations
+CHARS_PER_TOKEN = 4
+
+
+def merge_usage(total: Optional[dict], usage: Optional[dict]) -> Optional[dict]:
+    """Sum two LangChain usage_metadata dicts (every retried attempt is billed)."""
+    if not usage:
+        return total
+    if not total:
+        return usage
+    return {
+        'input_tokens': total.get('input_tokens', 0) + usage.get('input_tokens', 0),
+        'output_tokens': total.get('output_tokens', 0) + usage.get('output_tokens', 0),
+        'input_token_details': {
+            'cache_read': ((total.get('input_token_details') or {}).get('cache_read', 0)
+                           + (usage.get('input_token_details') or {}).get('cache_read', 0)),
+        },
+    }
+
+
+@dataclass
+class LLMCallRecord:
+    """One structured-output call to the LLM (one triage batch)."""
+    batch: int
+    model: str
+    emails: int
+    prompt_tokens: int
+    output_tokens: int
+    cached_tokens: int
+    latency_ms: float
+    retries: int
+    status: str  # ok, error, budget_skipped
+    cost_usd: float
+    timestamp: str
+
+
+class LLMUsageTracker:
+    """
+    Records token usage, latency and cost per LLM call.
+
+    Records are appended to <session_dir>/llm_calls.jsonl as they happen, so a
+    crashed run still leaves its telemetry behind. An optional budget
+    (tokens and/or USD per run) is enforced by reserving each batch's
+    estimated usage before the call and reconciling it when the call is
+    recorded, so concurrent batches cannot all start against the same
+    remaining budget.
+    """
+
+    def __init__(self, model: str, pricing: Optional[dict] = None,
+                 budget: Optional[dict] = None, session_dir: Optional[Path] = None):
+        self.model = model
+        pricing = pricing or {}
+        budget = budget or {}
+
+        # USD per million tokens
+        self.input_price = pricing.get('input_per_million', 0.0)
+        self.cached_input_price = pricing.get('cached_input_per_million', self.input_price)
+        self.output_price = pricing.get('output_per_million', 0.0)
+
+        self.max_tokens = budget.get('max_tokens_per_run')
+        self.max_cost_usd = budget.get('max_cost_usd_per_run')
+
+        self.log_path = Path(session_dir) / "llm_calls.jsonl" if session_dir else None
+        self.records: List[LLMCallRecord] = []
+        self._reserved_tokens = 0
+        self._reserved_cost_usd = 0.0
+        # (prompt chars, prompt tokens, emails, output tokens) of single-attempt calls
+        self._seen = (0, 0, 0, 0)
+
+    def cost_of(self, prompt_tokens: int, output_tokens: int, cached_tokens: int = 0) -> float:
+        """Estimate USD cost of a call from its token counts."""
+        uncached = max(prompt_tokens - cached_tokens, 0)
+        return (uncached * self.input_price
+                + cached_tokens * self.cached_input_price
+                + output_tokens * self.output_price) / 1_000_000
+
+    def _estimate(self, prompt_chars: int, emails: int, max_output_tokens: int) -> Tuple[int, int]:
+        """(prompt, output) tokens a call should use, scaled from past single-attempt calls."""
+        seen_chars, seen_prompt, seen_emails, seen_output = self._seen
+        if not seen_emails:
+            return prompt_chars // CHARS_PER_TOKEN, max_output_tokens
+        prompt_tokens = int(prompt_chars * seen_prompt / seen_chars) + 1
+        return prompt_tokens, min(max_output_tokens, int(emails * seen_output / seen_emails) + 1)
+
+    def reserve(self, prompt_chars: int, emails: int, max_output_tokens: int) -> Optional[dict]:
+        """
+        Hold a call's estimated usage against the budget until `record` reconciles it.
+
+        Returns the reservation, or None if the call would not fit in what is
+        left after recorded calls and other reservations.
+        """
+        prompt_tokens, output_tokens = self._estimate(prompt_chars, emails, max_output_tokens)
+        tokens = prompt_tokens + output_tokens
+        cost = self.cost_of(prompt_tokens, output_tokens)
+        if self.max_tokens is not None and self.total_tokens + self._reserved_tokens + tokens > self.max_tokens:
+            return None
+        if (self.max_cost_usd is not None
+                and self.total_cost_usd + self._reserved_cost_usd + cost > self.max_cost_usd):
+            return None
+        self._reserved_tokens += tokens
+        self._reserved_cost_usd += cost
+        return {"tokens": tokens, "cost_usd": cost, "prompt_chars": prompt_chars}
+
+    def record(self, batch: int, emails: int, usage: Optional[dict],
+               latency_ms: float, retries: int, status: str = "ok",
+               reservation: Optional[dict] = None) -> LLMCallRecord:
+        """
+        Record one call, replacing its `reservation` with actual usage.
+
+        `usage` is LangChain's usage_metadata dict (may be None), summed over
+        every attempt including failed ones.
+        """
+        usage = usage or {}
+        prompt_tokens = usage.get('input_tokens', 0)
+        output_tokens = usage.get('output_tokens', 0)
+        cached_tokens = (usage.get('input_token_details') or {}).get('cache_read', 0)
+
+        rec = LLMCallRecord(
+            batch=batch,
+            model=self.model,
+            emails=emails,
+            prompt_tokens=prompt_tokens,
+            output_tokens=output_tokens,
+            cached_tokens=cached_tokens,
+            latency_ms=round(latency_ms, 1),
+            retries=retries,
+            status=status,
+            cost_usd=round(self.cost_of(prompt_tokens, output_tokens, cached_tokens), 6),
+            timestamp=datetime.now().isoformat(),
+        )
+        self.records.append(rec)
+        if reservation:
+            self._reserved_tokens -= reservation["tokens"]
+            self._reserved_cost_usd -= reservation["cost_usd"]
+            if status == "ok" and not retries and prompt_tokens:
+                self._seen = (self._seen[0] + reservation["prompt_chars"], self._seen[1] + prompt_tokens,
+                              self._seen[2] + emails, self._seen[3] + output_tokens)
+
+        if self.log_path:
+            with open(self.log_path, "a") as f:
+                f.write(json.dumps(asdict(rec)) + "\n")
+
+        return rec
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(r.prompt_tokens + r.output_tokens for r in self.records)
+
+    @property
+    def reserved_tokens(self) -> int:
+        """Estimated tokens held by calls not recorded yet."""
+        return self._reserved_tokens
+
+    @property
+    def total_cost_usd(self) -> float:
+        return sum(r.cost_usd for r in self.records)
+
+    def over_budget(self) -> bool:
+        """True once recorded and reserved usage has used up the token or cost budget."""
+        if self.max_tokens is not None and self.total_tokens + self._reserved_tokens >= self.max_tokens:
+            return True
+        if (self.max_cost_usd is not None
+                and self.total_cost_usd + self._reserved_cost_usd >= self.max_cost_usd):
+            return True
+        return False
+
+    def summary(self) -> dict:
+        """Aggregate stats for session.json and the final report."""
+        calls = [r for r in self.records if r.status != "budget_skipped"]
+        latencies = sorted(r.latency_ms for r in calls)
+
+        return {
+            "model": self.model,
+            "calls": len(calls),
+            "errors": sum(1 for r in calls if r.status == "error"),
+            "retries": sum(r.retries for r in calls),
+            "budget_skipped_batches": sum(1 for r in self.records if r.status == "budget_skipped"),
+            "emails": sum(r.emails for r in calls),
+            "prompt_tokens": sum(r.prompt_tokens for r in calls),
+            "output_tokens": sum(r.output_tokens for r in calls),
+            "cached_tokens": sum(r.cached_tokens for r in calls),
+            "cost_usd": round(self.total_cost_usd, 6),
+            "latency_ms_avg": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+            "latency_ms_max": latencies[-1] if latencies else 0.0,
+        }
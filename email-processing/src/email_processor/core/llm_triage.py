@@ -1,18 +1,34 @@
 """LLM-based email triage using LangChain + Gemini with structured output."""
 
 import asyncio
-from typing import List, Optional, Literal
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Literal, Tuple
 
 from pydantic import BaseModel, Field
 
 try:
     from langchain_google_genai import ChatGoogleGenerativeAI
 except ImportError:
-    print("⚠️  Warning: langchain-google-genai not installed. Run: pip install langchain-google-genai")
     ChatGoogleGenerativeAI = None
 
+try:
+    from google import genai
+    from google.genai import types as genai_types
+except ImportError:
+    genai = None
+    genai_types = None
+
 from ..models.email import Email, TriageDecision
+from .llm_telemetry import LLMUsageTracker, merge_usage
 from .secrets import resolve_secret
+from .text_normalizer import excerpt
+
+
+# Bump whenever the static prompt prefix changes meaningfully
+PROMPT_VERSION = "v3"
 
 
 # --- Pydantic models for structured output ---
@@ -52,62 +68,274 @@ class TriageBatchResult(BaseModel):
 class GeminiTriage:
     """LLM triage using LangChain + Gemini with structured output."""
 
-    def __init__(self, account_config: dict, llm_config: dict):
+    def __init__(self, account_config: dict, llm_config: dict,
+                 session_dir: Optional[Path] = None, fixtures=None):
         self.account_config = account_config
         self.llm_config = llm_config
+        self.fixtures = fixtures
         self.model_name = llm_config.get('model', 'gemini-3-flash-preview')
         self.temperature = llm_config.get('temperature', 0.3)
         self.max_output_tokens = llm_config.get('max_output_tokens', 4096)
         self.batch_size = llm_config.get('batch_size', 10)
         self.rate_limit_seconds = llm_config.get('rate_limit_seconds', 6)
+        self.preview_chars = llm_config.get('preview_chars', 300)
+        self.max_retries = llm_config.get('max_retries', 2)
+        self.max_concurrency = max(1, llm_config.get('max_concurrency', 1))
+        self.timeout_seconds = llm_config.get('timeout_seconds', 120)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._next_call_at = 0.0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._budget_changed: Optional[asyncio.Condition] = None
+        self._batches_started = 0
+        self.context_cache_config = llm_config.get('context_cache', {})
+
+        # Static instruction block, identical for every batch of this run
+        self.prompt_prefix = self._build_prompt_prefix()
+        self.prefix_hash = hashlib.sha256(self.prompt_prefix.encode()).hexdigest()[:12]
+        self.cached_content = None
+
+        # Per-call telemetry (tokens, latency, cost) and optional run budget
+        self.usage = LLMUsageTracker(
+            self.model_name,
+            pricing=llm_config.get('pricing'),
+            budget=llm_config.get('budget'),
+            session_dir=session_dir,
+        )
 
         # Configure LangChain + Gemini
-        if ChatGoogleGenerativeAI:
+        self.structured_llm = None
+        if fixtures and fixtures.replaying:
+            pass  # Responses come from the fixture directory
+        elif ChatGoogleGenerativeAI is None:
+            print("⚠️  Warning: langchain-google-genai not installed. Run: pip install langchain-google-genai")
+        else:
             api_key = resolve_secret(llm_config.get('api_key', 'gsm:nexus-hub-google-api-key'))
             if api_key:
+                if self.context_cache_config.get('enabled'):
+                    self.cached_content = self._get_or_create_context_cache(api_key)
+
+                llm_kwargs = {}
+                if self.cached_content:
+                    llm_kwargs['cached_content'] = self.cached_content
+
                 llm = ChatGoogleGenerativeAI(
                     model=self.model_name,
                     google_api_key=api_key,
                     temperature=self.temperature,
                     max_output_tokens=self.max_output_tokens,
+                    **llm_kwargs,
                 )
-                self.structured_llm = llm.with_structured_output(TriageBatchResult)
-            else:
-                self.structured_llm = None
-        else:
-            self.structured_llm = None
+                # include_raw keeps the AIMessage so usage metadata is available
+                self.structured_llm = llm.with_structured_output(
+                    TriageBatchResult, include_raw=True
+                )
+
+    def _get_or_create_context_cache(self, api_key: str) -> Optional[str]:
+        """
+        Reuse or create an explicit Gemini context cache holding the prompt prefix.
+
+        The cache is keyed by prompt version + prefix hash, so runs with an
+        unchanged prefix share one cache. Returns the cache name, or None to fall
+        back to implicit (automatic) prefix caching.
+        """
+        if genai is None:
+            print("⚠️  google-genai not installed, using implicit prompt caching only")
+            return None
+
+        display_name = f"email-triage-{PROMPT_VERSION}-{self.prefix_hash}"
+        ttl_seconds = self.context_cache_config.get('ttl_seconds', 3600)
+
+        try:
+            client = genai.Client(api_key=api_key)
+            for cache in client.caches.list():
+                if cache.display_name == display_name and cache.model.endswith(self.model_name):
+                    return cache.name
+
+            cache = client.caches.create(
+                model=self.model_name,
+                config=genai_types.CreateCachedContentConfig(
+                    display_name=display_name,
+                    system_instruction=self.prompt_prefix,
+                    ttl=f"{ttl_seconds}s",
+                ),
+            )
+            return cache.name
+        except Exception as e:
+            # Typically: prefix below the model's minimum cacheable size
+            print(f"⚠️  Context cache unavailable ({e}), using implicit prompt caching")
+            return None
 
     async def triage_batch(self, emails: List[Email]) -> List[TriageDecision]:
-        """Triage emails in batches with rate limiting."""
-        if not self.structured_llm:
+        """Triage emails in batches with rate limiting and bounded concurrency."""
+        replaying = self.fixtures and self.fixtures.replaying
+        if not self.structured_llm and not replaying:
             print("⚠️  Gemini not configured, skipping LLM triage")
             return self._fallback_decisions(emails)
 
         # Split into batches
         batches = [emails[i:i+self.batch_size] for i in range(0, len(emails), self.batch_size)]
 
-        all_decisions = []
-        for batch_idx, batch in enumerate(batches):
-            if batch_idx > 0:
-                await asyncio.sleep(self.rate_limit_seconds)
-
-            print(f"   Batch {batch_idx + 1}/{len(batches)} ({len(batch)} emails)...")
-            batch_decisions = await self._triage_single_batch(batch, batch_idx * self.batch_size)
-            all_decisions.extend(batch_decisions)
-
-        return all_decisions
-
-    async def _triage_single_batch(self, emails: List[Email],
-                                   start_index: int) -> List[TriageDecision]:
-        """Process single batch with structured output."""
-        prompt = self._build_prompt(emails, start_index)
+        # Shared across calls, so concurrent triage_batch callers (pipeline
+        # workers) stay within max_concurrency together
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._budget_changed = asyncio.Condition()
+        first_batch = self._batches_started
+        self._batches_started += len(batches)
+        budget_warned = False
+
+        async def run_batch(batch_idx: int, batch: List[Email]) -> List[TriageDecision]:
+            nonlocal budget_warned
+            start_index = batch_idx * self.batch_size
+            batch_num = first_batch + batch_idx
+
+            async with self._semaphore:
+                # Reserve the batch's estimated usage. If it does not fit, wait
+                # for calls in flight to reconcile theirs; if it still does
+                # not fit, the batch goes to human review
+                messages = self._build_messages(batch, start_index)
+                prompt_chars = sum(len(text) for _, text in messages)
+                async with self._budget_changed:
+                    while True:
+                        reservation = self.usage.reserve(prompt_chars, len(batch), self.max_output_tokens)
+                        if reservation is not None or not self.usage.reserved_tokens:
+                            break
+                        await self._budget_changed.wait()
+                if reservation is None:
+                    if not budget_warned:
+                        print("   ⚠️  LLM budget exceeded, sending remaining batches to review")
+                        budget_warned = True
+                    self.usage.record(batch_num, len(batch), None, 0.0, 0, status="budget_skipped")
+                    return self._fallback_decisions(
+                        batch, start_index,
+                        category='llm_budget',
+                        reason='LLM budget exceeded - needs manual review',
+                    )
+
+                await self._wait_for_rate_limit()
+                print(f"   🤖 LLM batch {batch_num + 1} ({len(batch)} emails)...")
+                try:
+                    return await self._triage_single_batch(
+                        batch, start_index, batch_num, messages=messages, reservation=reservation,
+                    )
+                finally:
+                    async with self._budget_changed:
+                        self._budget_changed.notify_all()
+
+        # Batches run concurrently (bounded); results come back in batch order
+        results = await asyncio.gather(*(
+            run_batch(batch_idx, batch) for batch_idx, batch in enumerate(batches)
+        ))
+        return [d for batch_decisions in results for d in batch_decisions]
+
+    async def _wait_for_rate_limit(self):
+        """Space out call starts by `rate_limit_seconds`, even with concurrent batches."""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        start_at = max(now, self._next_call_at)
+        self._next_call_at = start_at + self.rate_limit_seconds
+        if start_at > now:
+            await asyncio.sleep(start_at - now)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Dedicated, size-bounded pool for blocking LLM calls."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix="llm-triage",
+            )
+        return self._executor
+
+    def _invoke(self, messages: list, emails: List[Email], start_index: int) -> dict:
+        """Blocking structured-output call (served from fixtures when replaying)."""
+        if self.fixtures and self.fixtures.replaying:
+            return self.fixtures.replay_llm(emails, start_index)
+
+        response = self.structured_llm.invoke(messages)
+        if self.fixtures:
+            self.fixtures.record_llm(emails, start_index, response)
+        return response
+
+    async def _ainvoke(self, messages: list, emails: List[Email], start_index: int) -> dict:
+        """
+        Structured-output call on the event loop.
+
+        Uses the client's native `ainvoke` when available; otherwise the blocking
+        call runs on the dedicated LLM executor, never the loop's default one.
+        """
+        replaying = self.fixtures and self.fixtures.replaying
+        if not replaying and hasattr(self.structured_llm, "ainvoke"):
+            response = await self.structured_llm.ainvoke(messages)
+            if self.fixtures:
+                self.fixtures.record_llm(emails, start_index, response)
+            return response
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(),
+            lambda: self._invoke(messages, emails, start_index)
+        )
+
+    async def _invoke_with_retries(self, messages: list, emails: List[Email],
+                                   start_index: int) -> Tuple[dict, int, Optional[dict]]:
+        """
+        Invoke the structured LLM, retrying with exponential backoff.
+
+        Returns (response, retries, usage summed over all attempts). Each
+        attempt is bounded by `timeout_seconds`. Cancellation is not retried:
+        CancelledError propagates to the caller. A final error carries
+        `retries` and `usage` attributes.
+        """
+        retries = 0
+        usage = None
+        while True:
+            try:
+                response = await asyncio.wait_for(
+                    self._ainvoke(messages, emails, start_index),
+                    timeout=self.timeout_seconds,
+                )
+                # Unparseable responses are billed too
+                usage = merge_usage(usage, getattr(response.get("raw"), "usage_metadata", None))
+
+                if response.get("parsing_error") or response.get("parsed") is None:
+                    raise ValueError(f"Structured output parsing failed: {response.get('parsing_error')}")
+                return response, retries, usage
+
+            except asyncio.TimeoutError:
+                error = TimeoutError(f"LLM call timed out after {self.timeout_seconds}s")
+            except Exception as e:
+                error = e
+
+            if retries >= self.max_retries:
+                error.retries = retries
+                error.usage = usage
+                raise error
+            retries += 1
+            delay = 2 ** retries
+            print(f"   🔄 LLM retry {retries}/{self.max_retries} in {delay}s ({error})")
+            await asyncio.sleep(delay)
+
+    def close(self):
+        """Release the dedicated LLM executor."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _triage_single_batch(self, emails: List[Email], start_index: int,
+                                   batch_num: int = 0, messages: Optional[list] = None,
+                                   reservation: Optional[dict] = None) -> List[TriageDecision]:
+        """Process single batch with structured output; `reservation` is reconciled when recorded."""
+        messages = messages or self._build_messages(emails, start_index)
+        started = time.perf_counter()
 
         try:
-            # Run sync LangChain call in executor
-            loop = asyncio.get_event_loop()
-            result: TriageBatchResult = await loop.run_in_executor(
-                None,
-                lambda: self.structured_llm.invoke(prompt)
+            response, retries, usage = await self._invoke_with_retries(messages, emails, start_index)
+            result: TriageBatchResult = response["parsed"]
+
+            self.usage.record(
+                batch_num, len(emails), usage,
+                (time.perf_counter() - started) * 1000,
+                retries, reservation=reservation,
             )
 
             # Convert Pydantic models to TriageDecision dataclasses
@@ -158,25 +386,34 @@ class GeminiTriage:
 
         except Exception as e:
             print(f"   ❌ LLM error: {e}")
+            self.usage.record(
+                batch_num, len(emails), getattr(e, "usage", None),
+                (time.perf_counter() - started) * 1000,
+                getattr(e, "retries", 0),
+                status="error", reservation=reservation,
+            )
             return self._fallback_decisions(emails, start_index)
 
-    def _build_prompt(self, emails: List[Email], start_index: int) -> str:
-        """Build triage prompt."""
+    def _build_messages(self, emails: List[Email], start_index: int) -> list:
+        """
+        Build chat messages: static prefix first, per-batch payload last.
+
+        Keeping the prefix byte-identical across batches lets Gemini serve it
+        from its prompt cache. With an explicit context cache the prefix already
+        lives in the cache, so only the payload is sent.
+        """
+        payload = self._build_batch_payload(emails, start_index)
+        if self.cached_content:
+            return [("human", payload)]
+        return [("system", self.prompt_prefix), ("human", payload)]
+
+    def _build_prompt_prefix(self) -> str:
+        """Build the static instruction block (versioned, shared by all batches)."""
         account = self.account_config['email']
         internal_domains = self.account_config.get('internal_domains', [])
 
-        emails_text = []
-        for idx, email in enumerate(emails):
-            emails_text.append(f"""
-EMAIL {start_index + idx}:
-From: {email.from_addr}
-To: {email.to_addr}
-Subject: {email.subject}
-Date: {email.date.strftime('%Y-%m-%d %H:%M')}
-Preview: {email.snippet[:250]}
----""")
-
-        return f"""You are an expert email triage assistant. Analyze {len(emails)} emails and return categorization decisions.
+        return f"""[triage-prompt {PROMPT_VERSION}]
+You are an expert email triage assistant. Analyze the emails you are given and return categorization decisions.
 
 USER CONTEXT:
 - Account: {account}
@@ -208,22 +445,43 @@ ACTIONS:
 
 PRIORITY: 0 (urgent) to 5 (spam)
 
-EMAILS:
+Some emails are the newest message of a longer thread; a digest of earlier
+messages is included for context. Decide for the whole thread.
+
+Return exactly one decision per email, using the EMAIL number as email_index."""
+
+    def _build_batch_payload(self, emails: List[Email], start_index: int) -> str:
+        """Build the compact per-batch part of the prompt (emails + index range)."""
+        emails_text = []
+        for idx, email in enumerate(emails):
+            emails_text.append(f"""EMAIL {start_index + idx}:
+From: {email.from_addr}
+To: {email.to_addr}
+Subject: {email.subject}
+Date: {email.date.strftime('%Y-%m-%d %H:%M')}
+Preview: {excerpt(email, self.preview_chars)}""")
+            if email.thread_digest:
+                emails_text.append(f"""Thread: {email.thread_size} messages, earlier:
+{email.thread_digest}""")
+            emails_text.append("---")
+
+        return f"""EMAILS ({len(emails)}):
 {chr(10).join(emails_text)}
 
 Return one decision per email (email_index {start_index} through {start_index + len(emails) - 1})."""
 
-    def _fallback_decisions(self, emails: List[Email],
-                           start_index: int = 0) -> List[TriageDecision]:
+    def _fallback_decisions(self, emails: List[Email], start_index: int = 0,
+                            category: str = 'llm_error',
+                            reason: str = 'LLM unavailable - needs manual review') -> List[TriageDecision]:
         """Fallback when LLM fails."""
         return [
             TriageDecision(
                 email_index=start_index + i,
                 message_id=email.message_id,
                 action='review',
-                category='llm_error',
+                category=category,
                 priority=3,
-                reason='LLM unavailable - needs manual review',
+                reason=reason,
                 processor='llm',
                 confidence=0.0
             )
@@ -0,0 +1,192 @@
+"""Concurrent stages connected by bounded asyncio queues.
+
+Each stage pulls items from its input queue, runs them through a handler with
+`workers` concurrent tasks, and emits results downstream. Queues are bounded,
+so a slow stage backs up the ones feeding it instead of buffering everything
+in memory; end-to-end time approaches that of the slowest stage.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, List, Optional
+
+# Marks the end of a stage's input
+_END = object()
+
+Emit = Callable[[Any], Awaitable[None]]
+
+
+@dataclass
+class StageStats:
+    """Work done by one stage."""
+    name: str
+    workers: int
+    items: int = 0
+    busy_seconds: float = 0.0   # Wall time in the handler, minus waits on a full next queue (summed over workers)
+    cpu_seconds: float = 0.0    # Event-loop CPU time of the stage's own steps
+
+
+class _CPUTimed:
+    """
+    Await a coroutine while charging the thread CPU time of each of its steps
+    to `stats`. Time the event loop spends running other tasks in between is
+    not counted, so concurrent stages get their own CPU time.
+    """
+
+    def __init__(self, coro, stats: StageStats):
+        self.coro = coro
+        self.stats = stats
+
+    def __await__(self):
+        gen = self.coro.__await__()
+        send, error = None, None
+        while True:
+            started = time.thread_time()
+            try:
+                yielded = gen.throw(error) if error is not None else gen.send(send)
+            except StopIteration as stop:
+                self.stats.cpu_seconds += time.thread_time() - started
+                return stop.value
+            self.stats.cpu_seconds += time.thread_time() - started
+            try:
+                send, error = (yield yielded), None
+            except BaseException as e:
+                send, error = None, e
+
+
+def trace_event(name: str, started: float, elapsed: float, thread: str) -> dict:
+    """Chrome trace-event ("X" complete event) for a perf_counter() span."""
+    return {
+        "name": name, "ph": "X", "pid": 1, "tid": thread,
+        "ts": round(started * 1e6), "dur": round(elapsed * 1e6),
+    }
+
+
+class _Stage:
+    def __init__(self, name: str, handler: Callable[[Any, Emit], Awaitable[None]],
+                 inbox: asyncio.Queue, outbox: Optional[asyncio.Queue], workers: int,
+                 flush: Optional[Callable[[Emit], Awaitable[None]]],
+                 trace: Optional[list] = None):
+        self.name = name
+        self.handler = handler
+        self.inbox = inbox
+        self.outbox = outbox
+        self.workers = max(1, workers)
+        self.flush = flush
+        self.stats = StageStats(name, self.workers)
+        self.trace = trace
+        self._running = self.workers
+
+    async def emit(self, item: Any):
+        if self.outbox is not None:
+            await self.outbox.put(item)
+
+    async def worker(self, worker_id: int = 0):
+        while True:
+            item = await self.inbox.get()
+            if item is _END:
+                # Let sibling workers see the end marker too
+                await self.inbox.put(_END)
+                break
+            waited = 0.0
+
+            async def emit(result: Any):
+                # Blocked on downstream backpressure: not this stage's work
+                nonlocal waited
+                put_started = time.perf_counter()
+                await self.emit(result)
+                waited += time.perf_counter() - put_started
+
+            started = time.perf_counter()
+            await self.handler(item, emit)
+            elapsed = time.perf_counter() - started
+            self.stats.busy_seconds += elapsed - waited
+            self.stats.items += 1
+            if self.trace is not None:
+                self.trace.append(trace_event(self.name, started, elapsed, f"{self.name}-{worker_id}"))
+
+        self._running -= 1
+        if self._running == 0:
+            # Last worker out flushes buffered state and closes the next stage
+            if self.flush:
+                await self.flush(self.emit)
+            if self.outbox is not None:
+                await self.outbox.put(_END)
+
+
+class Pipeline:
+    """
+    Linear pipeline: a source coroutine feeds the first queue, and every stage
+    reads from the previous stage's queue.
+
+        pipeline = Pipeline(queue_size=4)
+        pipeline.stage("rules", apply_rules, workers=1)
+        pipeline.stage("llm", triage, workers=2)
+        await pipeline.run(source)
+    """
+
+    def __init__(self, queue_size: int = 4, trace: Optional[list] = None):
+        self.queue_size = queue_size
+        self.trace = trace  # Receives one trace event per handled item, if given
+        self.stages: List[_Stage] = []
+        self._head = asyncio.Queue(queue_size)
+
+    def stage(self, name: str, handler: Callable[[Any, Emit], Awaitable[None]],
+              workers: int = 1, flush: Optional[Callable[[Emit], Awaitable[None]]] = None):
+        """
+        Append a stage. `handler(item, emit)` processes one item and awaits
+        `emit(result)` for anything the next stage should see; `flush(emit)`
+        runs once after the stage's input is exhausted.
+        """
+        inbox = self.stages[-1].outbox if self.stages else self._head
+        # The final stage's outbox is replaced when the next stage is added
+        stage = _Stage(name, handler, inbox, asyncio.Queue(self.queue_size), workers, flush,
+                       trace=self.trace)
+        self.stages.append(stage)
+        return self
+
+    async def run(self, source: Callable[[Emit], Awaitable[None]],
+                  source_name: str = "source") -> List[StageStats]:
+        """
+        Run `source(emit)` and all stages to completion.
+
+        Returns stats for the source followed by each stage. Busy times exclude
+        time spent blocked on a full queue (backpressure).
+        """
+        if self.stages:
+            self.stages[-1].outbox = None
+        source_stats = StageStats(source_name, 1)
+
+        async def emit(item):
+            started = time.perf_counter()
+            await self._head.put(item)
+            source_stats.busy_seconds -= time.perf_counter() - started
+            source_stats.items += 1
+
+        async def feed():
+            started = time.perf_counter()
+            await source(emit)
+            await self._head.put(_END)
+            elapsed = time.perf_counter() - started
+            source_stats.busy_seconds += elapsed
+            if self.trace is not None:
+                self.trace.append(trace_event(source_name, started, elapsed, source_name))
+
+        tasks = [asyncio.ensure_future(_CPUTimed(feed(), source_stats))]
+        for stage in self.stages:
+            tasks.extend(
+                asyncio.ensure_future(_CPUTimed(stage.worker(worker_id), stage.stats))
+                for worker_id in range(stage.workers)
+            )
+
+        try:
+            # Fail fast: one failing stage cancels the rest instead of deadlocking
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        return [source_stats] + [stage.stats for stage in self.stages]
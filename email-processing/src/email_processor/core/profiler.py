@@ -0,0 +1,100 @@
+"""Per-stage timing for a processing run (--profile).
+
+Collects wall and CPU time per pipeline stage and per sequential step, plus
+API traffic per service, into a dict stored under "profile" in session.json.
+Traffic is counted per service, not per stage: Gmail, for one, is called by
+the list step and the fetch and actions stages alike.
+Optionally writes:
+  trace.json       Chrome trace events (chrome://tracing, ui.perfetto.dev, speedscope)
+  profile.pstats   cProfile data (snakeviz, `python -m pstats`, flameprof)
+"""
+
+import cProfile
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List
+
+from .pipeline import StageStats, trace_event
+
+
+class StageProfiler:
+    """Timing collector for one run; cheap enough to leave on."""
+
+    def __init__(self, cprofile: bool = False):
+        self.stages: Dict[str, dict] = {}
+        self.steps: Dict[str, dict] = {}
+        self.io: Dict[str, dict] = {}
+        self.trace: List[dict] = []
+        self._started = time.perf_counter()
+        self._cpu_started = time.process_time()
+        self._cprofile = cProfile.Profile() if cprofile else None
+        if self._cprofile:
+            self._cprofile.enable()
+
+    @contextmanager
+    def step(self, name: str):
+        """Time a sequential (non-pipelined) step."""
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.steps[name] = {
+                "wall_seconds": round(elapsed, 4),
+                "cpu_seconds": round(time.process_time() - cpu_started, 4),
+            }
+            self.trace.append(trace_event(name, started, elapsed, "main"))
+
+    def add_stages(self, stats: List[StageStats]):
+        """Add one pipeline run's stage stats; repeated runs (windows) accumulate."""
+        for s in stats:
+            stage = self.stages.setdefault(
+                s.name, {"items": 0, "workers": s.workers, "wall_seconds": 0.0, "cpu_seconds": 0.0}
+            )
+            stage["items"] += s.items
+            stage["wall_seconds"] = round(stage["wall_seconds"] + s.busy_seconds, 4)
+            stage["cpu_seconds"] = round(stage["cpu_seconds"] + s.cpu_seconds, 4)
+
+    def add_io(self, service: str, **counters):
+        """Record API traffic for a service (requests, bytes_sent, bytes_received, tokens...)."""
+        self.io[service] = counters
+
+    def stop(self) -> dict:
+        """Finish timing and return the report stored in session.json."""
+        if self._cprofile:
+            self._cprofile.disable()
+        return {
+            "wall_seconds": round(time.perf_counter() - self._started, 4),
+            "cpu_seconds": round(time.process_time() - self._cpu_started, 4),
+            "stages": self.stages,
+            "steps": self.steps,
+            "io": self.io,
+        }
+
+    def write_files(self, session_dir: Path) -> List[Path]:
+        """Write trace.json (and profile.pstats with cProfile on); returns the paths."""
+        session_dir = Path(session_dir)
+        paths = [session_dir / "trace.json"]
+        paths[0].write_text(json.dumps({"traceEvents": self.trace, "displayTimeUnit": "ms"}))
+        if self._cprofile:
+            paths.append(session_dir / "profile.pstats")
+            self._cprofile.dump_stats(str(paths[-1]))
+        return paths
+
+    @staticmethod
+    def print_report(report: dict):
+        lines = []
+        for name, s in report["steps"].items():
+            lines.append(f"{name:<10} {s['wall_seconds']:>7.2f}s wall {s['cpu_seconds']:>7.2f}s CPU")
+        for name, s in report["stages"].items():
+            lines.append(f"{name:<10} {s['wall_seconds']:>7.2f}s busy {s['cpu_seconds']:>7.2f}s CPU"
+                         f"  {s['items']} chunks × {s['workers']} worker(s)")
+        for service, counters in report["io"].items():
+            lines.append(f"{service:<10} " + ", ".join(f"{k}={v:,}" for k, v in counters.items()))
+
+        print(f"\n⏱️  PROFILE ({report['wall_seconds']:.2f}s wall, {report['cpu_seconds']:.2f}s CPU)")
+        for i, line in enumerate(lines):
+            print(f"   {'└─' if i == len(lines) - 1 else '├─'} {line}")
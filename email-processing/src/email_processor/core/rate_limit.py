@@ -0,0 +1,35 @@
+"""Thread-safe sliding-window rate limiter."""
+
+import threading
+import time
+from collections import deque
+
+
+class SlidingWindowRateLimiter:
+    """
+    Allow at most `max_calls` in any `period` seconds.
+
+    `acquire()` blocks the calling thread until a slot is free, so it is meant
+    for executor threads (e.g. Trello API calls), not the event loop.
+    """
+
+    def __init__(self, max_calls: int, period: float):
+        self.max_calls = max_calls
+        self.period = period
+        self._calls: deque = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= self.period:
+                    self._calls.popleft()
+
+                if len(self._calls) < self.max_calls:
+                    self._calls.append(now)
+                    return
+
+                wait = self.period - (now - self._calls[0])
+
+            time.sleep(wait)
@@ -0,0 +1,370 @@
+"""Record/replay fixtures for Gmail, LLM and Trello calls.
+
+Record mode wraps the live clients and writes every response to a fixture
+directory. Replay mode serves those responses back with no network access,
+optionally injecting latency and errors, so `EmailProcessor.process` can be
+benchmarked deterministically offline.
+
+Fixture layout:
+  <fixture_dir>/
+    manifest.json
+    gmail_list/<key>.json        # messages.list pages (keyed by params)
+    gmail_message/<id>.json      # messages.get(format=full) responses
+    gmail_labels/<id>.json       # messages.get(format=minimal) responses
+    llm_message/<id>.json        # per-email structured decision + token share
+    trello/<key>.json            # Trello API responses (keyed by method+path+params)
+"""
+
+import hashlib
+import json
+import random
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from ..models.email import Email
+
+
+class ReplayError(Exception):
+    """Error from a replayed call; the API wrappers handle it like an API error."""
+
+
+class InjectedFaultError(ReplayError):
+    """Error raised deliberately by replay fault injection."""
+
+
+class FixtureMissingError(ReplayError):
+    """Replay requested a response that was never recorded."""
+
+
+def _key(*parts) -> str:
+    """Stable short hash for a request signature."""
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()[:16]
+
+
+class FixtureStore:
+    """Fixture directory shared by the Gmail, LLM and Trello hooks."""
+
+    KINDS = ("gmail", "llm", "trello")
+
+    def __init__(self, path: Path, mode: str, latency_ms: Optional[dict] = None,
+                 error_rate: float = 0.0, seed: int = 0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown fixture mode: {mode}")
+
+        self.path = Path(path)
+        self.mode = mode
+        self.latency_ms = latency_ms or {}
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self.counts = {kind: 0 for kind in self.KINDS}
+
+        if self.recording:
+            self.path.mkdir(parents=True, exist_ok=True)
+        elif not self.path.exists():
+            raise FileNotFoundError(f"Fixture directory not found: {self.path}")
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    # --- Raw storage ---
+
+    def save(self, kind: str, key: str, value):
+        kind_dir = self.path / kind
+        kind_dir.mkdir(parents=True, exist_ok=True)
+        (kind_dir / f"{key}.json").write_text(json.dumps(value, ensure_ascii=False))
+
+    def load(self, kind: str, key: str):
+        fixture = self.path / kind / f"{key}.json"
+        if not fixture.exists():
+            raise FixtureMissingError(f"No fixture recorded for {kind}/{key}.json in {self.path}")
+        return json.loads(fixture.read_text())
+
+    def write_manifest(self, account: str):
+        """Describe what was recorded (written at the end of a record run)."""
+        manifest = {
+            "account": account,
+            "recorded_at": datetime.now().isoformat(),
+            "counts": {
+                kind_dir.name: len(list(kind_dir.glob("*.json")))
+                for kind_dir in self.path.iterdir() if kind_dir.is_dir()
+            },
+        }
+        (self.path / "manifest.json").write_text(json.dumps(manifest, indent=2))
+
+    # --- Fault injection ---
+
+    def simulate(self, kind: str, fail: bool = True):
+        """Apply configured latency for `kind`, then maybe raise an injected error."""
+        self.counts[kind] += 1
+        delay = self.latency_ms.get(kind, self.latency_ms.get("default", 0))
+        if delay:
+            time.sleep(delay / 1000)
+        if fail:
+            self.maybe_fail(kind)
+
+    def maybe_fail(self, kind: str, detail: str = ""):
+        """Raise an injected error with probability `error_rate`."""
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise InjectedFaultError(f"Injected {kind} fault {detail}".strip())
+
+    # --- Gmail ---
+
+    def wrap_gmail_service(self, service=None):
+        """Return a recording proxy around `service`, or a replay service."""
+        if self.replaying:
+            return _ReplayGmailService(self)
+        return _RecordingGmailService(service, self)
+
+    # --- LLM ---
+
+    def record_llm(self, emails: List[Email], start_index: int, response: dict):
+        """Store each email's decision (with its share of the batch's tokens)."""
+        parsed = response.get("parsed")
+        if parsed is None:
+            return
+
+        usage = getattr(response.get("raw"), "usage_metadata", None) or {}
+        share = {
+            "input_tokens": usage.get("input_tokens", 0) // max(len(emails), 1),
+            "output_tokens": usage.get("output_tokens", 0) // max(len(emails), 1),
+        }
+
+        for d in parsed.decisions:
+            local_idx = d.email_index - start_index
+            if not 0 <= local_idx < len(emails):
+                continue
+            decision = d.model_dump()
+            decision.pop("email_index")
+            self.save("llm_message", emails[local_idx].message_id,
+                      {"decision": decision, "usage": share})
+
+    def replay_llm(self, emails: List[Email], start_index: int) -> dict:
+        """
+        Rebuild a structured-output response for this batch from per-email records.
+
+        Keyed by message ID rather than prompt text, so fixtures survive prompt
+        and batch-size changes. Unrecorded emails are simply omitted, which the
+        triage layer turns into review decisions.
+        """
+        from .llm_triage import TriageBatchResult
+
+        self.simulate("llm")
+
+        decisions = []
+        usage = {"input_tokens": 0, "output_tokens": 0}
+        for idx, email in enumerate(emails):
+            try:
+                record = self.load("llm_message", email.message_id)
+            except FixtureMissingError:
+                continue
+            decisions.append({"email_index": start_index + idx, **record["decision"]})
+            for k in usage:
+                usage[k] += record["usage"].get(k, 0)
+
+        return {
+            "raw": _ReplayMessage(usage),
+            "parsed": TriageBatchResult.model_validate({"decisions": decisions}),
+            "parsing_error": None,
+        }
+
+    # --- Trello ---
+
+    def trello_call(self, method: str, path: str, params: Optional[dict],
+                    live: Callable[[], object]):
+        """Serve a Trello API call from fixtures (replay) or record the live response."""
+        key = _key(method, path, params or {})
+
+        if self.recording:
+            result = live()
+            self.save("trello", key, result)
+            return result
+
+        self.simulate("trello")
+        try:
+            return self.load("trello", key)
+        except FixtureMissingError:
+            if method == "POST" and path == "/cards":
+                # Card payloads embed timestamps, so synthesize a card instead
+                return {
+                    "id": f"replay-{key}",
+                    "shortUrl": f"https://trello.com/c/replay-{key}",
+                }
+            raise
+
+
+class _ReplayMessage:
+    """Stand-in for the LangChain AIMessage carried in `include_raw` responses."""
+
+    def __init__(self, usage: dict):
+        self.usage_metadata = {
+            **usage,
+            "total_tokens": usage["input_tokens"] + usage["output_tokens"],
+        }
+
+
+# --- Gmail service proxies (mirror the googleapiclient call chain) ---
+
+class _Request:
+    """Deferred request with an `execute()` like googleapiclient's HttpRequest."""
+
+    def __init__(self, fn: Callable[[], dict], inner=None,
+                 on_response: Optional[Callable[[dict], None]] = None):
+        self._fn = fn
+        self.inner = inner
+        self.on_response = on_response
+
+    def execute(self):
+        return self._fn()
+
+
+class _ReplayBatch:
+    """Replay of `new_batch_http_request()`: one round trip, per-item callbacks."""
+
+    def __init__(self, store: FixtureStore):
+        self._store = store
+        self._items = []
+
+    def add(self, request: _Request, callback):
+        self._items.append((request, callback))
+
+    def execute(self):
+        self._store.simulate("gmail", fail=False)
+        for request_id, (request, callback) in enumerate(self._items):
+            try:
+                response = request.execute()
+            except Exception as e:
+                callback(str(request_id), None, e)
+            else:
+                callback(str(request_id), response, None)
+
+
+class _ReplayGmailService:
+    """Offline Gmail service serving recorded responses."""
+
+    def __init__(self, store: FixtureStore):
+        self._store = store
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def list(self, **params):
+        def run():
+            self._store.simulate("gmail", fail=False)
+            return self._store.load("gmail_list", _key(params))
+        return _Request(run)
+
+    def get(self, userId: str, id: str, format: str = "full"):
+        def run():
+            # Latency is charged once per batch; faults are per message
+            self._store.maybe_fail("gmail", id)
+            if format == "minimal":
+                try:
+                    return self._store.load("gmail_labels", id)
+                except FixtureMissingError:
+                    pass  # A full response carries the labels too
+            return self._store.load("gmail_message", id)
+        return _Request(run)
+
+    def threads(self):
+        return self
+
+    def batchModify(self, userId: str, body: dict):
+        def run():
+            self._store.simulate("gmail", fail=False)
+            return {}
+        return _Request(run)
+
+    def modify(self, userId: str, id: str, body: dict):
+        # threads().modify: only sent inside batches, which carry the latency
+        return _Request(lambda: {})
+
+    def new_batch_http_request(self):
+        return _ReplayBatch(self._store)
+
+
+class _RecordingBatch:
+    """Wraps a real batch request, recording each successful response."""
+
+    def __init__(self, batch, store: FixtureStore):
+        self._batch = batch
+        self._store = store
+
+    def add(self, request: _Request, callback):
+        def recording_callback(request_id, response, exception):
+            if exception is None and request.on_response:
+                request.on_response(response)
+            callback(request_id, response, exception)
+
+        self._batch.add(request.inner, callback=recording_callback)
+
+    def execute(self):
+        return self._batch.execute()
+
+
+class _RecordingGmailService:
+    """Wraps the live Gmail service and records list/get responses."""
+
+    def __init__(self, service, store: FixtureStore):
+        self._service = service
+        self._store = store
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def _wrap(self, inner, on_response) -> _Request:
+        def run():
+            response = inner.execute()
+            on_response(response)
+            return response
+        return _Request(run, inner, on_response)
+
+    def list(self, **params):
+        inner = self._service.users().messages().list(**params)
+        return self._wrap(inner, lambda r: self._store.save("gmail_list", _key(params), r))
+
+    def get(self, userId: str, id: str, format: str = "full"):
+        inner = self._service.users().messages().get(userId=userId, id=id, format=format)
+        kind = "gmail_labels" if format == "minimal" else "gmail_message"
+        return self._wrap(inner, lambda r: self._store.save(kind, id, r))
+
+    def threads(self):
+        return self
+
+    def batchModify(self, userId: str, body: dict):
+        return self._service.users().messages().batchModify(userId=userId, body=body)
+
+    def modify(self, userId: str, id: str, body: dict):
+        inner = self._service.users().threads().modify(userId=userId, id=id, body=body)
+        return _Request(inner.execute, inner)
+
+    def new_batch_http_request(self):
+        return _RecordingBatch(self._service.new_batch_http_request(), self._store)
+
+
+def parse_latency_spec(spec: str) -> dict:
+    """Parse '--latency' values like '50' or 'gmail=120,llm=2500,trello=300'."""
+    latency = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "=" in part:
+            kind, ms = part.split("=", 1)
+            latency[kind.strip()] = float(ms)
+        else:
+            latency["default"] = float(part)
+    return latency
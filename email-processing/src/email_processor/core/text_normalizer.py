@@ -0,0 +1,129 @@
+"""Fast text normalization: high-information excerpts of email bodies.
+
+Strips quoted reply history, signatures, legal/marketing boilerplate and long
+tracking URLs, then collapses whitespace. Used for LLM prompt previews and for
+the `excerpt` stored alongside each email.
+"""
+
+import html
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from ..models.email import Email
+
+
+# Everything after one of these lines is quoted history
+_QUOTE_HEADER = re.compile(
+    r"^(?:On .{0,200}wrote:\s*$"
+    r"|-{2,}\s*Original Message\s*-{2,}"
+    r"|-{2,}\s*Forwarded message\s*-{2,}"
+    r"|_{10,}\s*$"
+    r"|From: .+\n(?:Sent|Date): )",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+# Everything after one of these lines is a signature
+_SIGNATURE = re.compile(
+    r"^(?:-- ?$"
+    r"|Sent from my (?:iPhone|iPad|Android|mobile)"
+    r"|Get Outlook for )",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+# Individual lines of boilerplate to drop
+_BOILERPLATE = re.compile(
+    r"unsubscribe|manage (?:your )?(?:email )?preferences|view (?:this email )?in (?:your )?browser"
+    r"|you are receiving this|you received this|privacy policy|all rights reserved"
+    r"|this (?:e-?mail|message)(?: and any attachments)? (?:is|are|may be) confidential"
+    r"|if you are not the intended recipient",
+    re.IGNORECASE,
+)
+
+_QUOTED_LINE = re.compile(r"^\s*>.*$", re.MULTILINE)
+# Not <name@host>: plain-text quote headers ("On ... Bob <b@x.com> wrote:") must stay on one line
+_HTML_TAG = re.compile(r"<(?:style|script)[^>]*>.*?</(?:style|script)>|<(?![^<>\s@]+@[^<>\s]+>)[^>]+>",
+                       re.IGNORECASE | re.DOTALL)
+_URL = re.compile(r"https?://([^/\s>)\]]+)[^\s>)\]]*")
+_WHITESPACE = re.compile(r"\s+")
+
+_MAX_SCAN_CHARS = 20000
+
+# Per-message excerpt cache (bounded LRU), shared by the event loop and the
+# storage writer thread
+_CACHE_SIZE = 4096
+_cache: "OrderedDict[tuple, str]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _shorten_url(match: re.Match) -> str:
+    """Replace long (usually tracking) URLs by their domain."""
+    url = match.group(0)
+    if len(url) <= 40:
+        return url
+    return f"<{match.group(1)}>"
+
+
+def normalize_text(text: str) -> str:
+    """Reduce an email body or snippet to its informative content on one line."""
+    if not text:
+        return ""
+
+    # The informative part is at the top; bound the work on huge HTML bodies
+    text = text[:_MAX_SCAN_CHARS]
+    if "<" in text and ">" in text and _HTML_TAG.search(text):
+        text = _HTML_TAG.sub("\n", text)
+    text = html.unescape(text)
+
+    # Cut quoted history at the first header with text above it. A header at
+    # the very top (a forward with no note) is dropped and its content kept
+    start = 0
+    for match in _QUOTE_HEADER.finditer(text):
+        if text[start:match.start()].strip():
+            text = text[start:match.start()]
+            break
+        start = match.end()
+    else:
+        text = text[start:]
+    match = _SIGNATURE.search(text)
+    if match:
+        text = text[:match.start()]
+
+    text = _QUOTED_LINE.sub("", text)
+    lines = [line for line in text.splitlines() if not _BOILERPLATE.search(line)]
+    text = _URL.sub(_shorten_url, "\n".join(lines))
+
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    """Truncate at a word boundary."""
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars].rsplit(" ", 1)[0]
+    return cut + "…"
+
+
+def excerpt(email: Email, max_chars: int = 300) -> str:
+    """
+    Normalized excerpt of an email (body preferred, snippet as fallback).
+
+    Cached per (message_id, max_chars), since the same message is excerpted for
+    the prompt, thread digests and storage.
+    """
+    key = (email.message_id, max_chars)
+    with _cache_lock:
+        cached: Optional[str] = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+
+    text = normalize_text(email.body or "") or normalize_text(email.snippet)
+    result = _truncate(text, max_chars)
+
+    with _cache_lock:
+        _cache[key] = result
+        if len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
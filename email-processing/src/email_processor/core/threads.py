@@ -0,0 +1,53 @@
+"""Group inbox messages by Gmail thread so each thread is triaged once."""
+
+from datetime import timezone
+from typing import Dict, List
+
+from ..models.email import Email, EmailThread
+from .text_normalizer import excerpt
+
+
+def _sort_key(email: Email):
+    """Chronological key tolerant of naive datetimes (fallback dates)."""
+    dt = email.date
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def _digest(thread: EmailThread, max_messages: int) -> str:
+    """Compact one-line-per-message summary of a thread's earlier messages."""
+    lines = []
+    shown = thread.earlier[-max_messages:]
+    if len(thread.earlier) > len(shown):
+        lines.append(f"({len(thread.earlier) - len(shown)} older messages omitted)")
+    for e in shown:
+        lines.append(f"{e.date.strftime('%m-%d %H:%M')} {e.from_addr}: {excerpt(e, 80)}")
+    return "\n".join(lines)
+
+
+def group_by_thread(emails: List[Email], digest_messages: int = 5) -> List[EmailThread]:
+    """
+    Group emails by thread_id, keeping first-seen (inbox) order.
+
+    The newest message of each thread becomes `latest`; it carries the thread
+    size and a digest of the earlier messages for the LLM prompt.
+    """
+    groups: Dict[str, List[Email]] = {}
+    for email in emails:
+        # Messages without a thread ID are their own thread
+        key = email.thread_id or email.message_id
+        groups.setdefault(key, []).append(email)
+
+    threads = []
+    for thread_id, members in groups.items():
+        members.sort(key=_sort_key)
+        thread = EmailThread(thread_id=thread_id, latest=members[-1], earlier=members[:-1])
+
+        thread.latest.thread_size = thread.size
+        if thread.earlier:
+            thread.latest.thread_digest = _digest(thread, digest_messages)
+
+        threads.append(thread)
+
+    return threads
@@ -1,12 +1,18 @@
 """Trello client with smart multi-board routing."""
 
-import subprocess
-import json
 import asyncio
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Tuple
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
 
 from ..models.email import Email
+from .http_pool import HTTPConnectionPool
+from .rate_limit import SlidingWindowRateLimiter
 from .secrets import resolve_secret
 
 
@@ -40,62 +46,166 @@ class TrelloRouter:
 class TrelloClient:
     """Trello client with multi-board routing."""
 
-    def __init__(self, trello_config: dict, default_board: str = "inbox"):
+    BATCH_MAX_URLS = 10
+
+    def __init__(self, trello_config: dict, default_board: str = "inbox",
+                 fixtures=None, cache_path: Optional[Path] = None, card_index=None):
         self.config = trello_config
         self.router = TrelloRouter(trello_config, default_board)
+        self.fixtures = fixtures
+        self.card_index = card_index
+
+        # Credentials are resolved on the first API call (a Secret Manager round
+        # trip), and are not needed at all when replaying recorded responses
+        self._credentials: Optional[Tuple[str, str]] = ("", "") if fixtures and fixtures.replaying else None
+        self._credentials_lock = threading.Lock()
+
+        # Persistent keep-alive connections to api.trello.com
+        pool_size = trello_config.get('pool_size', 4)
+        self._pool = HTTPConnectionPool(
+            "api.trello.com",
+            maxsize=pool_size,
+            timeout=trello_config.get('timeout_seconds', 15),
+            max_retries=trello_config.get('max_retries', 3),
+        )
+        self._pool_size = pool_size
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        # Trello allows 100 requests per 10 seconds per token
+        rate_limit = trello_config.get('rate_limit', {})
+        self._rate_limiter = SlidingWindowRateLimiter(
+            rate_limit.get('max_requests', 100),
+            rate_limit.get('period_seconds', 10),
+        )
 
-        # Get credentials
-        creds = trello_config.get('credentials', {})
-        self.api_key = resolve_secret(creds.get('api_key', 'gsm:trello-api-key'))
-        self.token = resolve_secret(creds.get('token', 'gsm:trello-token'))
-
-        # Cache board and list IDs
+        # Board/list IDs: loaded lazily on first card creation, persisted to disk.
+        # Not with fixtures: the /1/batch fetch must be recorded and replayed
+        # like any other call, whatever the state of the disk cache
+        self.cache_path = Path(cache_path) if cache_path and fixtures is None else None
+        self.cache_ttl_seconds = trello_config.get('cache_ttl_hours', 24) * 3600
         self._board_cache = {}
         self._list_cache = {}
-        self._initialize_cache()
+        self._cache_loaded = False
+        self._miss_refreshed = False
+        self._cache_lock = threading.Lock()
 
-    def _initialize_cache(self):
-        """Pre-fetch and cache board/list IDs."""
-        try:
-            # Fetch all boards
-            result = subprocess.run(
-                ["curl", "-s",
-                 f"https://api.trello.com/1/members/me/boards?key={self.api_key}&token={self.token}"],
-                capture_output=True, text=True, check=True
-            )
-            boards = json.loads(result.stdout)
+    # --- Board/list cache ---
 
-            # Map board names to IDs
-            board_name_to_id = {b['name'].lower(): b['id'] for b in boards}
+    def _cache_signature(self) -> str:
+        """Identifies the configured boards; a config change invalidates the disk cache."""
+        boards = {key: cfg.get('id') for key, cfg in self.router.boards.items()}
+        return hashlib.sha1(json.dumps(boards, sort_keys=True).encode()).hexdigest()[:12]
 
-            # Cache each configured board
-            for board_key, board_config in self.router.boards.items():
-                board_id = board_config.get('id')
-                if board_id == 'auto':
-                    # Look up by name
-                    board_id = board_name_to_id.get(board_key.lower())
+    def _ensure_cache(self, force_refresh: bool = False):
+        """
+        Load board/list IDs once: from disk if fresh, else one /1/batch round trip.
 
-                if not board_id:
+        force_refresh refetches after a lookup miss (a board or list added or
+        renamed since the cache was written); at most once per client, so a
+        list that really is missing doesn't cost a round trip per card.
+        """
+        with self._cache_lock:
+            if force_refresh:
+                if self._miss_refreshed:
+                    return
+                self._miss_refreshed = True
+            elif self._cache_loaded:
+                return
+
+            cached = None if force_refresh else self._read_disk_cache()
+            if cached and time.time() - cached['fetched_at'] < self.cache_ttl_seconds:
+                self._board_cache, self._list_cache = cached['boards'], cached['lists']
+                self._cache_loaded = True
+                return
+
+            try:
+                self._refresh_cache()
+                self._write_disk_cache()
+            except Exception as e:
+                if cached:
+                    print(f"⚠️  Warning: Trello cache refresh failed ({e}), using stale cache")
+                    self._board_cache, self._list_cache = cached['boards'], cached['lists']
+                else:
+                    print(f"⚠️  Warning: Failed to initialize Trello cache: {e}")
+
+            self._cache_loaded = True
+
+    def _list_name(self, board_key: str, priority: int) -> str:
+        """Configured list for a priority: 'urgent' for P0, else 'normal'."""
+        lists = self.router.boards[board_key]['lists']
+        return lists['urgent'] if priority == 0 else lists['normal']
+
+    def _list_key(self, board_key: str, priority: int) -> str:
+        return f"{board_key}:{self._list_name(board_key, priority).lower()}"
+
+    def _read_disk_cache(self) -> Optional[dict]:
+        if not self.cache_path or not self.cache_path.exists():
+            return None
+        try:
+            cached = json.loads(self.cache_path.read_text())
+        except (OSError, ValueError):
+            return None
+        if cached.get('signature') != self._cache_signature():
+            return None
+        return cached
+
+    def _write_disk_cache(self):
+        if not self.cache_path:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "signature": self._cache_signature(),
+            "fetched_at": time.time(),
+            "boards": self._board_cache,
+            "lists": self._list_cache,
+        }, indent=2))
+        tmp.replace(self.cache_path)
+
+    def _batch_get(self, urls: List[str]) -> List[Optional[object]]:
+        """GET several API paths via /1/batch (max 10 per request); None for failures."""
+        results = []
+        for i in range(0, len(urls), self.BATCH_MAX_URLS):
+            chunk = urls[i:i + self.BATCH_MAX_URLS]
+            responses = self._api("GET", "/batch", {"urls": ",".join(chunk)})
+            results.extend(r.get("200") if isinstance(r, dict) else None for r in responses)
+        return results
+
+    def _refresh_cache(self):
+        """Fetch the lists of every configured board in a single batch request."""
+        board_ids = {}
+        auto_boards = []
+        for board_key, board_config in self.router.boards.items():
+            board_id = board_config.get('id')
+            if board_id == 'auto':
+                auto_boards.append(board_key)
+            elif board_id:
+                board_ids[board_key] = board_id
+
+        # Boards configured as 'auto' are looked up by name (one extra call, only if used)
+        if auto_boards:
+            boards = self._api("GET", "/members/me/boards")
+            board_name_to_id = {b['name'].lower(): b['id'] for b in boards}
+            for board_key in auto_boards:
+                board_id = board_name_to_id.get(board_key.lower())
+                if board_id:
+                    board_ids[board_key] = board_id
+                else:
                     print(f"⚠️  Warning: Board '{board_key}' not found")
-                    continue
-
-                self._board_cache[board_key] = board_id
 
-                # Fetch lists for this board
-                result = subprocess.run(
-                    ["curl", "-s",
-                     f"https://api.trello.com/1/boards/{board_id}/lists?key={self.api_key}&token={self.token}"],
-                    capture_output=True, text=True, check=True
-                )
-                lists = json.loads(result.stdout)
+        keys = list(board_ids)
+        responses = self._batch_get([f"/boards/{board_ids[k]}/lists" for k in keys])
 
-                # Cache list IDs
-                for lst in lists:
-                    cache_key = f"{board_key}:{lst['name'].lower()}"
-                    self._list_cache[cache_key] = lst['id']
+        board_cache, list_cache = {}, {}
+        for board_key, lists in zip(keys, responses):
+            if lists is None:
+                print(f"⚠️  Warning: Could not fetch lists for board '{board_key}'")
+                continue
+            board_cache[board_key] = board_ids[board_key]
+            for lst in lists:
+                list_cache[f"{board_key}:{lst['name'].lower()}"] = lst['id']
 
-        except Exception as e:
-            print(f"⚠️  Warning: Failed to initialize Trello cache: {e}")
+        self._board_cache, self._list_cache = board_cache, list_cache
 
     async def create_card_from_email(self, email: Email, account: str,
                                     category: str, priority: int,
@@ -104,19 +214,37 @@ class TrelloClient:
         Create Trello card with smart routing.
 
         Returns: {
+            'id': card_id,
             'url': card_url,
             'board': board_name,
             'list': list_name,
             'confidence': routing_confidence,
             'reason': routing_reason
         }
+        If a card already exists for this message, thread or RFC 822 Message-ID
+        (see CardIndex), no API call is made and the existing card is returned
+        with 'duplicate': True.
         """
 
+        if self.card_index:
+            existing = self.card_index.lookup(email)
+            if existing:
+                print(f"   ↩️  Card already exists in {existing['board']}: {existing['url']}")
+                return {**existing, 'duplicate': True}
+
+        # Board/list IDs are only needed once a card is actually created
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._get_executor(), self._ensure_cache)
+
         # Route to correct board
         board_key, confidence, reason = self.router.route_email(
             email, account, category, priority, suggestion
         )
 
+        if not (self._board_cache.get(board_key)
+                and self._list_cache.get(self._list_key(board_key, priority))):
+            await loop.run_in_executor(self._get_executor(), self._ensure_cache, True)
+
         # Get board and list
         board_id = self._board_cache.get(board_key)
         if not board_id:
@@ -126,14 +254,8 @@ class TrelloClient:
             reason = f"Fallback to inbox (original board not found)"
 
         # Determine list based on priority
-        board_config = self.router.boards[board_key]
-        if priority == 0:
-            list_name = board_config['lists']['urgent']
-        else:
-            list_name = board_config['lists']['normal']
-
-        list_cache_key = f"{board_key}:{list_name.lower()}"
-        list_id = self._list_cache.get(list_cache_key)
+        list_name = self._list_name(board_key, priority)
+        list_id = self._list_cache.get(self._list_key(board_key, priority))
 
         if not list_id:
             raise Exception(f"List '{list_name}' not found in board '{board_key}'")
@@ -169,13 +291,33 @@ class TrelloClient:
         if confidence < 0.8:
             print(f"      ℹ️  Routing: {reason} (confidence: {confidence:.0%})")
 
-        return {
+        card_info = {
+            'id': card.get('id'),
             'url': card['shortUrl'],
             'board': board_key,
             'list': list_name,
             'confidence': confidence,
             'reason': reason
         }
+        if self.card_index:
+            self.card_index.record(email, card_info, account)
+
+        return card_info
+
+    async def create_cards(self, items: List[Tuple[Email, str, int, Optional[dict]]],
+                           account: str) -> List[Union[dict, Exception]]:
+        """
+        Create many cards concurrently.
+
+        `items` are (email, category, priority, suggestion) tuples. Concurrency
+        is bounded by the API executor and the per-token rate limiter. Returns
+        one result per item, in input order: the card info dict, or the
+        exception that item failed with.
+        """
+        return await asyncio.gather(*(
+            self.create_card_from_email(email, account, category, priority, suggestion)
+            for email, category, priority, suggestion in items
+        ), return_exceptions=True)
 
     def _format_card_description(self, email: Email, action: str, account: str,
                                 board: str, confidence: float, reason: str) -> str:
@@ -208,20 +350,63 @@ _Created: {datetime.now().strftime('%Y-%m-%d %I:%M %p')}_"""
 
     async def _create_card_api(self, list_id: str, name: str, desc: str, due: str) -> dict:
         """Create card via API."""
-        cmd = [
-            "curl", "-s", "-X", "POST",
-            f"https://api.trello.com/1/cards?key={self.api_key}&token={self.token}",
-            "-d", f"idList={list_id}",
-            "-d", f"name={name}",
-            "-d", f"desc={desc}",
-            "-d", f"due={due}",
-            "-d", "pos=top"
-        ]
-
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            None,
-            lambda: subprocess.run(cmd, capture_output=True, text=True, check=True)
+        params = {
+            "idList": list_id,
+            "name": name,
+            "desc": desc,
+            "due": due,
+            "pos": "top",
+        }
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(),
+            lambda: self._api("POST", "/cards", params)
         )
 
-        return json.loads(result.stdout)
+    def _api(self, method: str, path: str, params: Optional[dict] = None):
+        """Call the Trello REST API (served from fixtures in record/replay mode)."""
+        if self.fixtures:
+            return self.fixtures.trello_call(
+                method, path, params,
+                lambda: self._request(method, path, params)
+            )
+        return self._request(method, path, params)
+
+    def _get_credentials(self) -> Tuple[str, str]:
+        with self._credentials_lock:
+            if self._credentials is None:
+                creds = self.config.get('credentials', {})
+                self._credentials = (
+                    resolve_secret(creds.get('api_key', 'gsm:trello-api-key')),
+                    resolve_secret(creds.get('token', 'gsm:trello-token')),
+                )
+        return self._credentials
+
+    def _request(self, method: str, path: str, params: Optional[dict] = None):
+        """Perform one API request over the pooled connection."""
+        api_key, token = self._get_credentials()
+        query = {"key": api_key, "token": token}
+        if method == "GET" and params:
+            query.update(params)
+            params = None
+
+        self._rate_limiter.acquire()
+        return self._pool.request(method, f"/1{path}", query=query, form=params)
+
+    def traffic(self) -> dict:
+        """HTTP requests and bytes sent/received through the connection pool."""
+        return dict(self._pool.stats)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Worker threads for blocking API calls (recreated after close())."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._pool_size, thread_name_prefix="trello")
+        return self._executor
+
+    def close(self):
+        """Release pooled connections and the API executor."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self._pool.close()
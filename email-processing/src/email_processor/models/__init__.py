@@ -1,5 +1,5 @@
 """Data models for email processing."""
 
-from .email import Email, TriageDecision, ReviewItem
+from .email import Email, EmailThread, TriageDecision, ReviewItem
 
-__all__ = ['Email', 'TriageDecision', 'ReviewItem']
+__all__ = ['Email', 'EmailThread', 'TriageDecision', 'ReviewItem']
@@ -26,6 +26,31 @@ class Email:
     #   "size": 12345, "attachmentId": "ANGjdJ..."}]
 
     fetched_at: datetime = field(default_factory=datetime.now)
+    rfc822_id: Optional[str] = None  # Message-ID header, identical across accounts
+
+    # Set on the newest message of a multi-message thread (see EmailThread)
+    thread_size: int = 1
+    thread_digest: Optional[str] = None
+
+
+@dataclass
+class EmailThread:
+    """Inbox messages sharing a Gmail thread; triaged once via the newest message."""
+    thread_id: str
+    latest: Email
+    earlier: List[Email] = field(default_factory=list)  # oldest first
+
+    @property
+    def messages(self) -> List[Email]:
+        return self.earlier + [self.latest]
+
+    @property
+    def message_ids(self) -> List[str]:
+        return [e.message_id for e in self.messages]
+
+    @property
+    def size(self) -> int:
+        return len(self.earlier) + 1
 
 
 @dataclass
@@ -72,7 +97,8 @@ class ReviewItem:
         if len(self.email.subject) > 60:
             subject += "..."
 
-        return f"[{self.index}] {subject}\n    {from_name} · {date_str}"
+        thread = f" · {self.email.thread_size} msgs" if self.email.thread_size > 1 else ""
+        return f"[{self.index}] {subject}\n    {from_name} · {date_str}{thread}"
 
     def _extract_name(self, email_addr: str) -> str:
         """Extract sender name from email address."""
@@ -1,5 +1,22 @@
-"""Storage layer for email history and search."""
+"""Storage layer for email history and search.
 
-from .file_storage import FileStorage
+Exports are imported on first access, so `search` can read a storage
+database without loading the processing-side modules (outbox, asyncio...).
+"""
 
-__all__ = ['FileStorage']
+from .._lazy import lazy_exports
+
+_EXPORTS = {
+    'FileStorage': '.file_storage',
+    'SQLiteStorage': '.sqlite_storage',
+    'create_storage': '.backends',
+    'CardIndex': '.card_index',
+    'DecisionIndex': '.decision_index',
+    'ActionOutbox': '.outbox',
+    'ReviewQueue': '.review_queue',
+    'BlobStore': '.blob_store',
+    'Retention': '.retention',
+}
+
+__all__ = list(_EXPORTS)
+__getattr__ = lazy_exports(globals(), _EXPORTS)
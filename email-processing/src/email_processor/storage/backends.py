@@ -0,0 +1,31 @@
+"""Storage backend selection (storage.backend in config.json)."""
+
+from typing import Optional
+
+from .file_storage import FileStorage
+from .sqlite_storage import SQLiteStorage
+
+BACKENDS = ("files", "sqlite")
+
+
+def create_storage(storage_config: dict, base_path: str, account: str,
+                   timezone: str = "America/Los_Angeles",
+                   session_id: Optional[str] = None, session: bool = True) -> FileStorage:
+    """Build the configured backend: "files" (default) or "sqlite"."""
+    backend = storage_config.get("backend", "files")
+    write_behind = storage_config.get("write_behind", {})
+    options = dict(
+        timezone=timezone, session_id=session_id, session=session,
+        flush_seconds=write_behind.get("flush_seconds", 1.0),
+        max_pending=write_behind.get("max_pending", 10000),
+        blobs=storage_config.get("blobs", {}),
+    )
+    if backend == "files":
+        return FileStorage(base_path, account, **options)
+    if backend == "sqlite":
+        return SQLiteStorage(
+            base_path, account,
+            batch_size=storage_config.get("sqlite", {}).get("batch_size", 500),
+            **options,
+        )
+    raise ValueError(f"Unknown storage backend: {backend} (expected one of {', '.join(BACKENDS)})")
@@ -0,0 +1,222 @@
+"""Content-addressed store for email bodies.
+
+Each distinct body is stored once, named by the SHA-256 of its text, so the
+same newsletter or notification body received many times costs one file.
+email.json (or the SQLite row) keeps only a "body_blob" reference.
+
+Blobs are zstd-compressed when the optional `zstandard` package is installed,
+gzip otherwise. With zstd, a shared dictionary is trained on the first
+`dictionary_samples` bodies and used for every blob written afterwards;
+short, similar mails compress far better with it. A blob's frame records
+which dictionary it needs, so older blobs stay readable.
+
+Each `put` counts a reference (one per stored email) in refs.db, committed
+before the record pointing at the blob is written; `release` drops them and
+deletes blobs no email uses any more. Blobs without a count (stored before
+refs.db existed) are never deleted. Bulk writers (the storage migration)
+`store` content first and `add_refs` once their records are committed.
+
+Structure:
+  data/
+    <account>/
+      blobs/
+        <ab>/<sha256>.zst | .gz   # first two hex digits as subdirectory
+        dictionaries/<dict_id>.dict
+        refs.db                   # SQLite: sha256 → number of emails using it
+"""
+
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+# Bytes of each body kept as a dictionary training sample
+SAMPLE_BYTES = 16 * 1024
+
+
+class BlobStore:
+    """Deduplicated, compressed blobs keyed by content hash."""
+
+    def __init__(self, path: Path, compression: str = "zstd", level: int = 3,
+                 dictionary_samples: int = 500, dictionary_kb: int = 112):
+        self.path = Path(path)
+        self.dict_dir = self.path / "dictionaries"
+        self.use_zstd = compression == "zstd" and zstd is not None
+        self.level = level
+        self.dictionary_samples = dictionary_samples
+        self.dictionary_kb = dictionary_kb
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._dicts: Dict[int, "zstd.ZstdCompressionDict"] = {}
+        self._dict: Optional["zstd.ZstdCompressionDict"] = None
+        self._samples: Optional[List[bytes]] = [] if self.use_zstd and dictionary_samples else None
+        self._refs: Optional[sqlite3.Connection] = None
+        self._refs_lock = threading.Lock()
+        if self.use_zstd:
+            self._load_dictionary()
+
+    def _blob_path(self, ref: str, suffix: str) -> Path:
+        return self.path / ref[:2] / f"{ref}{suffix}"
+
+    # --- Dictionary ---
+
+    def _load_dictionary(self):
+        """Use the newest trained dictionary for writes, if there is one."""
+        paths = sorted(self.dict_dir.glob("*.dict"), key=lambda p: p.stat().st_mtime)
+        if paths:
+            self._dict = self._dictionary(int(paths[-1].stem))
+            self._samples = None
+
+    def _dictionary(self, dict_id: int) -> "zstd.ZstdCompressionDict":
+        if dict_id not in self._dicts:
+            data = (self.dict_dir / f"{dict_id}.dict").read_bytes()
+            self._dicts[dict_id] = zstd.ZstdCompressionDict(data)
+        return self._dicts[dict_id]
+
+    def _collect_sample(self, data: bytes):
+        """Keep a training sample; train the dictionary once there are enough."""
+        with self._lock:
+            if self._samples is None:
+                return
+            self._samples.append(data[:SAMPLE_BYTES])
+            if len(self._samples) < self.dictionary_samples:
+                return
+            samples, self._samples = self._samples, None
+            try:
+                trained = zstd.train_dictionary(self.dictionary_kb * 1024, samples)
+            except zstd.ZstdError:
+                return  # Too little material to train on; carry on without one
+            self.dict_dir.mkdir(parents=True, exist_ok=True)
+            _write_atomic(self.dict_dir / f"{trained.dict_id()}.dict", trained.as_bytes())
+            self._dicts[trained.dict_id()] = trained
+            self._dict = trained
+
+    # --- Compression ---
+
+    def _compress(self, data: bytes) -> bytes:
+        # Compressor objects are not thread-safe; keep one per thread and dictionary
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None or self._local.dict is not self._dict:
+            compressor = zstd.ZstdCompressor(level=self.level, dict_data=self._dict)
+            self._local.compressor, self._local.dict = compressor, self._dict
+        return compressor.compress(data)
+
+    def _decompress(self, data: bytes) -> bytes:
+        dict_id = zstd.get_frame_parameters(data).dict_id
+        if dict_id:
+            return zstd.ZstdDecompressor(dict_data=self._dictionary(dict_id)).decompress(data)
+        return zstd.ZstdDecompressor().decompress(data)
+
+    # --- Reference counts ---
+
+    def _refs_db(self) -> sqlite3.Connection:
+        if self._refs is None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path / "refs.db"), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS refs (ref TEXT PRIMARY KEY, count INTEGER NOT NULL)")
+            self._refs = conn
+        return self._refs
+
+    def add_refs(self, refs: Iterable[str]):
+        """Count one more reference per item, in one transaction."""
+        with self._refs_lock:
+            conn = self._refs_db()
+            conn.executemany(
+                "INSERT INTO refs (ref, count) VALUES (?, 1) ON CONFLICT(ref) DO UPDATE SET count = count + 1",
+                ((ref,) for ref in refs),
+            )
+            conn.commit()
+
+    def release(self, refs: Iterable[str]) -> int:
+        """Drop one reference per item; deletes blobs left unused. Returns how many were deleted."""
+        deleted = 0
+        with self._refs_lock:
+            conn = self._refs_db()
+            for ref in refs:
+                row = conn.execute("SELECT count FROM refs WHERE ref = ?", (ref,)).fetchone()
+                if row is None:
+                    continue  # Not counted: keep it
+                if row[0] > 1:
+                    conn.execute("UPDATE refs SET count = count - 1 WHERE ref = ?", (ref,))
+                    continue
+                conn.execute("DELETE FROM refs WHERE ref = ?", (ref,))
+                path = self.locate(ref)
+                if path is not None:
+                    path.unlink()
+                    deleted += 1
+            conn.commit()
+        return deleted
+
+    def close(self):
+        with self._refs_lock:
+            if self._refs is not None:
+                self._refs.close()
+                self._refs = None
+
+    # --- Blobs ---
+
+    def put(self, text: str) -> str:
+        """Store text (once per distinct content) and count a reference to it; returns the reference."""
+        data = text.encode("utf-8")
+        ref = hashlib.sha256(data).hexdigest()
+        self.add_refs([ref])
+        self._write_blob(ref, data)
+        return ref
+
+    def store(self, text: str) -> str:
+        """Store text without counting a reference (see `add_refs`); returns the reference."""
+        data = text.encode("utf-8")
+        ref = hashlib.sha256(data).hexdigest()
+        self._write_blob(ref, data)
+        return ref
+
+    def _write_blob(self, ref: str, data: bytes):
+        if self.exists(ref):
+            return
+
+        if self.use_zstd:
+            if self._samples is not None:
+                self._collect_sample(data)
+            path, blob = self._blob_path(ref, ".zst"), self._compress(data)
+        else:
+            path, blob = self._blob_path(ref, ".gz"), gzip.compress(data, compresslevel=6, mtime=0)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _write_atomic(path, blob)
+
+    def locate(self, ref: str) -> Optional[Path]:
+        """Path of a stored blob, or None."""
+        for suffix in (".zst", ".gz"):
+            path = self._blob_path(ref, suffix)
+            if path.exists():
+                return path
+        return None
+
+    def exists(self, ref: str) -> bool:
+        return self.locate(ref) is not None
+
+    def get(self, ref: str) -> str:
+        """Text of a blob; FileNotFoundError if it is missing."""
+        gz = self._blob_path(ref, ".gz")
+        if gz.exists():
+            return gzip.decompress(gz.read_bytes()).decode("utf-8")
+        data = self._blob_path(ref, ".zst").read_bytes()
+        if zstd is None:
+            raise RuntimeError("Blob is zstd-compressed; install the optional 'zstandard' package to read it")
+        return self._decompress(data).decode("utf-8")
+
+
+def _write_atomic(path: Path, data: bytes):
+    """Write via a temporary file, so a crash never leaves a partial blob."""
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
@@ -0,0 +1,109 @@
+"""Persistent index from email (message / thread / RFC 822 ID) to Trello card.
+
+Shared by all accounts, so an email cc'd to two accounts (different Gmail IDs,
+same RFC 822 Message-ID) maps to one card.
+
+Thread keys stop matching after `thread_days` (a thread that comes back after
+that long gets a new card), and whole entries are dropped after `keep_days`.
+Expired data is compacted out of the log when loading.
+
+Structure:
+  data/
+    trello-cards.jsonl   # append-only: one line per created card
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ..models.email import Email
+
+
+class CardIndex:
+    """Append-only JSONL log, held in memory as a key → card dict for O(1) lookups."""
+
+    def __init__(self, path: Path, thread_days: float = 30, keep_days: float = 365):
+        self.path = Path(path)
+        self.thread_age = timedelta(days=thread_days)
+        self.max_age = timedelta(days=keep_days)
+        self._cards: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        now = datetime.now()
+        keep_cutoff = (now - self.max_age).isoformat()
+        thread_cutoff = (now - self.thread_age).isoformat()
+        entries, stale = [], 0
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    stale += 1
+                    continue  # Torn final line from a crash
+                created = entry.get("created_at", "")
+                if created < keep_cutoff:
+                    stale += 1
+                    continue
+                if created < thread_cutoff and any(k.startswith("thread:") for k in entry.get("keys", [])):
+                    entry["keys"] = [k for k in entry["keys"] if not k.startswith("thread:")]
+                    stale += 1
+                entries.append(entry)
+                for key in entry.get("keys", []):
+                    self._cards[key] = entry
+
+        # Expired entries and thread keys are dead weight once they outnumber live ones
+        if stale > len(entries) + 100:
+            self._compact(entries)
+
+    def _compact(self, entries: List[dict]):
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+        os.replace(tmp, self.path)
+
+    @staticmethod
+    def _keys(email: Email) -> List[str]:
+        keys = [f"msg:{email.message_id}"]
+        if email.thread_id:
+            keys.append(f"thread:{email.thread_id}")
+        if email.rfc822_id:
+            keys.append(f"rfc822:{email.rfc822_id}")
+        return keys
+
+    def lookup(self, email: Email) -> Optional[dict]:
+        """Card previously created for this message, its thread, or the same email in another account."""
+        with self._lock:
+            for key in self._keys(email):
+                card = self._cards.get(key)
+                if card:
+                    return card
+        return None
+
+    def record(self, email: Email, card_info: dict, account: str):
+        """Remember the card created for `email`."""
+        entry = {
+            "keys": self._keys(email),
+            "id": card_info.get("id"),
+            "url": card_info.get("url"),
+            "board": card_info.get("board"),
+            "list": card_info.get("list"),
+            "account": account,
+            "message_id": email.message_id,
+            "thread_id": email.thread_id,
+            "created_at": datetime.now().isoformat(),
+        }
+
+        with self._lock:
+            for key in entry["keys"]:
+                self._cards[key] = entry
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
@@ -0,0 +1,126 @@
+"""Per-session checkpoints so an interrupted run can be resumed.
+
+Structure:
+  sessions/<session_id>/
+    checkpoint.jsonl   # append-only, one record per pipeline milestone:
+                       #   {"type": "listed",  "messages": [{"id", "threadId"}, ...]}
+                       #   {"type": "decided", "thread_id", "messages": [{"id", "threadId"}, ...], "decision": {...}}
+                       #   {"type": "acted",   "thread_ids": [...]}   (side effects are in outbox.jsonl)
+                       #   {"type": "stored",  "thread_ids": [...]}
+
+Resuming reuses the listed IDs (no re-listing), re-fetches decided threads by
+message ID without re-triaging them, and skips the actions and writes already
+recorded. Decisions are checkpointed without the emails themselves, so bodies
+are only ever stored once (in blobs/). Only thread IDs are kept in memory;
+decided threads are streamed back from the file.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Iterator, List, Optional, Set, Tuple
+
+from ..models.email import EmailThread, TriageDecision
+from .serialization import decision_from_dict, decision_to_dict
+
+
+class SessionCheckpoint:
+    """Append-only checkpoint log for one session."""
+
+    FILENAME = "checkpoint.jsonl"
+
+    def __init__(self, session_dir: Path):
+        self.path = Path(session_dir) / self.FILENAME
+        self.listed: Optional[List[dict]] = None
+        self.decided: Set[str] = set()
+        self.acted: Set[str] = set()
+        self.stored: Set[str] = set()
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Torn final line from a crash
+                kind = record.get("type")
+                if kind == "listed":
+                    self.listed = record["messages"]
+                elif kind == "decided":
+                    self.decided.add(record["thread_id"])
+                elif kind == "acted":
+                    self.acted.update(record["thread_ids"])
+                elif kind == "stored":
+                    self.stored.update(record["thread_ids"])
+
+    def _append(self, records: List[dict]):
+        with open(self.path, "a") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    # --- Recording ---
+
+    def record_listed(self, messages: List[dict]):
+        self.listed = [{"id": m["id"], "threadId": m.get("threadId")} for m in messages]
+        self._append([{"type": "listed", "messages": self.listed}])
+
+    def record_decided(self, pairs: List[Tuple[EmailThread, TriageDecision]]):
+        records = [
+            {
+                "type": "decided",
+                "thread_id": thread.thread_id,
+                "messages": [{"id": e.message_id, "threadId": thread.thread_id} for e in thread.messages],
+                "decision": decision_to_dict(decision),
+            }
+            for thread, decision in pairs
+            if thread.thread_id not in self.decided
+        ]
+        if records:
+            self._append(records)
+            self.decided.update(record["thread_id"] for record in records)
+
+    def record_acted(self, thread_ids: List[str]):
+        if thread_ids:
+            self._append([{"type": "acted", "thread_ids": thread_ids}])
+            self.acted.update(thread_ids)
+
+    def record_stored(self, thread_ids: List[str]):
+        if thread_ids:
+            self._append([{"type": "stored", "thread_ids": thread_ids}])
+            self.stored.update(thread_ids)
+
+    # --- Resuming ---
+
+    @staticmethod
+    def thread_key(message: dict) -> str:
+        """Thread key of a listed message (messages without a thread are their own)."""
+        return message.get("threadId") or message["id"]
+
+    def remaining(self) -> List[dict]:
+        """Listed messages whose thread has no decision yet."""
+        return [m for m in self.listed or [] if self.thread_key(m) not in self.decided]
+
+    def decided_threads(self) -> Iterator[Tuple[List[dict], TriageDecision]]:
+        """Stream decided threads as their messages ({"id", "threadId"}, oldest first) and decisions."""
+        if not self.decided:
+            return
+        seen = set()
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("type") != "decided" or record["thread_id"] in seen:
+                    continue
+                seen.add(record["thread_id"])
+                messages = record.get("messages") or [
+                    # Checkpoints written before decided records dropped the emails
+                    {"id": email["message_id"], "threadId": record["thread_id"]} for email in record["emails"]
+                ]
+                yield messages, decision_from_dict(record["decision"])
@@ -0,0 +1,107 @@
+"""Local index of decisions that left a message in the inbox.
+
+Messages queued for review stay in the inbox and would be fetched and
+re-triaged on every run. This index remembers, per message, the decision and
+the labels it had when decided, so a later run can skip messages that have not
+changed since.
+
+Structure:
+  data/
+    <account>/
+      index/
+        decisions.jsonl   # append-only: {"message_id", "thread_id", "labels", "decision", "session_id", "decided_at"}
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..models.email import EmailThread, TriageDecision
+from .serialization import decision_to_dict
+
+# Labels that change without the message changing (reading it, mostly)
+VOLATILE_LABELS = {"UNREAD"}
+
+
+def label_state(labels: Iterable[str]) -> List[str]:
+    """Labels that matter for reuse, in a comparable order."""
+    return sorted(set(labels or []) - VOLATILE_LABELS)
+
+
+class DecisionIndex:
+    """Append-only JSONL log, held in memory as message_id → latest entry."""
+
+    def __init__(self, path: Path, max_age_days: float = 7):
+        self.path = Path(path)
+        self.max_age = timedelta(days=max_age_days)
+        self._entries: Dict[str, dict] = {}
+        self._lines = 0
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        with open(self.path) as f:
+            for line in f:
+                self._lines += 1
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Torn final line from a crash
+                self._entries[entry["message_id"]] = entry
+
+        # Entries too old to be reused are dead weight
+        cutoff = (datetime.now() - self.max_age).isoformat()
+        self._entries = {k: e for k, e in self._entries.items() if e["decided_at"] >= cutoff}
+        if self._lines > 2 * len(self._entries) + 100:
+            self._compact()
+
+    def _compact(self):
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            for entry in self._entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp, self.path)
+        self._lines = len(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, message_id: str) -> Optional[dict]:
+        """Entry for a message decided within `max_age_days`, if any."""
+        entry = self._entries.get(message_id)
+        if entry and entry["decided_at"] >= (datetime.now() - self.max_age).isoformat():
+            return entry
+        return None
+
+    def record(self, pairs: List[Tuple[EmailThread, TriageDecision]], session_id: str):
+        """Remember the decision (and current labels) for every message of each thread."""
+        at = datetime.now().isoformat()
+        entries = [
+            {
+                "message_id": email.message_id,
+                "thread_id": thread.thread_id,
+                "labels": label_state(email.labels),
+                "decision": decision_to_dict(decision),
+                "session_id": session_id,
+                "decided_at": at,
+            }
+            for thread, decision in pairs
+            for email in thread.messages
+        ]
+        if not entries:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._lines += len(entries)
+        for entry in entries:
+            self._entries[entry["message_id"]] = entry
+
+    def unchanged(self, message_id: str, labels: Iterable[str]) -> bool:
+        """True if the message has a recent decision and the same labels as then."""
+        entry = self.get(message_id)
+        return entry is not None and entry["labels"] == label_state(labels)
@@ -0,0 +1,297 @@
+"""Latest-state email index: one current entry per message.
+
+Entries are appended to a JSONL log; a small SQLite table maps each
+message_id to the byte offset of its current line (plus its action and
+category, so stats are a GROUP BY). Upserts append and repoint the offset.
+Once the log is mostly superseded lines, a background thread rewrites it
+with only current entries.
+
+Each compaction writes a new log generation. The switch to it commits in the
+same transaction as the new offsets, so a crash leaves either the old or
+the new generation in use, never a mix.
+
+Structure:
+  data/
+    <account>/
+      index/
+        all-emails.<gen>.jsonl   # append log (all-emails.jsonl is migrated to generation 0)
+        all-emails.idx           # SQLite: message_id → offset, action, category
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    message_id TEXT PRIMARY KEY,
+    offset     INTEGER NOT NULL,
+    action     TEXT,
+    category   TEXT
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# Compact once superseded lines outnumber current ones (and there are enough to matter)
+COMPACT_MIN_LINES = 1000
+
+
+class EmailIndex:
+    """Upsertable index of the latest state per message."""
+
+    def __init__(self, index_dir: Path):
+        self.index_dir = Path(index_dir)
+        self.db_path = self.index_dir / "all-emails.idx"
+        self._lock = threading.Lock()
+        self._compactor: Optional[threading.Thread] = None
+        self._log = None
+
+        migrate = not self.db_path.exists()
+        self._conn = self._connect()
+        self.generation = self._meta("generation")
+        self.lines = self._meta("lines")
+        if migrate:
+            self._migrate(self.index_dir / "all-emails.jsonl")
+        self._remove_stale_logs()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def _meta(self, key: str, conn: Optional[sqlite3.Connection] = None) -> int:
+        row = (conn or self._conn).execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    @staticmethod
+    def _set_meta(conn: sqlite3.Connection, key: str, value: int):
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def log_path(self, generation: Optional[int] = None) -> Path:
+        gen = self.generation if generation is None else generation
+        return self.index_dir / f"all-emails.{gen}.jsonl"
+
+    def _migrate(self, legacy: Path):
+        """Adopt an old append-only all-emails.jsonl as generation 0 (latest line wins)."""
+        if not legacy.exists():
+            return
+        legacy.rename(self.log_path(0))
+        with open(self.log_path(0), "rb") as f:
+            offset = 0
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    offset += len(line)
+                    continue  # Torn final line from a crash
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (message_id, offset, action, category) VALUES (?, ?, ?, ?)",
+                    (entry["message_id"], offset, entry.get("last_action"), entry.get("last_category")),
+                )
+                offset += len(line)
+                self.lines += 1
+        self._set_meta(self._conn, "lines", self.lines)
+        self._conn.commit()
+
+    def _remove_stale_logs(self):
+        """Delete logs of other generations left behind by a crash mid-compaction."""
+        for path in self.index_dir.glob("all-emails.*.jsonl"):
+            if path != self.log_path():
+                path.unlink()
+
+    # --- Writing ---
+
+    def upsert(self, entries: List[dict]):
+        """Make these entries (keyed by "message_id") the current state."""
+        with self._lock:
+            if self._log is None:
+                self._log = open(self.log_path(), "ab")
+            for entry in entries:
+                offset = self._log.tell()
+                self._log.write((json.dumps(entry, ensure_ascii=False) + "\n").encode())
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (message_id, offset, action, category) VALUES (?, ?, ?, ?)",
+                    (entry["message_id"], offset, entry.get("last_action"), entry.get("last_category")),
+                )
+            self.lines += len(entries)
+
+    def remove(self, message_ids: List[str]):
+        """Drop messages from the current state (their lines go at the next compaction)."""
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM entries WHERE message_id = ?", ((message_id,) for message_id in message_ids)
+            )
+
+    def flush(self):
+        """Commit pending upserts and removals; start a background compaction if the log is mostly stale."""
+        with self._lock:
+            self._commit()
+            live = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        if self.lines > max(2 * live, COMPACT_MIN_LINES) and not self._compacting:
+            self._compactor = threading.Thread(target=self.compact, name="email-index-compact", daemon=True)
+            self._compactor.start()
+
+    def _commit(self):
+        """Flush the log, then commit offsets pointing into it. Caller holds the lock."""
+        if self._log is not None:
+            self._log.flush()
+        self._set_meta(self._conn, "lines", self.lines)
+        self._conn.commit()
+
+    @property
+    def _compacting(self) -> bool:
+        return self._compactor is not None and self._compactor.is_alive()
+
+    def close(self):
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+        with self._lock:
+            self._commit()
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+            self._conn.close()
+
+    # --- Compaction ---
+
+    def compact(self):
+        """
+        Rewrite the log with only current entries.
+
+        Runs without blocking upserts; the lock is held only to copy lines
+        appended meanwhile and to switch generations.
+        """
+        conn = self._connect()
+        try:
+            with self._lock:
+                self._commit()
+                old_path, new_path = self.log_path(), self.log_path(self.generation + 1)
+                snapshot = old_path.stat().st_size if old_path.exists() else 0
+
+            conn.execute("CREATE TEMP TABLE moves (message_id TEXT PRIMARY KEY, old INTEGER, new INTEGER)")
+            with open(old_path, "rb") as src, open(new_path, "wb") as dst:
+                kept = self._copy_current(conn, src, dst, 0, snapshot)
+
+                with self._lock:
+                    # Lines appended while copying (new transaction: see their offsets)
+                    self._commit()
+                    conn.commit()
+                    kept += self._copy_current(conn, src, dst, snapshot, old_path.stat().st_size)
+                    dst.flush()
+
+                    # Repoint only entries not superseded since they were copied
+                    conn.execute(
+                        "UPDATE entries SET offset = (SELECT new FROM moves WHERE moves.message_id = entries.message_id) "
+                        "WHERE EXISTS (SELECT 1 FROM moves WHERE moves.message_id = entries.message_id "
+                        "AND moves.old = entries.offset)"
+                    )
+                    self._set_meta(conn, "generation", self.generation + 1)
+                    self._set_meta(conn, "lines", kept)
+                    conn.commit()
+
+                    if self._log is not None:
+                        self._log.close()
+                        self._log = None
+                    self.generation += 1
+                    self.lines = kept
+            old_path.unlink()
+        finally:
+            conn.close()
+
+    def _copy_current(self, conn: sqlite3.Connection, src, dst, start: int, end: int) -> int:
+        """Copy lines in [start, end) that are still current; returns how many."""
+        src.seek(start)
+        offset, kept = start, 0
+        while offset < end:
+            line = src.readline()
+            if not line:
+                break
+            try:
+                message_id = json.loads(line)["message_id"]
+            except ValueError:
+                message_id = None
+            row = conn.execute("SELECT offset FROM entries WHERE message_id = ?", (message_id,)).fetchone()
+            if row and row[0] == offset:
+                conn.execute("INSERT OR REPLACE INTO moves VALUES (?, ?, ?)", (message_id, offset, dst.tell()))
+                dst.write(line)
+                kept += 1
+            offset += len(line)
+        return kept
+
+    # --- Reading ---
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def get(self, message_id: str) -> Optional[dict]:
+        """Current entry for a message."""
+        with self._lock:
+            row = self._conn.execute("SELECT offset FROM entries WHERE message_id = ?", (message_id,)).fetchone()
+            if not row:
+                return None
+            if self._log is not None:
+                self._log.flush()
+            with open(self.log_path(), "rb") as f:
+                f.seek(row[0])
+                return json.loads(f.readline())
+
+    def current(self) -> Iterator[dict]:
+        """All current entries, in log order."""
+        with self._lock:
+            if self._log is not None:
+                self._log.flush()
+            offsets = [row[0] for row in self._conn.execute("SELECT offset FROM entries ORDER BY offset")]
+            # An open handle keeps reading this generation even if a compaction replaces it
+            f = open(self.log_path(), "rb") if offsets else None
+        if f is None:
+            return
+        with f:
+            for offset in offsets:
+                f.seek(offset)
+                yield json.loads(f.readline())
+
+    def stats(self) -> dict:
+        """Current counts: {"emails", "by_action", "by_category"}."""
+        def grouped(column: str) -> Dict[str, int]:
+            return dict(self._conn.execute(
+                f"SELECT {column}, COUNT(*) FROM entries WHERE {column} IS NOT NULL GROUP BY {column}"
+            ).fetchall())
+
+        with self._lock:
+            return {"emails": len(self), "by_action": grouped("action"), "by_category": grouped("category")}
+
+
+def iter_current(index_dir: Path) -> Iterator[dict]:
+    """
+    Read-only scan of the current entries (for `search`, while another
+    process may be writing or compacting the index).
+    """
+    db_path = Path(index_dir) / "all-emails.idx"
+    for _ in range(3):
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, isolation_level=None)
+        try:
+            # One snapshot for the generation and its offsets
+            conn.execute("BEGIN")
+            row = conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+            offsets = [r[0] for r in conn.execute("SELECT offset FROM entries ORDER BY offset")]
+            try:
+                f = open(Path(index_dir) / f"all-emails.{row[0] if row else 0}.jsonl", "rb")
+            except FileNotFoundError:
+                if not offsets:
+                    return
+                continue  # Compacted (and the old log removed) meanwhile; retry
+        finally:
+            conn.close()
+        with f:
+            for offset in offsets:
+                f.seek(offset)
+                yield json.loads(f.readline())
+        return
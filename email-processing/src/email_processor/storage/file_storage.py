@@ -6,42 +6,77 @@ Structure:
       emails/
         <YYYY-MM-DD>/
           <message_id>/
-            email.json
+            email.json     # metadata; the body is in blobs/ (see blob_store.py)
             decisions/
               <session_id>.json
       sessions/
         <session_id>/
           session.json
+          checkpoint.jsonl
           processed.jsonl
           actions.jsonl
+          llm_calls.jsonl
+      blobs/
+        <ab>/<sha256>.zst  # deduplicated, compressed bodies
+      review/
+        queue.jsonl
+        actions.jsonl      # actions taken by the `review` command (no session)
       index/
-        all-emails.jsonl
-        by-sender.json
+        all-emails.<gen>.jsonl   # latest state per email (see email_index.py)
+        all-emails.idx
+        decisions.jsonl
+        by-sender.*        # dbm sender index (see sender_index.py)
         stats.json
+
+Writes are write-behind: they run on a background thread (see writer.py),
+and `flush()` waits for them.
+
+With session=False (the `review` command) no session is started: nothing
+is written under sessions/, and logged actions go to review/actions.jsonl.
 """
 
 import json
+import re
+import shutil
 from pathlib import Path
 from datetime import datetime
 from zoneinfo import ZoneInfo
-from typing import Optional
+from typing import List, Optional, Set
 
 from ..models.email import Email, TriageDecision
+from ..core.text_normalizer import excerpt
+from .blob_store import BlobStore
+from .email_index import EmailIndex
+from .sender_index import SenderIndex
+from .writer import StorageWriter
+
+_PARTITION = re.compile(r"\d{4}-\d{2}-\d{2}$")
 
 
 class FileStorage:
     """File-based storage for email history and sessions."""
 
-    def __init__(self, base_path: str, account: str, timezone: str = "America/Los_Angeles"):
+    def __init__(self, base_path: str, account: str, timezone: str = "America/Los_Angeles",
+                 session_id: Optional[str] = None, flush_seconds: float = 1.0,
+                 max_pending: int = 10000, blobs: Optional[dict] = None, session: bool = True):
         self.base = Path(base_path) / account
         self.tz = ZoneInfo(timezone)
         self.account = account
 
-        # Generate session ID
-        now = datetime.now(self.tz)
-        tz_abbr = now.strftime('%Z')  # PST or PDT
-        self.session_id = now.strftime(f'%Y-%m-%d_%H%M%S-{tz_abbr}')
-        self.session_started = now
+        if session_id:
+            # Reopen an existing (interrupted) session
+            if not (self.base / "sessions" / session_id).is_dir():
+                raise FileNotFoundError(f"Session not found: {session_id}")
+            self.session_id = session_id
+            self.session_started = datetime.strptime(
+                session_id.rsplit("-", 1)[0], '%Y-%m-%d_%H%M%S'
+            ).replace(tzinfo=self.tz)
+        else:
+            # Generate session ID
+            now = datetime.now(self.tz)
+            tz_abbr = now.strftime('%Z')  # PST or PDT
+            self.session_id = now.strftime(f'%Y-%m-%d_%H%M%S-{tz_abbr}')
+            self.session_started = now
 
         # Ensure directories exist
         self.emails_dir = self.base / "emails"
@@ -49,8 +84,24 @@ class FileStorage:
         self.index_dir = self.base / "index"
 
         self.emails_dir.mkdir(parents=True, exist_ok=True)
-        self.sessions_dir.mkdir(parents=True, exist_ok=True)
         self.index_dir.mkdir(parents=True, exist_ok=True)
+        if session:
+            self.sessions_dir.mkdir(parents=True, exist_ok=True)
+            self.actions_file = self.sessions_dir / "actions.jsonl"
+        else:
+            self.actions_file = self.base / "review" / "actions.jsonl"
+            self.actions_file.parent.mkdir(parents=True, exist_ok=True)
+        self.sender_index = SenderIndex(self.index_dir / "by-sender")
+        blobs = blobs or {}
+        self.blobs = BlobStore(
+            self.base / "blobs",
+            compression=blobs.get("compression", "zstd"),
+            level=blobs.get("level", 3),
+            dictionary_samples=blobs.get("dictionary_samples", 500),
+            dictionary_kb=blobs.get("dictionary_kb", 112),
+        )
+        self._email_index: Optional[EmailIndex] = None
+        self._writer = StorageWriter(flush_seconds=flush_seconds, max_pending=max_pending)
 
         # Session counters
         self._stats = {
@@ -69,38 +120,47 @@ class FileStorage:
         date_str = email.date.astimezone(self.tz).strftime('%Y-%m-%d')
         return self.emails_dir / date_str / email.message_id
 
+    def _email_record(self, email: Email) -> dict:
+        """Stored form of an email (email.json); stores the body as a blob."""
+        return {
+            "message_id": email.message_id,
+            "gmail_id": email.message_id,
+            "thread_id": email.thread_id,
+            "rfc822_id": email.rfc822_id,
+            "account": email.account,
+            "from": email.from_addr,
+            "to": email.to_addr,
+            "cc": email.cc_addr,
+            "subject": email.subject,
+            "date": email.date.isoformat(),
+            "snippet": email.snippet,
+            "excerpt": excerpt(email),
+            "body_blob": self.blobs.put(email.body) if email.body else None,
+            "attachments": email.attachments,
+            "labels": email.labels,
+            "first_seen": self.session_id,
+            "first_seen_at": datetime.now(self.tz).isoformat(),
+        }
+
     def save_email(self, email: Email):
         """Save email to canonical storage (one copy per email, ever)."""
+        self._writer.submit(self._write_email, email)
+
+    def _write_email(self, email: Email):
         email_dir = self._email_dir(email)
         email_dir.mkdir(parents=True, exist_ok=True)
 
         email_file = email_dir / "email.json"
 
         if not email_file.exists():
-            data = {
-                "message_id": email.message_id,
-                "gmail_id": email.message_id,
-                "thread_id": email.thread_id,
-                "account": email.account,
-                "from": email.from_addr,
-                "to": email.to_addr,
-                "cc": email.cc_addr,
-                "subject": email.subject,
-                "date": email.date.isoformat(),
-                "snippet": email.snippet,
-                "body": email.body,
-                "attachments": email.attachments,
-                "labels": email.labels,
-                "first_seen": self.session_id,
-                "first_seen_at": datetime.now(self.tz).isoformat(),
-            }
+            data = self._email_record(email)
             email_file.write_text(json.dumps(data, indent=2, ensure_ascii=False))
         else:
             # Backfill body/attachments if previously stored without them
             existing = json.loads(email_file.read_text())
             changed = False
-            if email.body and not existing.get("body"):
-                existing["body"] = email.body
+            if email.body and not (existing.get("body") or existing.get("body_blob")):
+                existing["body_blob"] = self.blobs.put(email.body)
                 changed = True
             if email.attachments and not existing.get("attachments"):
                 existing["attachments"] = email.attachments
@@ -110,17 +170,9 @@ class FileStorage:
 
     # --- Decision storage ---
 
-    def save_decision(self, decision: TriageDecision, email: Optional[Email] = None,
-                      trello_info: Optional[dict] = None):
-        """Save triage decision for an email in this session."""
-        if email:
-            email_dir = self._email_dir(email)
-        else:
-            email_dir = self.emails_dir / decision.message_id
-        decisions_dir = email_dir / "decisions"
-        decisions_dir.mkdir(parents=True, exist_ok=True)
-
-        data = {
+    def _decision_record(self, decision: TriageDecision, trello_info: Optional[dict] = None) -> dict:
+        """Stored form of a decision (decisions/<session_id>.json)."""
+        return {
             "session_id": self.session_id,
             "timestamp": datetime.now(self.tz).isoformat(),
             "action": decision.action,
@@ -136,19 +188,34 @@ class FileStorage:
             "executed": True,
         }
 
+    def save_decision(self, decision: TriageDecision, email: Optional[Email] = None,
+                      trello_info: Optional[dict] = None, track: bool = True):
+        """Save triage decision for an email in this session (`track` counts it in stats)."""
+        if email:
+            email_dir = self._email_dir(email)
+        else:
+            email_dir = self.emails_dir / decision.message_id
+        data = self._decision_record(decision, trello_info)
+        self._writer.submit(self._write_decision, email_dir / "decisions", data)
+
+        if track:
+            self.track_decision(decision)
+
+    def _write_decision(self, decisions_dir: Path, data: dict):
+        decisions_dir.mkdir(parents=True, exist_ok=True)
         decision_file = decisions_dir / f"{self.session_id}.json"
         decision_file.write_text(json.dumps(data, indent=2, ensure_ascii=False))
 
-        # Track stats
+    def track_decision(self, decision: TriageDecision):
+        """Count a decision in this session's stats (save_decision does this itself)."""
         self._stats["by_processor"][decision.processor] = self._stats["by_processor"].get(decision.processor, 0) + 1
         self._stats["by_category"][decision.category] = self._stats["by_category"].get(decision.category, 0) + 1
         self._stats["by_action"][decision.action] = self._stats["by_action"].get(decision.action, 0) + 1
 
     # --- Session logging ---
 
-    def log_processed(self, message_id: str, action: str, auto: bool,
-                      processor: str = "", trello_card_id: str = None):
-        """Append to processed.jsonl for this session."""
+    def _processed_record(self, message_id: str, action: str, auto: bool,
+                          processor: str = "", trello_card_id: str = None) -> dict:
         entry = {
             "timestamp": datetime.now(self.tz).isoformat(),
             "message_id": message_id,
@@ -158,30 +225,129 @@ class FileStorage:
         }
         if trello_card_id:
             entry["trello_card_id"] = trello_card_id
+        return entry
 
-        with open(self.sessions_dir / "processed.jsonl", "a") as f:
-            f.write(json.dumps(entry) + "\n")
+    def log_processed(self, message_id: str, action: str, auto: bool,
+                      processor: str = "", trello_card_id: str = None):
+        """Append to processed.jsonl for this session."""
+        entry = self._processed_record(message_id, action, auto, processor, trello_card_id)
+        self._writer.append(self.sessions_dir / "processed.jsonl", json.dumps(entry))
 
     def log_action(self, message_id: str, action: str, **kwargs):
-        """Append user action to actions.jsonl for this session."""
+        """Append user action to actions.jsonl for this session (review/ without one)."""
         entry = {
             "timestamp": datetime.now(self.tz).isoformat(),
             "message_id": message_id,
             "action": action,
             **kwargs,
         }
-
-        with open(self.sessions_dir / "actions.jsonl", "a") as f:
-            f.write(json.dumps(entry) + "\n")
+        self._writer.append(self.actions_file, json.dumps(entry))
+
+    # --- Retention (see retention.py) ---
+
+    def _expired_partitions(self, cutoff: str) -> List[Path]:
+        """emails/<YYYY-MM-DD> directories dated before `cutoff`."""
+        return [
+            path for path in sorted(self.emails_dir.iterdir())
+            if _PARTITION.match(path.name) and path.name < cutoff and path.is_dir()
+        ]
+
+    def _seen_since(self, message_ids: List[str], cutoff: str) -> Set[str]:
+        """Those of `message_ids` whose latest triage session is on or after `cutoff`."""
+        if not message_ids or (self._email_index is None and not (self.index_dir / "all-emails.idx").exists()):
+            return set()
+        seen = set()
+        for message_id in message_ids:
+            entry = self.email_index.get(message_id)
+            if entry and (entry.get("last_session") or "") >= cutoff:
+                seen.add(message_id)
+        return seen
+
+    def expired_emails(self, cutoff: str) -> List[dict]:
+        """
+        Stored records of emails dated before `cutoff` (YYYY-MM-DD) and not
+        triaged since; each has its directory (relative to the account) as "_path".
+
+        An old message still in the inbox is re-triaged every run, so it is kept
+        until it has gone unseen for the whole window.
+        """
+        self.flush()
+        records = []
+        for partition in self._expired_partitions(cutoff):
+            for email_dir in partition.iterdir():
+                email_file = email_dir / "email.json"
+                record = json.loads(email_file.read_text()) if email_file.exists() else {"message_id": email_dir.name}
+                record["_path"] = str(email_dir.relative_to(self.base))
+                records.append(record)
+        seen = self._seen_since([record["message_id"] for record in records], cutoff)
+        return [record for record in records if record["message_id"] not in seen]
+
+    def archive_expired(self, tar, records: List[dict], session_ids: List[str]):
+        """Add expired email directories and sessions to an open tarfile."""
+        for record in records:
+            if "_path" in record:
+                tar.add(self.base / record["_path"], arcname=record["_path"])
+        for session_id in session_ids:
+            tar.add(self.base / "sessions" / session_id, arcname=f"sessions/{session_id}")
+
+    def delete_expired(self, records: List[dict], session_ids: List[str]):
+        """Drop expired emails from the indexes, then delete their directories and the sessions."""
+        message_ids = [record["message_id"] for record in records]
+        if message_ids:
+            if self._email_index is not None or (self.index_dir / "all-emails.idx").exists():
+                self._writer.submit(self.email_index.remove, message_ids)
+            self._writer.submit(self.sender_index.remove, message_ids)
+        self.flush()
+        partitions = set()
+        for record in records:
+            if "_path" in record:
+                email_dir = self.base / record["_path"]
+                shutil.rmtree(email_dir, ignore_errors=True)
+                partitions.add(email_dir.parent)
+        for partition in partitions:
+            if not any(partition.iterdir()):
+                partition.rmdir()  # Unless it still holds emails seen within the window
+        for session_id in session_ids:
+            shutil.rmtree(self.base / "sessions" / session_id)
+
+    # --- Backend lifecycle ---
+
+    def flush(self):
+        """Block until every write queued so far is on disk (and the index committed)."""
+        if self._email_index is not None:
+            self._writer.submit(self._email_index.flush)
+        self._writer.flush()
+
+    def close(self):
+        """Finish queued writes and release backend resources (waits for a running index compaction)."""
+        try:
+            self._writer.close()
+        finally:
+            if self._email_index is not None:
+                self._email_index.close()
+                self._email_index = None
+            self.sender_index.close()
+            self.blobs.close()
 
     # --- Session completion ---
 
+    @property
+    def is_complete(self) -> bool:
+        """True once complete_session has written session.json."""
+        return (self.sessions_dir / "session.json").exists()
+
     def complete_session(self, total_processed: int, auto_archived: int,
-                         auto_trello: int, reviewed: int):
-        """Write session.json with final stats."""
+                         auto_trello: int, reviewed: int, queued: int = 0, skipped: int = 0,
+                         llm_usage: Optional[dict] = None,
+                         profile: Optional[dict] = None):
+        """Write session.json with final stats (after every queued write)."""
+        self.flush()
         self._stats["auto_archived"] = auto_archived
         self._stats["auto_trello"] = auto_trello
         self._stats["reviewed"] = reviewed
+        self._stats["queued_for_review"] = queued
+        if skipped:
+            self._stats["skipped_unchanged"] = skipped
 
         data = {
             "session_id": self.session_id,
@@ -192,76 +358,88 @@ class FileStorage:
             "total_processed": total_processed,
             "stats": self._stats,
         }
+        if llm_usage:
+            data["llm_usage"] = llm_usage
+        if profile:
+            data["profile"] = profile
 
         session_file = self.sessions_dir / "session.json"
         session_file.write_text(json.dumps(data, indent=2, ensure_ascii=False))
 
+    def record_reviewed(self, reviewed: int):
+        """Add emails handled in an interactive review to the completed session's stats."""
+        session_file = self.sessions_dir / "session.json"
+        if not reviewed or not session_file.exists():
+            return
+        data = json.loads(session_file.read_text())
+        data["stats"]["reviewed"] = data["stats"].get("reviewed", 0) + reviewed
+        session_file.write_text(json.dumps(data, indent=2, ensure_ascii=False))
+
     # --- Index management ---
 
-    def update_index(self, email: Email, decision: TriageDecision):
-        """Append to global index."""
-        # all-emails.jsonl (append)
-        entry = {
+    def _index_record(self, email: Email, decision: TriageDecision) -> dict:
+        """Latest-state index entry for an email."""
+        return {
             "message_id": email.message_id,
             "from": email.from_addr,
             "subject": email.subject,
             "date": email.date.isoformat(),
+            "excerpt": excerpt(email),
+            "path": str(self._email_dir(email).relative_to(self.base)),
             "last_action": decision.action,
             "last_category": decision.category,
+            "last_reason": decision.reason,
             "last_session": self.session_id,
             "last_updated": datetime.now(self.tz).isoformat(),
         }
 
-        with open(self.index_dir / "all-emails.jsonl", "a") as f:
-            f.write(json.dumps(entry) + "\n")
+    @property
+    def email_index(self) -> EmailIndex:
+        """Latest-state index, opened on first use."""
+        if self._email_index is None:
+            self._email_index = EmailIndex(self.index_dir)
+        return self._email_index
 
-    def update_sender_index(self, emails: list):
-        """Update by-sender.json with batch of emails."""
-        sender_file = self.index_dir / "by-sender.json"
-
-        # Load existing
-        if sender_file.exists():
-            existing = json.loads(sender_file.read_text())
-        else:
-            existing = {}
+    def update_index(self, email: Email, decision: TriageDecision):
+        """Upsert the email's latest-state index entry."""
+        self._writer.submit(self.email_index.upsert, [self._index_record(email, decision)])
 
-        # Update
-        for email in emails:
-            sender = email.from_addr.lower()
-            if sender not in existing:
-                existing[sender] = {"message_ids": [], "count": 0, "last_seen": ""}
-            if email.message_id not in existing[sender]["message_ids"]:
-                existing[sender]["message_ids"].append(email.message_id)
-                existing[sender]["count"] = len(existing[sender]["message_ids"])
-            existing[sender]["last_seen"] = email.date.isoformat()
+    def index_stats(self) -> dict:
+        """Current state over all stored emails: {"emails", "by_action", "by_category"}."""
+        self.flush()
+        return self.email_index.stats()
 
-        sender_file.write_text(json.dumps(existing, indent=2, ensure_ascii=False))
+    def update_sender_index(self, emails: list):
+        """Add a batch of emails to the sender index (cost grows with the batch only)."""
+        self._writer.submit(self.sender_index.update, list(emails))
 
     def update_stats(self, total_processed: int):
-        """Update global stats.json."""
+        """
+        Update global stats.json.
+
+        total_emails and by_action / by_category describe the current state
+        (each email once, with its latest decision), read from the index;
+        total_processed counts every email processed across sessions.
+        """
         stats_file = self.index_dir / "stats.json"
 
         # Load existing
         if stats_file.exists():
             stats = json.loads(stats_file.read_text())
         else:
-            stats = {
-                "total_emails": 0,
-                "total_sessions": 0,
-                "by_action": {},
-                "by_category": {},
-            }
+            stats = {"total_sessions": 0}
+        # Before the latest-state index, total_emails was this running count
+        stats.setdefault("total_processed", stats.get("total_emails", 0))
 
         # Update
-        stats["total_emails"] += total_processed
+        current = self.index_stats()
+        stats["total_emails"] = current["emails"]
+        stats["total_processed"] += total_processed
         stats["total_sessions"] += 1
         stats["last_session"] = self.session_id
         stats["last_updated"] = datetime.now(self.tz).isoformat()
         stats["timezone"] = str(self.tz)
-
-        for action, count in self._stats["by_action"].items():
-            stats["by_action"][action] = stats["by_action"].get(action, 0) + count
-        for category, count in self._stats["by_category"].items():
-            stats["by_category"][category] = stats["by_category"].get(category, 0) + count
+        stats["by_action"] = current["by_action"]
+        stats["by_category"] = current["by_category"]
 
         stats_file.write_text(json.dumps(stats, indent=2, ensure_ascii=False))
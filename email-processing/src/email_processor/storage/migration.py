@@ -0,0 +1,320 @@
+"""Migration of the legacy emails/<date>/<message_id>/ tree (`migrate-storage`).
+
+Targets:
+  sqlite  copy emails, decisions and the latest state into storage.db
+  files   stay in place, moving inline bodies out of email.json into blobs/
+
+Date partitions are read and validated by a thread pool (bodies are
+compressed and written to blobs/ there too), while the main thread writes
+the results in partition order, committing every `batch_size` emails. The
+partitions done are recorded with each commit (in storage.db for sqlite, in
+index/migrate-files.json for files), so an interrupted migration restarts
+after the last commit. For sqlite the source tree is left as it is.
+
+Blob references are counted on the main thread as part of each commit, and
+only for records that commit actually adds (rows not already in storage.db;
+email.json files whose inline body it moves out). Workers look up which rows
+storage.db already has before storing any body, so those leave no blob behind. They are committed just
+before the records, so a crash in between can only leave a blob counted
+once too often, which keeps it rather than deleting it early.
+
+Records that fail validation are skipped and listed in
+index/migrate-errors.jsonl.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, Optional, Set, Tuple
+
+from .blob_store import BlobStore
+from .sqlite_storage import DB_FILENAME, connect
+
+TARGETS = ("sqlite", "files")
+
+_PARTITION = re.compile(r"\d{4}-\d{2}-\d{2}$")
+
+# (email.json record, its decisions, blob of the inline body it moved out or None)
+Loaded = Tuple[dict, List[dict], Optional[str]]
+
+# email.json rewritten by a worker waits here until its batch commits
+_REWRITE_SUFFIX = ".migrating"
+
+
+def _validate(record: dict, dir_name: str) -> Optional[str]:
+    """Why a stored email record is unusable, or None."""
+    if not isinstance(record, dict):
+        return "email.json is not an object"
+    if record.get("message_id") != dir_name:
+        return f"message_id {record.get('message_id')!r} does not match its directory"
+    try:
+        datetime.fromisoformat(record["date"])
+    except (KeyError, TypeError, ValueError):
+        return f"invalid date {record.get('date')!r}"
+    return None
+
+
+def _write_json_atomic(path: Path, data: dict):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False))
+    os.replace(tmp, path)
+
+
+def _rewrite_path(email_file: Path) -> Path:
+    return email_file.with_name(email_file.name + _REWRITE_SUFFIX)
+
+
+def _stored_ids(conn: sqlite3.Connection, ids: List[str]) -> Set[str]:
+    """Those of `ids` already in the emails table."""
+    stored = set()
+    for i in range(0, len(ids), 500):
+        chunk = ids[i:i + 500]
+        stored.update(row[0] for row in conn.execute(
+            f"SELECT message_id FROM emails WHERE message_id IN ({','.join('?' * len(chunk))})", chunk))
+    return stored
+
+
+class _SQLiteTarget:
+    """Writes into the account's storage.db; progress is a table in the same database."""
+
+    def __init__(self, base: Path, blobs: BlobStore):
+        self.conn = connect(base / DB_FILENAME)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS migrated (partition TEXT PRIMARY KEY, emails INTEGER)")
+        self.conn.commit()
+        self.blobs = blobs
+        self._refs: List[str] = []
+
+    def done(self) -> Set[str]:
+        return {row[0] for row in self.conn.execute("SELECT partition FROM migrated")}
+
+    def write(self, partition: str, loaded: List[Loaded]):
+        emails, decisions, index = [], [], []
+        # OR IGNORE below: rows stored by the sqlite backend itself are newer.
+        # Workers stored no body for those, so every ref belongs to an inserted row
+        for record, record_decisions, ref in loaded:
+            message_id = record["message_id"]
+            if ref:
+                self._refs.append(ref)
+            emails.append((message_id, record.get("thread_id"), record["date"], partition,
+                           (record.get("from") or "").lower(), json.dumps(record, ensure_ascii=False)))
+            for decision in record_decisions:
+                decisions.append((message_id, decision["session_id"], decision.get("action"),
+                                  decision.get("category"), json.dumps(decision, ensure_ascii=False)))
+            if record_decisions:
+                latest = max(record_decisions, key=lambda d: d["session_id"])
+                entry = {
+                    "message_id": message_id,
+                    "from": record.get("from"),
+                    "subject": record.get("subject"),
+                    "date": record["date"],
+                    "excerpt": record.get("excerpt"),
+                    "path": f"emails/{partition}/{message_id}",
+                    "last_action": latest.get("action"),
+                    "last_category": latest.get("category"),
+                    "last_reason": latest.get("reason"),
+                    "last_session": latest["session_id"],
+                    "last_updated": latest.get("timestamp"),
+                }
+                index.append((message_id, entry["last_action"], entry["last_category"],
+                              entry["last_session"], json.dumps(entry, ensure_ascii=False)))
+
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO emails (message_id, thread_id, date, partition, from_addr, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            emails,
+        )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO decisions (message_id, session_id, action, category, data) "
+            "VALUES (?, ?, ?, ?, ?)",
+            decisions,
+        )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO email_index (message_id, last_action, last_category, last_session, data) "
+            "VALUES (?, ?, ?, ?, ?)",
+            index,
+        )
+        self.conn.execute("INSERT OR REPLACE INTO migrated VALUES (?, ?)", (partition, len(loaded)))
+
+    def commit(self):
+        self.blobs.add_refs(self._refs)
+        self._refs = []
+        self.conn.commit()
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+
+class _FilesTarget:
+    """Workers write the new email.json beside the old one; a commit swaps them in."""
+
+    def __init__(self, base: Path, blobs: BlobStore):
+        self.base = base
+        self.path = base / "index" / "migrate-files.json"
+        self._done = set(json.loads(self.path.read_text())["partitions"]) if self.path.exists() else set()
+        self.blobs = blobs
+        self._refs: List[str] = []
+        self._rewrites: List[Path] = []
+
+    def done(self) -> Set[str]:
+        return set(self._done)
+
+    def write(self, partition: str, loaded: List[Loaded]):
+        for record, _, ref in loaded:
+            if ref:
+                self._refs.append(ref)
+                self._rewrites.append(self.base / "emails" / partition / record["message_id"] / "email.json")
+        self._done.add(partition)
+
+    def commit(self):
+        # References first: a crash before the swap leaves the inline body in
+        # place, to be moved (and counted) again on restart
+        self.blobs.add_refs(self._refs)
+        for email_file in self._rewrites:
+            os.replace(_rewrite_path(email_file), email_file)
+        self._refs, self._rewrites = [], []
+        _write_json_atomic(self.path, {"partitions": sorted(self._done)})
+
+    def close(self):
+        self.commit()
+
+
+class StorageMigration:
+    """Moves one account's legacy email tree into a target storage format."""
+
+    def __init__(self, base: Path, target: str, blobs: BlobStore,
+                 workers: int = 8, batch_size: int = 5000):
+        if target not in TARGETS:
+            raise ValueError(f"Unknown migration target: {target} (expected one of {', '.join(TARGETS)})")
+        self.base = Path(base)
+        self.target = target
+        self.blobs = blobs
+        self.workers = workers
+        self.batch_size = batch_size
+        self.errors_file = self.base / "index" / "migrate-errors.jsonl"
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+
+    # --- Worker side ---
+
+    def _already_stored(self, partition: Path) -> Set[str]:
+        """Message IDs of the partition already in storage.db (sqlite target only)."""
+        if self.target != "sqlite":
+            return set()
+        if not hasattr(self._local, "conn"):
+            # Read-only, one per worker; the main thread holds the writing connection
+            self._local.conn = sqlite3.connect(f"file:{self.base / DB_FILENAME}?mode=ro",
+                                               uri=True, check_same_thread=False)
+            self._readers.append(self._local.conn)
+        return _stored_ids(self._local.conn, [path.name for path in partition.iterdir()])
+
+    def _load_email(self, email_dir: Path, stored: bool = False) -> Loaded:
+        email_file = email_dir / "email.json"
+        record = json.loads(email_file.read_text())
+        problem = _validate(record, email_dir.name)
+        if problem:
+            raise ValueError(problem)
+
+        # Legacy records keep the body inline; its reference is counted at commit.
+        # Rows already in storage.db are not inserted, so their body is not stored
+        body = record.pop("body", None)
+        ref = None
+        if body and not stored:
+            ref = record["body_blob"] = self.blobs.store(body)
+            if self.target == "files":
+                _rewrite_path(email_file).write_text(json.dumps(record, indent=2, ensure_ascii=False))
+
+        decisions = []
+        if self.target == "sqlite" and (email_dir / "decisions").is_dir():
+            for decision_file in sorted((email_dir / "decisions").glob("*.json")):
+                decision = json.loads(decision_file.read_text())
+                if not isinstance(decision, dict):
+                    raise ValueError(f"{decision_file.name} is not an object")
+                decision.setdefault("session_id", decision_file.stem)
+                decisions.append(decision)
+        return record, decisions, ref
+
+    def _load_partition(self, partition: Path) -> Tuple[List[Loaded], List[dict]]:
+        """Read, validate and convert every email of a date partition."""
+        loaded, errors = [], []
+        stored = self._already_stored(partition)
+        for email_dir in sorted(partition.iterdir()):
+            if not (email_dir / "email.json").exists():
+                continue  # Decisions without a stored email
+            try:
+                loaded.append(self._load_email(email_dir, email_dir.name in stored))
+            except (OSError, ValueError) as e:
+                errors.append({"path": str(email_dir.relative_to(self.base)), "error": str(e)})
+        return loaded, errors
+
+    def _load_all(self, pool: ThreadPoolExecutor, partitions: List[Path]) -> Iterator[Tuple[Path, list, list]]:
+        """Partition results in order, with a bounded number in flight."""
+        pending = iter(partitions)
+        in_flight = deque()
+        for partition in pending:
+            in_flight.append((partition, pool.submit(self._load_partition, partition)))
+            if len(in_flight) >= self.workers * 2:
+                break
+        while in_flight:
+            partition, future = in_flight.popleft()
+            loaded, errors = future.result()
+            next_partition = next(pending, None)
+            if next_partition is not None:
+                in_flight.append((next_partition, pool.submit(self._load_partition, next_partition)))
+            yield partition, loaded, errors
+
+    # --- Main thread ---
+
+    def run(self) -> dict:
+        """Migrate every partition not done yet; returns counts and throughput."""
+        emails_dir = self.base / "emails"
+        partitions = sorted(
+            path for path in (emails_dir.iterdir() if emails_dir.exists() else [])
+            if _PARTITION.match(path.name) and path.is_dir()
+        )
+        (self.base / "index").mkdir(exist_ok=True)
+        target = (_SQLiteTarget if self.target == "sqlite" else _FilesTarget)(self.base, self.blobs)
+        done = target.done()
+        todo = [path for path in partitions if path.name not in done]
+        print(f"   {len(partitions)} date partitions, {len(partitions) - len(todo)} already migrated")
+
+        stats = {"partitions": 0, "emails": 0, "decisions": 0, "invalid": 0}
+        started = last_report = time.monotonic()
+        uncommitted = 0
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="migrate") as pool:
+                for partition, loaded, errors in self._load_all(pool, todo):
+                    if errors:
+                        stats["invalid"] += len(errors)
+                        with open(self.errors_file, "a") as f:
+                            f.writelines(json.dumps(error) + "\n" for error in errors)
+                    target.write(partition.name, loaded)
+                    stats["partitions"] += 1
+                    stats["emails"] += len(loaded)
+                    stats["decisions"] += sum(len(decisions) for _, decisions, _ in loaded)
+
+                    uncommitted += len(loaded)
+                    if uncommitted >= self.batch_size:
+                        target.commit()
+                        uncommitted = 0
+                    if time.monotonic() - last_report >= 2:
+                        last_report = time.monotonic()
+                        rate = stats["emails"] / (last_report - started)
+                        print(f"   ✅ {stats['emails']:,} emails · {stats['partitions']}/{len(todo)} partitions"
+                              f" · {rate:,.0f} emails/s")
+        finally:
+            for conn in self._readers:
+                conn.close()
+            target.close()
+            self.blobs.close()
+
+        stats["seconds"] = round(time.monotonic() - started, 2)
+        stats["emails_per_second"] = round(stats["emails"] / stats["seconds"], 1) if stats["seconds"] else 0.0
+        return stats
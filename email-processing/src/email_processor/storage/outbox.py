@@ -0,0 +1,165 @@
+"""Write-ahead outbox for Gmail/Trello side effects.
+
+Every intended side effect is appended (and fsynced) to the session's
+outbox.jsonl *before* it is executed, and marked done afterwards. A crashed run
+leaves pending operations behind, which the next run drains before doing
+anything else. Handlers must be idempotent: archiving is naturally, and card
+creation is deduplicated by CardIndex.
+
+Structure:
+  sessions/<session_id>/
+    outbox.jsonl        # {"op": id, "kind": ..., "payload": ...} then {"op": id, "status": ...}
+    outbox.done.jsonl   # moved here once every operation has completed
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+
+# A handler executes all pending ops of one kind and returns one result per op:
+# anything but an Exception marks the op done.
+Handler = Callable[[List[dict]], Awaitable[List[Union[object, Exception]]]]
+
+
+class ActionOutbox:
+    """Durable, append-only queue of side effects for one session."""
+
+    FILENAME = "outbox.jsonl"
+    DONE_FILENAME = "outbox.done.jsonl"
+    MAX_ATTEMPTS = 5
+    FINISHED = ("done", "abandoned")
+
+    def __init__(self, session_dir: Path):
+        self.session_dir = Path(session_dir)
+        self.path = self.session_dir / self.FILENAME
+        self._ops: Dict[str, dict] = {}
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Torn final line from a crash
+                if "kind" in entry:
+                    self._ops[entry["op"]] = {**entry, "status": "pending", "attempts": 0}
+                elif entry["op"] in self._ops:
+                    op = self._ops[entry["op"]]
+                    op["status"] = entry["status"]
+                    op["attempts"] += entry["status"] == "failed"
+                    if op["status"] in self.FINISHED:
+                        del self._ops[entry["op"]]
+
+    def _append(self, entries: List[dict], sync: bool = False):
+        self.session_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def enqueue(self, ops: List[tuple]) -> List[str]:
+        """Durably record (kind, payload) operations before executing them."""
+        entries = [
+            {
+                "op": uuid.uuid4().hex[:12],
+                "kind": kind,
+                "payload": payload,
+                "enqueued_at": datetime.now().isoformat(),
+            }
+            for kind, payload in ops
+        ]
+        self._append(entries, sync=True)
+        for entry in entries:
+            self._ops[entry["op"]] = {**entry, "status": "pending", "attempts": 0}
+        return [entry["op"] for entry in entries]
+
+    def pending(self) -> List[dict]:
+        return [op for op in self._ops.values() if op["status"] in ("pending", "failed")]
+
+    async def drain(self, handlers: Dict[str, Handler],
+                    op_ids: Optional[List[str]] = None) -> dict:
+        """
+        Execute pending operations (only `op_ids`, if given); kinds run concurrently.
+
+        Returns counts: {"done": n, "failed": n}. Failed operations stay pending
+        for the next drain, until MAX_ATTEMPTS is reached.
+        """
+        wanted = set(op_ids) if op_ids is not None else None
+        by_kind: Dict[str, List[dict]] = {}
+        for op in self.pending():
+            if wanted is None or op["op"] in wanted:
+                by_kind.setdefault(op["kind"], []).append(op)
+
+        async def run_kind(kind: str, ops: List[dict]) -> List[Union[object, Exception]]:
+            handler = handlers.get(kind)
+            if handler is None:
+                return [KeyError(f"No outbox handler for '{kind}'")] * len(ops)
+            try:
+                return await handler(ops)
+            except Exception as e:
+                return [e] * len(ops)
+
+        # Mark in flight so a concurrent drain of the same outbox skips them
+        for ops in by_kind.values():
+            for op in ops:
+                op["status"] = "running"
+
+        kinds = list(by_kind)
+        results = await asyncio.gather(*(run_kind(k, by_kind[k]) for k in kinds))
+
+        counts = {"done": 0, "failed": 0}
+        updates = []
+        for kind, kind_results in zip(kinds, results):
+            for op, result in zip(by_kind[kind], kind_results):
+                if isinstance(result, Exception):
+                    op["attempts"] += 1
+                    op["status"] = "abandoned" if op["attempts"] >= self.MAX_ATTEMPTS else "failed"
+                    updates.append({"op": op["op"], "status": op["status"], "error": str(result)})
+                    counts["failed"] += 1
+                else:
+                    op["status"] = "done"
+                    updates.append({"op": op["op"], "status": "done"})
+                    counts["done"] += 1
+                # Finished ops (and their payloads) are only kept on disk
+                if op["status"] in self.FINISHED:
+                    del self._ops[op["op"]]
+
+        if updates:
+            self._append(updates, sync=True)
+        # Only unfinished ops stay in _ops: archive once none is pending, failed
+        # or still running in a concurrent drain
+        if not self._ops:
+            self._archive_log()
+
+        return counts
+
+    def _archive_log(self):
+        """Move a fully drained log to outbox.done.jsonl so restarts skip it."""
+        if not self.path.exists():
+            return
+        with open(self.path) as log, open(self.session_dir / self.DONE_FILENAME, "a") as done:
+            shutil.copyfileobj(log, done)
+        self.path.unlink()
+
+    @classmethod
+    def find_incomplete(cls, sessions_root: Path,
+                        exclude: Optional[Path] = None) -> List["ActionOutbox"]:
+        """Outboxes of earlier sessions that still have pending operations."""
+        outboxes = []
+        for path in sorted(Path(sessions_root).glob(f"*/{cls.FILENAME}")):
+            if exclude and path.parent == exclude:
+                continue
+            outbox = cls(path.parent)
+            if outbox.pending():
+                outboxes.append(outbox)
+        return outboxes
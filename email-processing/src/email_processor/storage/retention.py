@@ -0,0 +1,98 @@
+"""Retention for storage.auto_cleanup.
+
+Deletes session directories and emails dated more than `keep_sessions_days`
+ago, with their index entries (latest-state and sender indexes), releasing
+their body blobs. Optionally archives everything it deletes into one
+compressed tar bundle per run.
+
+Emails triaged in a session within the window are kept whatever their date:
+an old message still in the inbox is re-triaged on every run, and pruning it
+by date alone would delete and re-save it over and over.
+
+Work is incremental: expired emails and sessions are deleted, so each run
+only sees what expired since the last one (plus old emails kept because they
+were seen recently), and a run whose cutoff date was already applied returns
+at once. Sessions with pending outbox actions are kept until those are
+resumed.
+
+Structure:
+  data/
+    <account>/
+      index/retention.json            # Cutoff and counts of the last run
+      archive/pruned-<cutoff>.tar.gz  # With auto_cleanup.archive
+"""
+
+import json
+import os
+import re
+import tarfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+from .file_storage import FileStorage
+from .outbox import ActionOutbox
+
+_SESSION = re.compile(r"\d{4}-\d{2}-\d{2}_")
+
+
+class Retention:
+    """Prunes one account's storage to the last `keep_days` days."""
+
+    def __init__(self, storage: FileStorage, keep_days: int, archive: bool = False):
+        self.storage = storage
+        self.keep_days = keep_days
+        self.archive = archive
+        self.state_file = storage.index_dir / "retention.json"
+
+    def run(self) -> Optional[dict]:
+        """Prune what expired since the last run; None if there was nothing new to do."""
+        cutoff = (datetime.now(self.storage.tz) - timedelta(days=self.keep_days)).date().isoformat()
+        if self.state_file.exists() and json.loads(self.state_file.read_text()).get("cutoff") == cutoff:
+            return None
+
+        sessions = self._expired_sessions(cutoff)
+        records = self.storage.expired_emails(cutoff)
+        refs = [record["body_blob"] for record in records if record.get("body_blob")]
+        result = {"cutoff": cutoff, "sessions": len(sessions), "emails": len(records), "blobs": 0}
+
+        if self.archive and (sessions or records):
+            result["archive"] = str(self._write_archive(cutoff, sessions, records, refs))
+        self.storage.delete_expired(records, sessions)
+        result["blobs"] = self.storage.blobs.release(refs)
+
+        result["pruned_at"] = datetime.now(self.storage.tz).isoformat()
+        self.state_file.write_text(json.dumps(result, indent=2))
+        return result
+
+    def _expired_sessions(self, cutoff: str) -> List[str]:
+        """Session IDs started before the cutoff date, except this one and unfinished outboxes."""
+        expired = []
+        for path in sorted((self.storage.base / "sessions").iterdir()):
+            if not _SESSION.match(path.name) or path.name == self.storage.session_id:
+                continue
+            if path.name[:10] >= cutoff:
+                break
+            if (path / ActionOutbox.FILENAME).exists() and ActionOutbox(path).pending():
+                continue  # Side effects still to be resumed
+            expired.append(path.name)
+        return expired
+
+    def _write_archive(self, cutoff: str, sessions: List[str], records: List[dict], refs: List[str]) -> Path:
+        """Bundle everything about to be deleted, with the blobs (and dictionaries) it uses."""
+        archive_dir = self.storage.base / "archive"
+        archive_dir.mkdir(exist_ok=True)
+        path = archive_dir / f"pruned-{cutoff}.tar.gz"
+        tmp = path.with_name(path.name + ".tmp")
+
+        blobs = self.storage.blobs
+        with tarfile.open(tmp, "w:gz") as tar:
+            self.storage.archive_expired(tar, records, sessions)
+            for ref in sorted(set(refs)):
+                blob = blobs.locate(ref)
+                if blob is not None:
+                    tar.add(blob, arcname=f"blobs/{blob.relative_to(blobs.path)}")
+            if blobs.dict_dir.exists():
+                tar.add(blobs.dict_dir, arcname="blobs/dictionaries")
+        os.replace(tmp, path)
+        return path
@@ -0,0 +1,109 @@
+"""Durable queue of emails waiting for human review.
+
+Triage runs append the emails they could not decide automatically; the
+`review` command works through them later from local storage only.
+
+Structure:
+  data/
+    <account>/
+      review/
+        queue.jsonl   # {"key", "session_id", "email", "decision"} or {"key", "resolved": action}
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from ..models.email import Email, TriageDecision
+from .serialization import decision_from_dict, decision_to_dict, email_from_dict, email_to_dict
+
+
+class ReviewQueue:
+    """Append-only log of queued / resolved review items, one pending entry per thread."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._pending: Dict[str, dict] = {}
+        self._lines = 0
+        self._load()
+
+    @staticmethod
+    def _key(email: Email) -> str:
+        return email.thread_id or email.message_id
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        with open(self.path) as f:
+            for line in f:
+                self._lines += 1
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Torn final line from a crash
+                if "resolved" in entry:
+                    self._pending.pop(entry["key"], None)
+                else:
+                    # A later run re-queuing the same thread replaces the old entry
+                    self._pending.pop(entry["key"], None)
+                    self._pending[entry["key"]] = entry
+
+        # Resolved entries are dead weight once they outnumber pending ones
+        if self._lines > 2 * len(self._pending) + 100:
+            self._compact()
+
+    def _compact(self):
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            for entry in self._pending.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp, self.path)
+        self._lines = len(self._pending)
+
+    def _append(self, entries: List[dict]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._lines += len(entries)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, items: List[Tuple[Email, TriageDecision]], session_id: str):
+        """Queue (email, decision) pairs for review."""
+        entries = [
+            {
+                "key": self._key(email),
+                "session_id": session_id,
+                "queued_at": datetime.now().isoformat(),
+                "email": email_to_dict(email),
+                "decision": decision_to_dict(decision),
+            }
+            for email, decision in items
+        ]
+        if entries:
+            self._append(entries)
+            for entry in entries:
+                self._pending.pop(entry["key"], None)
+                self._pending[entry["key"]] = entry
+
+    def resolve(self, emails: Iterable[Email], action: str):
+        """Remove reviewed (or since auto-handled) emails from the queue."""
+        keys = [self._key(e) for e in emails if self._key(e) in self._pending]
+        if keys:
+            at = datetime.now().isoformat()
+            self._append([{"key": key, "resolved": action, "at": at} for key in keys])
+            for key in keys:
+                del self._pending[key]
+
+    def pending(self) -> List[Tuple[Email, TriageDecision]]:
+        """Queued items, oldest first."""
+        return [
+            (email_from_dict(entry["email"]), decision_from_dict(entry["decision"]))
+            for entry in self._pending.values()
+        ]
@@ -0,0 +1,125 @@
+"""Incremental sender index: sender → message count and last-seen date.
+
+Kept in a dbm key-value store, so recording a batch of emails touches only
+their keys instead of rewriting the whole index:
+
+  m:<message_id>  → sender            (membership: each message counted once)
+  s:<sender>      → {"count", "last_seen"}
+
+Replaces by-sender.json, which is imported on first open and kept as
+by-sender.json.imported. The rename comes last, so a by-sender.json still
+in place means the import never finished and it is redone from scratch.
+Changes are synced once per batch rather than per
+key, since some dbm implementations (dbm.dumb) rewrite their whole directory
+file on every sync.
+
+Structure:
+  data/
+    <account>/
+      index/
+        by-sender.*   # dbm files (suffixes depend on the dbm implementation)
+"""
+
+import dbm
+import json
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from ..models.email import Email
+
+
+class SenderIndex:
+    """dbm-backed sender index; opened on first use."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._db = None
+
+    def _open(self):
+        if self._db is None:
+            legacy = self.path.with_suffix(".json")
+            if legacy.exists():
+                # New or half-imported: truncate rather than trust partial contents
+                self._db = dbm.open(str(self.path), "n")
+                self._import_json(legacy)
+            else:
+                self._db = dbm.open(str(self.path), "c")
+        return self._db
+
+    def _import_json(self, legacy: Path):
+        """One-time import of the old by-sender.json."""
+        for sender, entry in json.loads(legacy.read_text()).items():
+            for message_id in entry.get("message_ids", []):
+                self._db[f"m:{message_id}"] = sender
+            self._db[f"s:{sender}"] = json.dumps(
+                {"count": entry.get("count", 0), "last_seen": entry.get("last_seen", "")}
+            )
+        self._sync()
+        legacy.rename(legacy.with_name(legacy.name + ".imported"))
+
+    def update(self, emails: Iterable[Email]):
+        """Count new messages per sender and advance their last-seen dates."""
+        db = self._open()
+        senders: Dict[str, dict] = {}
+        for email in emails:
+            sender = email.from_addr.lower()
+            if sender not in senders:
+                raw = db.get(f"s:{sender}")
+                senders[sender] = json.loads(raw) if raw else {"count": 0, "last_seen": ""}
+            entry = senders[sender]
+
+            key = f"m:{email.message_id}"
+            if key not in db:
+                db[key] = sender
+                entry["count"] += 1
+            entry["last_seen"] = max(entry["last_seen"], email.date.isoformat())
+
+        for sender, entry in senders.items():
+            db[f"s:{sender}"] = json.dumps(entry)
+        self._sync()
+
+    def remove(self, message_ids: Iterable[str]):
+        """Uncount messages (pruned by retention); senders left with none are dropped."""
+        db = self._open()
+        senders: Dict[str, dict] = {}
+        for message_id in message_ids:
+            key = f"m:{message_id}"
+            if key not in db:
+                continue
+            sender = db[key].decode()
+            del db[key]
+            if sender not in senders:
+                raw = db.get(f"s:{sender}")
+                senders[sender] = json.loads(raw) if raw else {"count": 0, "last_seen": ""}
+            senders[sender]["count"] -= 1
+
+        for sender, entry in senders.items():
+            if entry["count"] > 0:
+                db[f"s:{sender}"] = json.dumps(entry)
+            elif f"s:{sender}" in db:
+                del db[f"s:{sender}"]
+        self._sync()
+
+    def _sync(self):
+        # Not every dbm implementation has sync() (dbm.ndbm writes through)
+        if hasattr(self._db, "sync"):
+            self._db.sync()
+
+    def get(self, sender: str) -> Optional[dict]:
+        """{"count", "last_seen"} for a sender, if seen."""
+        raw = self._open().get(f"s:{sender.lower()}")
+        return json.loads(raw) if raw else None
+
+    def message_ids(self, sender: str) -> List[str]:
+        """Message IDs seen from a sender (full scan; for inspection, not hot paths)."""
+        db = self._open()
+        sender = sender.lower().encode()
+        return [
+            key[2:].decode() for key in db.keys()
+            if key.startswith(b"m:") and db[key] == sender
+        ]
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
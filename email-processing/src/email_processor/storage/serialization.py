@@ -0,0 +1,40 @@
+"""JSON-safe dict conversion for Email and TriageDecision.
+
+Used wherever in-flight work must survive the process (outbox, checkpoints).
+"""
+
+from dataclasses import asdict, fields
+from datetime import datetime
+
+from ..models.email import Email, TriageDecision
+
+
+def email_to_dict(email: Email, include_body: bool = True) -> dict:
+    """Serialize an Email (datetimes as ISO strings)."""
+    data = asdict(email)
+    data["date"] = email.date.isoformat()
+    data["fetched_at"] = email.fetched_at.isoformat()
+    if not include_body:
+        data["body"] = None
+    return data
+
+
+def email_from_dict(data: dict) -> Email:
+    """Inverse of email_to_dict (unknown keys are ignored)."""
+    known = {f.name for f in fields(Email)}
+    kwargs = {k: v for k, v in data.items() if k in known}
+    kwargs["date"] = datetime.fromisoformat(data["date"])
+    if data.get("fetched_at"):
+        kwargs["fetched_at"] = datetime.fromisoformat(data["fetched_at"])
+    else:
+        kwargs.pop("fetched_at", None)
+    return Email(**kwargs)
+
+
+def decision_to_dict(decision: TriageDecision) -> dict:
+    return asdict(decision)
+
+
+def decision_from_dict(data: dict) -> TriageDecision:
+    known = {f.name for f in fields(TriageDecision)}
+    return TriageDecision(**{k: v for k, v in data.items() if k in known})
@@ -0,0 +1,312 @@
+"""SQLite storage backend (storage.backend = "sqlite").
+
+Same interface as FileStorage, but emails, decisions, processed entries and
+the latest-state index live in one WAL-mode database per account instead of
+a directory (and several small JSON files) per email. Writes run on the
+write-behind thread, batched into transactions; `flush()` commits.
+
+Sessions (session.json, checkpoint, outbox, LLM logs), the review queue,
+stats.json, the sender index and body blobs stay files, as with FileStorage.
+
+Structure:
+  data/
+    <account>/
+      storage.db
+        emails      (message_id, thread_id, date, partition, from_addr, data)
+        decisions   (message_id, session_id, action, category, data)
+        processed   (session_id, message_id, action, data)
+        email_index (message_id, last_action, last_category, last_session, data)
+
+`partition` is the email's date in the account timezone (YYYY-MM-DD), the
+same day FileStorage files it under; retention compares against it (and
+against email_index.last_session).
+"""
+
+import io
+import json
+import sqlite3
+import tarfile
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, Optional, Set
+from zoneinfo import ZoneInfo
+
+from ..models.email import Email, TriageDecision
+from .file_storage import FileStorage
+
+DB_FILENAME = "storage.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS emails (
+    message_id TEXT PRIMARY KEY,
+    thread_id  TEXT,
+    date       TEXT,
+    partition  TEXT,
+    from_addr  TEXT,
+    data       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS emails_thread ON emails(thread_id);
+CREATE INDEX IF NOT EXISTS emails_date ON emails(date);
+
+CREATE TABLE IF NOT EXISTS decisions (
+    message_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    action     TEXT,
+    category   TEXT,
+    data       TEXT NOT NULL,
+    PRIMARY KEY (message_id, session_id)
+);
+
+CREATE TABLE IF NOT EXISTS processed (
+    session_id TEXT NOT NULL,
+    message_id TEXT NOT NULL,
+    action     TEXT,
+    data       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS processed_session ON processed(session_id);
+
+CREATE TABLE IF NOT EXISTS email_index (
+    message_id    TEXT PRIMARY KEY,
+    last_action   TEXT,
+    last_category TEXT,
+    last_session  TEXT,
+    data          TEXT NOT NULL
+);
+"""
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    """Open (creating if needed) a storage database in WAL mode."""
+    # Used from the write-behind thread as well as the caller's
+    conn = sqlite3.connect(str(path), check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL + NORMAL: a commit survives a process crash; only an OS crash can lose the last ones
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    # Databases created before the partition column
+    if "partition" not in {row[1] for row in conn.execute("PRAGMA table_info(emails)")}:
+        conn.execute("ALTER TABLE emails ADD COLUMN partition TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS emails_partition ON emails(partition)")
+    conn.commit()
+    return conn
+
+
+def partition_date(date: str, tz: ZoneInfo) -> str:
+    """The account-timezone day (YYYY-MM-DD) of an ISO date, as emails/<date>/ uses."""
+    return datetime.fromisoformat(date).astimezone(tz).strftime('%Y-%m-%d')
+
+
+class SQLiteStorage(FileStorage):
+    """FileStorage with per-email records in SQLite."""
+
+    def __init__(self, base_path: str, account: str, timezone: str = "America/Los_Angeles",
+                 session_id: Optional[str] = None, batch_size: int = 500, **kwargs):
+        super().__init__(base_path, account, timezone=timezone, session_id=session_id, **kwargs)
+        self.db_path = self.base / DB_FILENAME
+        self.batch_size = batch_size
+        self._conn = connect(self.db_path)
+        self._pending = 0
+        self._backfill_partitions()
+
+    def _backfill_partitions(self):
+        """Fill in the partition of rows stored before the column existed."""
+        rows = self._conn.execute("SELECT message_id, date FROM emails WHERE partition IS NULL").fetchall()
+        if rows:
+            with self._conn:
+                self._conn.executemany(
+                    "UPDATE emails SET partition = ? WHERE message_id = ?",
+                    ((partition_date(date, self.tz), message_id) for message_id, date in rows),
+                )
+
+    def _write(self, sql: str, params: tuple):
+        """Execute a write in the open transaction; commit every `batch_size` writes (writer thread)."""
+        cursor = self._conn.execute(sql, params)
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self._commit()
+        return cursor
+
+    def _commit(self):
+        if self._pending:
+            self._conn.commit()
+            self._pending = 0
+
+    # --- Email storage ---
+
+    def _write_email(self, email: Email):
+        """Insert the email row (save_email queues this), backfilling body/attachments."""
+        row = self._conn.execute(
+            "SELECT data FROM emails WHERE message_id = ?", (email.message_id,)
+        ).fetchone()
+        if row is None:
+            # Built only for new rows: building it stores (and counts) the body blob
+            data = self._email_record(email)
+            self._write(
+                "INSERT INTO emails (message_id, thread_id, date, partition, from_addr, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (email.message_id, email.thread_id, data["date"], partition_date(data["date"], self.tz),
+                 email.from_addr.lower(), json.dumps(data, ensure_ascii=False)),
+            )
+            return
+        if not (email.body or email.attachments):
+            return
+
+        # Backfill body/attachments if previously stored without them
+        existing = json.loads(row[0])
+        changed = False
+        if email.body and not (existing.get("body") or existing.get("body_blob")):
+            existing["body_blob"] = self.blobs.put(email.body)
+            changed = True
+        if email.attachments and not existing.get("attachments"):
+            existing["attachments"] = email.attachments
+            changed = True
+        if changed:
+            self._write("UPDATE emails SET data = ? WHERE message_id = ?",
+                        (json.dumps(existing, ensure_ascii=False), email.message_id))
+
+    # --- Decision storage ---
+
+    def save_decision(self, decision: TriageDecision, email: Optional[Email] = None,
+                      trello_info: Optional[dict] = None, track: bool = True):
+        """Save triage decision for an email in this session (`track` counts it in stats)."""
+        message_id = email.message_id if email else decision.message_id
+        data = self._decision_record(decision, trello_info)
+        self._writer.submit(
+            self._write,
+            "INSERT OR REPLACE INTO decisions (message_id, session_id, action, category, data) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (message_id, self.session_id, decision.action, decision.category,
+             json.dumps(data, ensure_ascii=False)),
+        )
+        if track:
+            self.track_decision(decision)
+
+    # --- Session logging ---
+
+    def log_processed(self, message_id: str, action: str, auto: bool,
+                      processor: str = "", trello_card_id: str = None):
+        """Record a processed email for this session."""
+        entry = self._processed_record(message_id, action, auto, processor, trello_card_id)
+        self._writer.submit(
+            self._write,
+            "INSERT INTO processed (session_id, message_id, action, data) VALUES (?, ?, ?, ?)",
+            (self.session_id, message_id, action, json.dumps(entry)),
+        )
+
+    # --- Index management ---
+
+    def update_index(self, email: Email, decision: TriageDecision):
+        """Upsert the email's latest-state index entry."""
+        entry = self._index_record(email, decision)
+        self._writer.submit(
+            self._write,
+            "INSERT OR REPLACE INTO email_index "
+            "(message_id, last_action, last_category, last_session, data) VALUES (?, ?, ?, ?, ?)",
+            (email.message_id, decision.action, decision.category, self.session_id,
+             json.dumps(entry, ensure_ascii=False)),
+        )
+
+    def index_stats(self) -> dict:
+        """Current state over all stored emails: {"emails", "by_action", "by_category"}."""
+        self.flush()
+
+        def grouped(column: str) -> dict:
+            return dict(self._conn.execute(
+                f"SELECT {column}, COUNT(*) FROM email_index WHERE {column} IS NOT NULL GROUP BY {column}"
+            ).fetchall())
+
+        emails = self._conn.execute("SELECT COUNT(*) FROM email_index").fetchone()[0]
+        return {"emails": emails, "by_action": grouped("last_action"), "by_category": grouped("last_category")}
+
+    # --- Retention (see retention.py) ---
+
+    # Emails dated before a cutoff, by their own date (as email.json partitions
+    # are), and not triaged in a session since
+    _EXPIRED = (
+        "SELECT emails.data FROM emails LEFT JOIN email_index USING (message_id) "
+        "WHERE partition < ? AND (last_session IS NULL OR last_session < ?)"
+    )
+
+    def _by_ids(self, sql: str, message_ids: List[str], *params) -> Iterator[tuple]:
+        """Rows of `sql` (`{}` marks the IN list) for `message_ids`, in chunks."""
+        for i in range(0, len(message_ids), 500):
+            chunk = message_ids[i:i + 500]
+            yield from self._conn.execute(sql.format(",".join("?" * len(chunk))), (*params, *chunk))
+
+    def _seen_since(self, message_ids: List[str], cutoff: str) -> Set[str]:
+        """Those of `message_ids` whose latest triage session is on or after `cutoff`."""
+        return {row[0] for row in self._by_ids(
+            "SELECT message_id FROM email_index WHERE last_session >= ? AND message_id IN ({})",
+            message_ids, cutoff,
+        )}
+
+    def expired_emails(self, cutoff: str) -> List[dict]:
+        """Expired records (see FileStorage.expired_emails); rows from storage.db have no "_path"."""
+        self.flush()
+        rows = self._conn.execute(self._EXPIRED, (cutoff, cutoff)).fetchall()
+        return super().expired_emails(cutoff) + [json.loads(data) for data, in rows]
+
+    def archive_expired(self, tar, records: List[dict], session_ids: List[str]):
+        """Add expired rows (as JSONL per table), email directories and sessions to an open tarfile."""
+        super().archive_expired(tar, records, session_ids)
+        rows = [record for record in records if "_path" not in record]
+        placeholders = ",".join("?" * len(session_ids))
+        tables = {
+            "emails": [json.dumps(record, ensure_ascii=False) for record in rows],
+            "decisions": [data for data, in self._by_ids(
+                "SELECT data FROM decisions WHERE message_id IN ({})", [r["message_id"] for r in rows])],
+            "processed": [data for data, in self._conn.execute(
+                f"SELECT data FROM processed WHERE session_id IN ({placeholders})", tuple(session_ids))],
+        }
+        for table, lines in tables.items():
+            data = "".join(line + "\n" for line in lines).encode()
+            if data:
+                info = tarfile.TarInfo(f"storage.db/{table}.jsonl")
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+
+    def delete_expired(self, records: List[dict], session_ids: List[str]):
+        """Delete expired rows in one transaction, then what FileStorage keeps as files."""
+        self.flush()
+        ids = [(record["message_id"],) for record in records]
+        with self._conn:
+            for table in ("decisions", "email_index", "emails"):
+                self._conn.executemany(f"DELETE FROM {table} WHERE message_id = ?", ids)
+            self._conn.executemany("DELETE FROM processed WHERE session_id = ?", ((s,) for s in session_ids))
+        super().delete_expired(records, session_ids)
+
+    # --- Backend lifecycle ---
+
+    def flush(self):
+        """Block until queued writes are committed."""
+        if self._conn is not None:
+            self._writer.submit(self._commit)
+        super().flush()
+
+    def close(self):
+        if self._conn is not None:
+            self._writer.submit(self._commit)
+        try:
+            super().close()
+        finally:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def iter_emails(db_path: Path) -> Iterator[dict]:
+    """Stored emails (as in email.json), each with its latest decision under "_decision"."""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(
+            "SELECT e.data, ("
+            "  SELECT d.data FROM decisions d WHERE d.message_id = e.message_id"
+            "  ORDER BY d.session_id DESC LIMIT 1"
+            ") FROM emails e ORDER BY e.date"
+        )
+        for email_data, decision_data in rows:
+            email = json.loads(email_data)
+            email["_decision"] = json.loads(decision_data) if decision_data else None
+            yield email
+    finally:
+        conn.close()
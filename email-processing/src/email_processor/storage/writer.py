@@ -0,0 +1,121 @@
+"""Write-behind storage writer.
+
+Storage writes (email and decision files, session logs, index updates) are
+queued and run in order on one background thread, so the pipeline's event
+loop never waits on the filesystem. Log lines go to long-lived append
+handles, written in batches and flushed every `flush_seconds`.
+
+`flush()` blocks until everything queued so far has been written; call it
+before recording that writes are durable (the session checkpoint).
+"""
+
+import queue
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+_STOP = object()
+
+
+class StorageWriter:
+    """Single background thread running queued storage writes in order."""
+
+    def __init__(self, flush_seconds: float = 1.0, max_pending: int = 10000):
+        self.flush_seconds = flush_seconds
+        # Bounded: a writer that falls behind slows producers instead of growing memory
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._handles: Dict[Path, object] = {}
+        self._dirty = False
+        self._error: Optional[BaseException] = None
+
+    # --- Producer side ---
+
+    def submit(self, fn: Callable, *args):
+        """Run `fn(*args)` on the writer thread, after everything queued before it."""
+        self._ensure_started()
+        self._queue.put((fn, args))
+
+    def append(self, path: Path, line: str):
+        """Append a line (newline added) to a log file kept open by the writer."""
+        self.submit(self._append, Path(path), line)
+
+    def flush(self):
+        """Block until everything queued so far is written; re-raises a failed write."""
+        if self._thread is not None:
+            done = threading.Event()
+            self.submit(self._flush_handles, done)
+            done.wait()
+        self._raise_error()
+
+    def close(self):
+        """Write everything queued, close the log handles and stop the thread."""
+        with self._start_lock:
+            if self._thread is not None:
+                self._queue.put((_STOP, ()))
+                self._thread.join()
+                self._thread = None
+        self._raise_error()
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="storage-writer", daemon=True)
+                    self._thread.start()
+
+    def _raise_error(self):
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    # --- Writer thread ---
+
+    def _run(self):
+        while True:
+            try:
+                batch = [self._queue.get(timeout=self.flush_seconds)]
+            except queue.Empty:
+                batch = [(self._flush_handles, ())]  # Idle: push buffered lines out
+
+            # Take whatever else is already queued as one batch
+            while len(batch) < 1000:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for fn, args in batch:
+                if fn is _STOP:
+                    self._close_handles()
+                    return
+                try:
+                    fn(*args)
+                except Exception as e:
+                    # Surfaced by the next flush(), so nothing is checkpointed past it
+                    if self._error is None:
+                        self._error = e
+
+    def _append(self, path: Path, line: str):
+        handle = self._handles.get(path)
+        if handle is None:
+            handle = self._handles[path] = open(path, "a")
+        handle.write(line + "\n")
+        self._dirty = True
+
+    def _flush_handles(self, done: Optional[threading.Event] = None):
+        try:
+            if self._dirty:
+                for handle in self._handles.values():
+                    handle.flush()
+                self._dirty = False
+        finally:
+            if done is not None:
+                done.set()
+
+    def _close_handles(self):
+        for handle in self._handles.values():
+            handle.close()
+        self._handles = {}
+        self._dirty = False
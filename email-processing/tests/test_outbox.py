@@ -0,0 +1,38 @@
+"""Write-ahead guarantees of ActionOutbox."""
+
+import asyncio
+
+from email_processor.storage.outbox import ActionOutbox
+
+
+def test_concurrent_drain_keeps_log_until_all_ops_finish(tmp_path):
+    session_dir = tmp_path / "sessions" / "2026-01-01_000000-PST"
+    outbox = ActionOutbox(session_dir)
+    first = outbox.enqueue([("archive_threads", {"thread_ids": ["t1"]})])
+    second = outbox.enqueue([("archive_threads", {"thread_ids": ["t2"]})])
+
+    async def run():
+        release = asyncio.Event()
+
+        async def fast(ops):
+            return [True] * len(ops)
+
+        async def blocked(ops):
+            await release.wait()
+            return [True] * len(ops)
+
+        slow = asyncio.create_task(outbox.drain({"archive_threads": blocked}, op_ids=second))
+        await asyncio.sleep(0)  # The second drain's op is now running
+        await outbox.drain({"archive_threads": fast}, op_ids=first)
+
+        # Crash here: a fresh process must still see the in-flight op
+        assert outbox.path.exists()
+        recovered = ActionOutbox.find_incomplete(tmp_path / "sessions")
+        assert [op["op"] for box in recovered for op in box.pending()] == second
+
+        release.set()
+        await slow
+
+    asyncio.run(run())
+    assert not outbox.path.exists()
+    assert (session_dir / ActionOutbox.DONE_FILENAME).exists()